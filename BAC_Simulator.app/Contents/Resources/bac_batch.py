@@ -0,0 +1,245 @@
+"""
+Population Batch Simulator
+Evaluates many profiles x many drinking scenarios on one shared time grid
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import bac_engine
+from bac_calculator import BACCalculator
+
+np = bac_engine.load_numpy()
+
+# Profile rows evaluated together; bounds the (rows x scenarios x samples) block
+PROFILE_BLOCK = 256
+
+# Model parameters that change the scenario kernels rather than a profile row
+ABSORPTION_PARAMETERS = ('absorption_time_empty', 'absorption_time_fed', 'immediate_absorption')
+
+
+class PopulationResult(NamedTuple):
+    """Matrices indexed [profile, scenario] (and [..., sample] for curves)"""
+    offsets_hours: 'np.ndarray'   # Shared time grid, hours since scenario start
+    peak_bac: 'np.ndarray'        # Highest sampled BAC
+    time_to_peak: 'np.ndarray'    # Hours to the peak sample
+    time_to_sober: 'np.ndarray'   # Hours to the first zero sample after the peak (nan if beyond horizon)
+    curves: 'np.ndarray'          # BAC per sample, or None when not requested
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The population batch simulator requires NumPy")
+
+
+def _profile_columns(profiles: Union[Sequence[Dict], Dict[str, Sequence]]) -> Tuple[Dict, int]:
+    """A profile table as (dict of columns, row count)"""
+    if isinstance(profiles, dict):
+        return profiles, len(profiles['weight_lbs'])
+    columns = {
+        'sex': [p.get('sex', 'male') for p in profiles],
+        'weight_lbs': [p['weight_lbs'] for p in profiles],
+        'age': [p.get('age', 30) for p in profiles],
+        'chronic_drinker': [p.get('chronic_drinker', False) for p in profiles],
+    }
+    return columns, len(profiles)
+
+
+def profile_parameters(profiles: Union[Sequence[Dict], Dict[str, Sequence]],
+                       calculator_class=BACCalculator) -> Optional[List[Dict]]:
+    """
+    Per-row model parameter overrides from calculator_class.profile_model_parameters
+    (e.g. calibrated fits), or None when the class has none for any profile.
+    """
+    if calculator_class.profile_model_parameters.__func__ is BACCalculator.profile_model_parameters.__func__:
+        return None
+    columns, count = _profile_columns(profiles)
+    sex = columns.get('sex', ['male'] * count)
+    age = columns.get('age', [30] * count)
+    chronic = columns.get('chronic_drinker', [False] * count)
+    overrides = [calculator_class.profile_model_parameters({
+        'sex': str(sex[i]).lower(), 'weight_lbs': float(columns['weight_lbs'][i]),
+        'age': int(age[i]), 'chronic_drinker': bool(chronic[i])}) for i in range(count)]
+    return overrides if any(overrides) else None
+
+
+def profile_arrays(profiles: Union[Sequence[Dict], Dict[str, Sequence]],
+                   calculator_class=BACCalculator, overrides: Optional[List[Dict]] = None):
+    """
+    Convert a profile table to (widmark_scale, elimination_rate) arrays.
+
+    Args:
+        profiles: List of profile dicts, or a dict of columns, with 'sex',
+                  'weight_lbs' and optional 'chronic_drinker' and 'age' (age
+                  only selects a calibrated fit; it does not enter the model)
+        overrides: Result of profile_parameters(); looked up when not given
+    """
+    _require_numpy()
+    columns, count = _profile_columns(profiles)
+    if overrides is None:
+        overrides = profile_parameters(profiles, calculator_class)
+
+    ratios = calculator_class.WIDMARK_RATIOS
+    sex = columns.get('sex', ['male'] * count)
+    ratio = np.array([ratios.get(str(s).lower(), 0.73) for s in sex], dtype=np.float64)
+    weight = np.asarray(columns['weight_lbs'], dtype=np.float64)
+    chronic = np.asarray(columns.get('chronic_drinker', [False] * count), dtype=bool)
+
+    elimination = calculator_class.ELIMINATION_RATE * np.where(
+        chronic, calculator_class.CHRONIC_ELIMINATION_FACTOR, 1.0)
+    for row, override in enumerate(overrides or ()):
+        if override.get('widmark_ratio') is not None:
+            ratio[row] = override['widmark_ratio']
+        if override.get('elimination_rate') is not None:
+            elimination[row] = override['elimination_rate']
+    return 5.14 / (weight * ratio), elimination
+
+
+def absorption_groups(overrides: Optional[List[Dict]], rows: int) -> Tuple[List[Dict], 'np.ndarray']:
+    """
+    Rows sharing absorption constants share scenario kernels. Returns the
+    distinct absorption overrides (set_model_parameters arguments) and each
+    row's index into them.
+    """
+    _require_numpy()
+    if not overrides:
+        return [{}], np.zeros(rows, dtype=np.intp)
+    groups = {}
+    index = np.empty(rows, dtype=np.intp)
+    for row, override in enumerate(overrides):
+        key = tuple(override.get(name) for name in ABSORPTION_PARAMETERS)
+        index[row] = groups.setdefault(key, len(groups))
+    parameters = [{name: value for name, value in zip(ABSORPTION_PARAMETERS, key) if value is not None}
+                  for key in groups]
+    return parameters, index
+
+
+def scenario_calculator(scenario: Dict, calculator_class=BACCalculator,
+                        model_parameters: Dict = None) -> BACCalculator:
+    """
+    Build a calculator holding one scenario's events.
+
+    Args:
+        scenario: {'drinks': [...], 'foods': [...], 'start_time': datetime (optional)}.
+                  Event 'time' is a datetime or minutes after start_time; drinks
+                  take the same keys as BACCalculator.add_drinks.
+        model_parameters: set_model_parameters arguments to apply first
+    """
+    calculator = calculator_class()
+    if model_parameters:
+        calculator.set_model_parameters(**model_parameters)
+    start = scenario.get('start_time') or datetime(2000, 1, 1)
+    calculator.start_time = start
+
+    def at(event):
+        time = event['time']
+        if not isinstance(time, datetime):
+            time = start + timedelta(minutes=float(time))
+        return dict(event, time=time)
+
+    calculator.add_foods(at(f) for f in scenario.get('foods', ()))
+    calculator.add_drinks(at(d) for d in scenario.get('drinks', ()))
+    return calculator
+
+
+def scenario_kernels(scenarios: Sequence[Dict], offsets, calculator_class=BACCalculator,
+                     model_parameters: Dict = None):
+    """
+    Absorbed alcohol (oz) per scenario per sample, shape (scenarios, samples).
+    This is profile independent, so it is computed once and shared by every
+    row with the same absorption constants (model_parameters).
+    """
+    _require_numpy()
+    kernels = np.zeros((len(scenarios), len(offsets)), dtype=np.float64)
+    for i, scenario in enumerate(scenarios):
+        calculator = scenario_calculator(scenario, calculator_class, model_parameters)
+        kernels[i] = bac_engine.absorbed_alcohol(offsets, *calculator.get_drink_constants(),
+                                                 calculator.IMMEDIATE_ABSORPTION)
+    return kernels
+
+
+def evaluate_rows(scale, elimination, kernels, offsets, curves: bool = True) -> PopulationResult:
+    """
+    Evaluate the profile rows against precomputed scenario kernels.
+
+    BAC[p, s, t] = max(0, scale[p] × kernels[s, t] - elimination[p] × t)
+    """
+    _require_numpy()
+    scale = np.asarray(scale, dtype=np.float64)
+    elimination = np.asarray(elimination, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.float64)
+    hours = offsets / 3600
+    rows, n_scenarios, n_samples = scale.shape[0], kernels.shape[0], offsets.shape[0]
+
+    peak_bac = np.zeros((rows, n_scenarios))
+    time_to_peak = np.zeros((rows, n_scenarios))
+    time_to_sober = np.full((rows, n_scenarios), np.nan)
+    all_curves = np.empty((rows, n_scenarios, n_samples)) if curves else None
+
+    for lo in range(0, rows, PROFILE_BLOCK):
+        hi = min(lo + PROFILE_BLOCK, rows)
+        block = scale[lo:hi, None, None] * kernels[None, :, :]
+        block -= elimination[lo:hi, None, None] * hours[None, None, :]
+        block = np.round(np.maximum(block, 0.0), 4)
+
+        peak_index = block.argmax(axis=2)
+        peak_bac[lo:hi] = np.take_along_axis(block, peak_index[..., None], axis=2)[..., 0]
+        time_to_peak[lo:hi] = hours[peak_index]
+
+        # First zero sample at or after the peak
+        after_peak = np.arange(n_samples)[None, None, :] >= peak_index[..., None]
+        sober = (block <= 0) & after_peak
+        sober_index = sober.argmax(axis=2)
+        time_to_sober[lo:hi] = np.where(sober.any(axis=2), hours[sober_index], np.nan)
+
+        if curves:
+            all_curves[lo:hi] = block
+
+    return PopulationResult(hours, peak_bac, time_to_peak, time_to_sober, all_curves)
+
+
+def evaluate_groups(scale, elimination, group_index, kernel_sets, offsets,
+                    curves: bool = True) -> PopulationResult:
+    """evaluate_rows where row i uses kernel_sets[group_index[i]] (see absorption_groups)"""
+    if len(kernel_sets) == 1:
+        return evaluate_rows(scale, elimination, kernel_sets[0], offsets, curves)
+
+    parts = []
+    for group, kernels in enumerate(kernel_sets):
+        rows = np.flatnonzero(group_index == group)
+        parts.append((rows, evaluate_rows(scale[rows], elimination[rows], kernels, offsets, curves)))
+
+    def gather(field):
+        first = getattr(parts[0][1], field)
+        merged = np.empty((len(scale),) + first.shape[1:], dtype=first.dtype)
+        for rows, result in parts:
+            merged[rows] = getattr(result, field)
+        return merged
+
+    return PopulationResult(parts[0][1].offsets_hours, gather('peak_bac'), gather('time_to_peak'),
+                            gather('time_to_sober'), gather('curves') if curves else None)
+
+
+def simulate_population(profiles, scenarios: Sequence[Dict], hours: float = 24,
+                        step_minutes: float = 5, curves: bool = True,
+                        calculator_class=BACCalculator) -> PopulationResult:
+    """
+    Evaluate every profile against every scenario on a shared time grid.
+
+    Args:
+        profiles: Profile table (see profile_arrays)
+        scenarios: Scenario table (see scenario_calculator)
+        hours: Horizon from each scenario's start
+        step_minutes: Sample spacing
+        curves: Also return the full (profiles x scenarios x samples) curves
+
+    Returns:
+        PopulationResult of [profile, scenario] matrices
+    """
+    _require_numpy()
+    offsets = bac_engine.time_grid(hours, step_minutes)
+    overrides = profile_parameters(profiles, calculator_class)
+    scale, elimination = profile_arrays(profiles, calculator_class, overrides)
+    groups, group_index = absorption_groups(overrides, scale.shape[0])
+    kernel_sets = [scenario_kernels(scenarios, offsets, calculator_class, parameters)
+                   for parameters in groups]
+    return evaluate_groups(scale, elimination, group_index, kernel_sets, offsets, curves)
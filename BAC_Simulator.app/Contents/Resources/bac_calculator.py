@@ -2,9 +2,15 @@
 BAC Calculation Engine - Widmark Equation with Food Absorption Model
 Scientifically accurate blood alcohol content simulator
 """
+import copy
 import math
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import bac_engine
+import bac_solver
+from event_store import EventStore, to_seconds
 
 class BACCalculator:
     """
@@ -20,6 +26,12 @@ class BACCalculator:
 
     # Elimination rate: % BAC per hour (15 mg/100mL per hour = ~0.015%)
     ELIMINATION_RATE = 0.015  # %/hour
+    CHRONIC_ELIMINATION_FACTOR = 1.2  # 20% faster for chronic drinkers
+
+    # Absorption time constants (minutes) and fraction absorbed on consumption
+    ABSORPTION_TIME_EMPTY = 20
+    ABSORPTION_TIME_FED = 30
+    IMMEDIATE_ABSORPTION = 0.10
 
     # Food gastric emptying times (minutes) - half-life of stomach content
     FOOD_GASTRIC_TIMES = {
@@ -56,9 +68,26 @@ class BACCalculator:
         'mixed_drink': {'oz': 1.5, 'alcohol_percent': 40.0},
     }
 
+    # Sample spacing of get_bac_timeline (minutes)
+    TIMELINE_STEP_MINUTES = 5
+
+    # Adaptive timeline sampling bounds
+    ADAPTIVE_MIN_STEP_SECONDS = 10
+    ADAPTIVE_MAX_STEP_MINUTES = 60
+
+    # Constants set_model_parameters can override per instance
+    MODEL_CONSTANTS = ('WIDMARK_RATIOS', 'ELIMINATION_RATE', 'CHRONIC_ELIMINATION_FACTOR',
+                       'ABSORPTION_TIME_EMPTY', 'ABSORPTION_TIME_FED', 'IMMEDIATE_ABSORPTION')
+
     def __init__(self):
-        self.drinks_timeline = []  # List of {time, drink_type, size_oz, alcohol_percent}
-        self.food_timeline = []    # List of {time, food_type}
+        self._version = 0   # Bumped on every scenario edit
+        self._cache = {}    # Derived results for the current version
+        # Columnar timelines; rows read back as {time, type, size_oz, alcohol_percent}
+        # and {time, type}. Drinks also carry their food context as derived columns.
+        self.drinks_timeline = EventStore(('size_oz', 'alcohol_percent'),
+                                          derived=('peak_reduction', 'absorption_tau', 'alcohol_oz'))
+        self.food_timeline = EventStore()
+        self._stale_contexts = None  # (lo, hi) drink indexes whose food context is out of date
         self.profile = {
             'sex': 'male',
             'weight_lbs': 180,
@@ -69,6 +98,44 @@ class BACCalculator:
         }
         self.start_time = datetime.now()
 
+    @property
+    def version(self) -> int:
+        """Scenario version, incremented whenever drinks, food, profile or start change"""
+        return self._version
+
+    @property
+    def start_time(self) -> datetime:
+        """When drinking started (elimination is measured from here)"""
+        return self._start_time
+
+    @start_time.setter
+    def start_time(self, value: datetime):
+        self._start_time = value
+        self._invalidate()
+
+    def _invalidate(self):
+        """Bump the scenario version and drop every derived result"""
+        self._version += 1
+        self._cache = {}
+
+    def _cached(self, key, compute):
+        """Memoize compute() under key until the scenario next changes"""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def copy(self) -> 'BACCalculator':
+        """
+        Independent copy of the scenario at its current version, for use on
+        another thread. Cached results are shared (they are never mutated).
+        """
+        other = copy.copy(self)
+        other.drinks_timeline = self.drinks_timeline.copy()
+        other.food_timeline = self.food_timeline.copy()
+        other.profile = dict(self.profile, medications=list(self.profile['medications']))
+        other._cache = dict(self._cache)
+        return other
+
     def set_profile(self, sex: str, weight_lbs: float, age: int = 30,
                    chronic_drinker: bool = False):
         """Set user profile for BAC calculations"""
@@ -79,18 +146,98 @@ class BACCalculator:
             'chronic_drinker': chronic_drinker,
             'medications': []
         }
+        self._invalidate()
+
+    def get_model_parameters(self) -> Dict[str, float]:
+        """Effective model constants for the current profile"""
+        return {
+            'widmark_ratio': self.WIDMARK_RATIOS.get(self.profile['sex'], 0.73),
+            'elimination_rate': self.get_elimination_rate(),
+            'absorption_time_empty': self.ABSORPTION_TIME_EMPTY,
+            'absorption_time_fed': self.ABSORPTION_TIME_FED,
+            'immediate_absorption': self.IMMEDIATE_ABSORPTION,
+        }
+
+    def set_model_parameters(self, widmark_ratio: float = None, elimination_rate: float = None,
+                             absorption_time_empty: float = None, absorption_time_fed: float = None,
+                             immediate_absorption: float = None):
+        """
+        Personalise model constants for this calculator only (None keeps the
+        current value). widmark_ratio replaces the sex-based ratio and
+        elimination_rate the chronic-adjusted rate.
+        """
+        if widmark_ratio is not None:
+            self.WIDMARK_RATIOS = dict.fromkeys(type(self).WIDMARK_RATIOS, widmark_ratio)
+            self.WIDMARK_RATIOS[self.profile['sex']] = widmark_ratio
+        if elimination_rate is not None:
+            self.ELIMINATION_RATE = elimination_rate
+            self.CHRONIC_ELIMINATION_FACTOR = 1.0
+        if absorption_time_empty is not None:
+            self.ABSORPTION_TIME_EMPTY = absorption_time_empty
+        if absorption_time_fed is not None:
+            self.ABSORPTION_TIME_FED = absorption_time_fed
+        if immediate_absorption is not None:
+            self.IMMEDIATE_ABSORPTION = immediate_absorption
+
+        # Stored absorption time constants depend on these
+        self._mark_contexts_stale(0, len(self.drinks_timeline))
+        self._invalidate()
+
+    def reset_model_parameters(self):
+        """Drop the set_model_parameters overrides, back to the class constants"""
+        overridden = [name for name in self.MODEL_CONSTANTS if name in self.__dict__]
+        if not overridden:
+            return
+        for name in overridden:
+            del self.__dict__[name]
+        self._mark_contexts_stale(0, len(self.drinks_timeline))
+        self._invalidate()
+
+    @classmethod
+    def profile_model_parameters(cls, profile: Dict) -> Dict[str, float]:
+        """
+        set_model_parameters arguments this class applies for a profile
+        (none here). Batch code builds no calculator per profile, so it asks
+        this instead of calling set_profile.
+        """
+        return {}
 
     def add_food(self, time: datetime, food_type: str):
         """Add food consumed to timeline"""
         food_type = food_type.lower()
         if food_type not in self.FOOD_GASTRIC_TIMES:
             food_type = 'light_meal'  # Default
-        self.food_timeline.append({'time': time, 'type': food_type})
-        self.food_timeline.sort(key=lambda x: x['time'])
 
-    def add_drink(self, time: datetime, drink_type: str, size_oz: float = None,
-                 alcohol_percent: float = None, quantity: int = 1):
-        """Add drink(s) consumed to timeline"""
+        # Inserted after any food at the same time (stable time order)
+        index = self.food_timeline.insert(time, food_type)
+
+        # Only drinks between this food and the next one change food state
+        food_times = self.food_timeline.times
+        drink_times = self.drinks_timeline.times
+        first = bisect_left(drink_times, food_times[index])
+        if index + 1 < len(food_times):
+            last = bisect_left(drink_times, food_times[index + 1])
+        else:
+            last = len(drink_times)
+        self._mark_contexts_stale(first, last)
+
+        self._invalidate()
+
+    def add_foods(self, foods: Iterable[Dict]):
+        """Bulk-add foods given as {'time', 'type'} dicts"""
+        self.food_timeline.extend({'time': food['time'], 'type': self._resolve_food(food['type'])}
+                                  for food in foods)
+        self._mark_contexts_stale(0, len(self.drinks_timeline))
+        self._invalidate()
+
+    def _resolve_food(self, food_type: str) -> str:
+        """Normalize a food type, defaulting unknown foods to a light meal"""
+        food_type = food_type.lower()
+        return food_type if food_type in self.FOOD_GASTRIC_TIMES else 'light_meal'
+
+    def _resolve_drink(self, drink_type: str, size_oz: float = None,
+                       alcohol_percent: float = None) -> Tuple[float, float]:
+        """Fill in size and strength from the standard drink table"""
         drink_type_lower = drink_type.lower()
 
         if drink_type_lower in self.STANDARD_DRINKS:
@@ -101,30 +248,120 @@ class BACCalculator:
             size_oz = size_oz or 12
             alcohol_percent = alcohol_percent or 5.0
 
+        return float(size_oz), float(alcohol_percent)
+
+    def add_drink(self, time: datetime, drink_type: str, size_oz: float = None,
+                 alcohol_percent: float = None, quantity: int = 1):
+        """Add drink(s) consumed to timeline"""
+        size_oz, alcohol_percent = self._resolve_drink(drink_type, size_oz, alcohol_percent)
+
         for i in range(quantity):
             drink_time = time + timedelta(minutes=i*30)  # Spread drinks 30 min apart
-            self.drinks_timeline.append({
-                'time': drink_time,
-                'type': drink_type,
-                'size_oz': float(size_oz),
-                'alcohol_percent': float(alcohol_percent)
-            })
+            index = self.drinks_timeline.insert(drink_time, drink_type, size_oz=size_oz,
+                                                alcohol_percent=alcohol_percent)
+            self._shift_stale_contexts(index)
+            self._mark_contexts_stale(index, index + 1)
 
-        self.drinks_timeline.sort(key=lambda x: x['time'])
+        self._invalidate()
+
+    def add_drinks(self, drinks: Iterable[Dict]):
+        """
+        Bulk-add drinks given as dicts with 'time' and 'type' plus optional
+        'size_oz', 'alcohol_percent' and 'quantity' (spread 30 min apart,
+        as in add_drink).
+        """
+        def expand():
+            for drink in drinks:
+                size_oz, alcohol_percent = self._resolve_drink(
+                    drink['type'], drink.get('size_oz'), drink.get('alcohol_percent'))
+                for i in range(drink.get('quantity') or 1):
+                    yield {'time': drink['time'] + timedelta(minutes=i*30), 'type': drink['type'],
+                           'size_oz': size_oz, 'alcohol_percent': alcohol_percent}
+
+        self.drinks_timeline.extend(expand())
+        self._mark_contexts_stale(0, len(self.drinks_timeline))
+        self._invalidate()
+
+    def add_events(self, events: Iterable[Dict]):
+        """
+        Bulk-add a mixed stream of drink and food events, each tagged with
+        'kind' ('drink' or 'food'), such as BACChatbot.ingest_transcript()
+        yields. The stream is consumed once.
+        """
+        foods = []
+
+        def drinks():
+            for event in events:
+                if event['kind'] == 'food':
+                    foods.append(event)
+                else:
+                    yield event
+
+        self.add_drinks(drinks())
+        self.add_foods(foods)
+
+    def _mark_contexts_stale(self, lo: int, hi: int):
+        """Flag drinks lo..hi-1 for a food context refresh on the next read"""
+        if lo >= hi:
+            return
+        if self._stale_contexts is not None:
+            lo = min(lo, self._stale_contexts[0])
+            hi = max(hi, self._stale_contexts[1])
+        self._stale_contexts = (lo, hi)
+
+    def _shift_stale_contexts(self, index: int):
+        """Keep the stale range on the same drinks after inserting one at index"""
+        if self._stale_contexts is None:
+            return
+        lo, hi = self._stale_contexts
+        self._stale_contexts = (lo + 1 if index <= lo else lo, hi + 1 if index < hi else hi)
+
+    def _refresh_food_contexts(self):
+        """
+        Recompute the stored food context of stale drinks in one merge walk
+        over the sorted drink and food times.
+        """
+        if self._stale_contexts is None:
+            return
+        lo, hi = self._stale_contexts
+        self._stale_contexts = None
+
+        drinks, foods = self.drinks_timeline, self.food_timeline
+        peak_reduction = drinks.columns['peak_reduction']
+        absorption_tau = drinks.columns['absorption_tau']
+        alcohol_oz = drinks.columns['alcohol_oz']
+        size_oz = drinks.columns['size_oz']
+        alcohol_percent = drinks.columns['alcohol_percent']
+        food_times = foods.times
+        j = bisect_right(food_times, drinks.times[lo]) - 1
+
+        for i in range(lo, hi):
+            t = drinks.times[i]
+            while j + 1 < len(food_times) and food_times[j + 1] <= t:
+                j += 1
+            if j < 0:
+                food_type, minutes_since_food = 'empty_stomach', float('inf')
+            else:
+                food_type, minutes_since_food = foods.type_of(j), (t - food_times[j]) / 60
+            reduction = self.FOOD_ABSORPTION_IMPACT.get(food_type, 0.0)
+            peak_reduction[i] = reduction
+            absorption_tau[i] = self._absorption_tau(food_type, minutes_since_food)
+            # Alcohol (liquid ounces) scaled by the food peak reduction
+            alcohol_oz[i] = size_oz[i] * (alcohol_percent[i] / 100) * (1 - reduction * 0.5)
 
     def get_most_recent_food(self, reference_time: datetime) -> Tuple[str, float]:
         """
         Get the most recent food before the reference time and minutes elapsed.
         Returns (food_type, minutes_since_eaten)
         """
-        recent_foods = [f for f in self.food_timeline if f['time'] <= reference_time]
+        reference_seconds = to_seconds(reference_time)
+        index = bisect_right(self.food_timeline.times, reference_seconds)
 
-        if not recent_foods:
+        if index == 0:
             return 'empty_stomach', float('inf')
 
-        latest_food = recent_foods[-1]
-        minutes_elapsed = (reference_time - latest_food['time']).total_seconds() / 60
-        return latest_food['type'], minutes_elapsed
+        minutes_elapsed = (reference_seconds - self.food_timeline.times[index - 1]) / 60
+        return self.food_timeline.type_of(index - 1), minutes_elapsed
 
     def calculate_absorption_factor(self, drink_time: datetime, target_time: datetime = None) -> float:
         """
@@ -148,7 +385,8 @@ class BACCalculator:
         if gastric_half_time == 0:  # Empty stomach
             # Fast absorption: ~80% in 30 min, ~95% in 60 min
             # Ensure minimum 10% immediate absorption
-            absorption = 0.10 + 0.90 * (1.0 - math.exp(-minutes_since_drink / 20))
+            absorption = self.IMMEDIATE_ABSORPTION + (1 - self.IMMEDIATE_ABSORPTION) * (
+                1.0 - math.exp(-minutes_since_drink / self.ABSORPTION_TIME_EMPTY))
             return min(1.0, absorption)
         else:
             # Food delays absorption
@@ -161,66 +399,142 @@ class BACCalculator:
             effective_absorption_time = minutes_since_drink * (0.5 + 0.5 * delay_factor)
 
             # Ensure minimum 10% immediate absorption even with food
-            absorption = 0.10 + 0.90 * (1.0 - math.exp(-effective_absorption_time / 30))
+            absorption = self.IMMEDIATE_ABSORPTION + (1 - self.IMMEDIATE_ABSORPTION) * (
+                1.0 - math.exp(-effective_absorption_time / self.ABSORPTION_TIME_FED))
             return min(1.0, absorption)
 
-    def calculate_bac_at_time(self, target_time: datetime = None) -> float:
+    def get_food_context(self, drink_time: datetime) -> Dict:
         """
-        Calculate BAC at a specific time using Widmark equation with food absorption.
-        BAC = [(A × 5.14) / (W × r)] - (0.015 × H)
+        Food state that governs a drink consumed at drink_time.
+        Returns {food_type, gastric_time, peak_reduction, absorption_tau}
         """
-        if target_time is None:
-            target_time = datetime.now()
+        food_type, _ = self.get_most_recent_food(drink_time)
+        return {
+            'food_type': food_type,
+            'gastric_time': self.FOOD_GASTRIC_TIMES.get(food_type, 90),
+            'peak_reduction': self.FOOD_ABSORPTION_IMPACT.get(food_type, 0.0),
+            'absorption_tau': self.get_absorption_time_constant(drink_time)
+        }
 
-        if target_time < self.start_time:
-            return 0.0
+    def get_absorption_time_constant(self, drink_time: datetime) -> float:
+        """
+        Time constant (minutes) of the exponential absorption curve for a drink,
+        equivalent to the timing model in calculate_absorption_factor.
+        """
+        return self._absorption_tau(*self.get_most_recent_food(drink_time))
 
-        # Get Widmark parameters
-        widmark_ratio = self.WIDMARK_RATIOS.get(self.profile['sex'], 0.73)
-        body_weight = self.profile['weight_lbs']
+    def _absorption_tau(self, food_type: str, minutes_since_food: float) -> float:
+        """Absorption time constant (minutes) for a given food state"""
+        gastric_half_time = self.FOOD_GASTRIC_TIMES.get(food_type, 90)
 
-        # Account for metabolism variation
-        elimination_rate = self.ELIMINATION_RATE
-        if self.profile['chronic_drinker']:
-            elimination_rate *= 1.2  # 20% faster for chronic drinkers
+        if gastric_half_time == 0:  # Empty stomach
+            return self.ABSORPTION_TIME_EMPTY
 
-        # Calculate absorption for each drink
-        total_alcohol_absorbed = 0.0
+        delay_factor = min(1.0, minutes_since_food / gastric_half_time)
+        return self.ABSORPTION_TIME_FED / (0.5 + 0.5 * delay_factor)
 
-        for drink in self.drinks_timeline:
-            if drink['time'] <= target_time:
-                # Alcohol in this drink (liquid ounces)
-                alcohol_oz = drink['size_oz'] * (drink['alcohol_percent'] / 100)
+    def get_drink_constants(self) -> Tuple[List[float], List[float], List[float]]:
+        """
+        Per-drink constants for the batch engine (cached per scenario version).
+        Returns (offsets_seconds, effective_alcohol_oz, absorption_tau_minutes)
+        """
+        return self._cached('drink_constants', self._compute_drink_constants)
+
+    def _compute_drink_constants(self) -> Tuple[List[float], List[float], List[float]]:
+        """Build get_drink_constants() from the drink columns"""
+        self._refresh_food_contexts()
+        drinks = self.drinks_timeline
+        start = to_seconds(self.start_time)
+
+        if bac_engine.has_numpy():
+            np = bac_engine.np
+            offsets = np.frombuffer(drinks.times, dtype=np.float64) - start
+            # Copies, since the columns are refreshed in place
+            alcohol = np.array(drinks.columns['alcohol_oz'], dtype=np.float64)
+            tau = np.array(drinks.columns['absorption_tau'], dtype=np.float64)
+            return offsets, alcohol, tau
+
+        offsets = [t - start for t in drinks.times]
+        return offsets, list(drinks.columns['alcohol_oz']), list(drinks.columns['absorption_tau'])
+
+    def get_drink_kernel(self, index: int) -> bac_engine.DrinkKernel:
+        """
+        Contribution kernel of the drink at `index` in drinks_timeline.
+        Kernels are fixed when a drink's food context is computed, so adding
+        a drink only computes its own kernel; existing ones are untouched
+        unless a new meal changes their context.
+        """
+        self._refresh_food_contexts()
+        drinks = self.drinks_timeline
+        columns = drinks.columns
+        return bac_engine.DrinkKernel(drinks.times[index], columns['alcohol_oz'][index],
+                                      columns['absorption_tau'][index],
+                                      columns['peak_reduction'][index], self.IMMEDIATE_ABSORPTION)
+
+    def get_drink_kernels(self) -> List[bac_engine.DrinkKernel]:
+        """Contribution kernels of every drink, in time order"""
+        return [self.get_drink_kernel(i) for i in range(len(self.drinks_timeline))]
+
+    def calculate_drink_contribution(self, index: int, offsets: Sequence[float]):
+        """
+        BAC contributed by one drink (before elimination) over a time grid.
 
-                # Absorption factor accounts for food effects and time elapsed
-                absorption_factor = self.calculate_absorption_factor(drink['time'], target_time)
+        Args:
+            index: Drink position in drinks_timeline
+            offsets: Sample times in seconds since start_time
 
-                # Food reduces peak BAC (applied separately from absorption timing)
-                food_type, _ = self.get_most_recent_food(drink['time'])
-                peak_reduction = self.FOOD_ABSORPTION_IMPACT.get(food_type, 0.0)
+        The scenario BAC is max(0, sum of all contributions - elimination).
+        """
+        start = to_seconds(self.start_time)
+        if bac_engine.has_numpy():
+            times = bac_engine.np.asarray(offsets, dtype=bac_engine.np.float64) + start
+        else:
+            times = [start + t for t in offsets]
+        return self.get_drink_kernel(index).contribution(times, self.get_widmark_scale())
 
-                # Effective alcohol = actual alcohol * how much absorbed * food peak reduction
-                # Note: absorption_factor handles WHEN alcohol is absorbed
-                # peak_reduction handles HOW MUCH of the peak is reduced
-                effective_alcohol_oz = alcohol_oz * absorption_factor * (1 - peak_reduction * 0.5)
+    def get_widmark_scale(self) -> float:
+        """Widmark factor 5.14 / (W × r) converting absorbed oz to BAC"""
+        widmark_ratio = self.WIDMARK_RATIOS.get(self.profile['sex'], 0.73)
+        return 5.14 / (self.profile['weight_lbs'] * widmark_ratio)
 
-                # Add to total
-                total_alcohol_absorbed += effective_alcohol_oz
+    def get_elimination_rate(self) -> float:
+        """Elimination rate (BAC per hour) adjusted for metabolism variation"""
+        elimination_rate = self.ELIMINATION_RATE
+        if self.profile['chronic_drinker']:
+            elimination_rate *= self.CHRONIC_ELIMINATION_FACTOR
+        return elimination_rate
 
-        # Widmark equation: BAC = [(A × 5.14) / (W × r)] - (0.015 × H)
-        if total_alcohol_absorbed > 0:
-            bac_from_absorption = (total_alcohol_absorbed * 5.14) / (body_weight * widmark_ratio)
-        else:
-            bac_from_absorption = 0.0
+    def calculate_bac_at_offsets(self, offsets: Sequence[float]):
+        """
+        Calculate BAC for a whole time grid in one batch.
+
+        Args:
+            offsets: Sample times in seconds since start_time (float64 array or list)
+
+        Returns:
+            BAC per sample (NumPy array when available, otherwise a list)
+        """
+        drink_offsets, drink_alcohol, drink_tau = self.get_drink_constants()
+        return bac_engine.evaluate(offsets, drink_offsets, drink_alcohol, drink_tau,
+                                   self.get_widmark_scale(), self.get_elimination_rate(),
+                                   self.IMMEDIATE_ABSORPTION)
+
+    def calculate_bac_at_time(self, target_time: datetime = None) -> float:
+        """
+        Calculate BAC at a specific time using Widmark equation with food absorption.
+        BAC = [(A × 5.14) / (W × r)] - (0.015 × H)
+        """
+        if target_time is None:
+            target_time = datetime.now()
 
-        # Time since first drink
-        time_since_first = (target_time - self.start_time).total_seconds() / 3600
-        elimination = elimination_rate * max(0, time_since_first)
+        if target_time < self.start_time:
+            return 0.0
 
-        bac = max(0.0, bac_from_absorption - elimination)
-        return round(bac, 4)
+        offset = (target_time - self.start_time).total_seconds()
+        return float(self.calculate_bac_at_offsets([offset])[0])
 
-    def get_bac_timeline(self, hours: int = 6, from_now: bool = True) -> List[Tuple[datetime, float]]:
+    def get_bac_timeline(self, hours: int = 6, from_now: bool = True,
+                         tolerance: float = None, max_age: float = 0.0) -> List[Tuple[datetime, float]]:
         """
         Generate BAC values for timeline visualization.
 
@@ -228,59 +542,134 @@ class BACCalculator:
             hours: Number of hours to project
             from_now: If True, start from current time (future projection).
                       If False, start from drinking start time (full history).
+            tolerance: If given, sample adaptively instead of every 5 minutes:
+                       points cluster around drinks, meals and the peak, and
+                       straight-line interpolation between them stays within
+                       this many BAC units of the curve.
+            max_age: With from_now, return the last projection again while
+                     it started less than this many seconds ago. Lets a
+                     display that polls often keep one list (and skip
+                     redraws) at the cost of starting up to max_age in the
+                     past; the default 0 always projects from exactly now.
         """
-        timeline = []
+        step = timedelta(minutes=self.TIMELINE_STEP_MINUTES)
+        key = ('timeline', hours, from_now, tolerance)
+        cached = self._cache.get(key)
 
         if from_now:
             # Future projection from current time
-            start = datetime.now()
+            now = datetime.now()
+            if cached and timedelta(0) <= now - cached[0][0] < timedelta(seconds=max_age):
+                return cached
+            start = now
         else:
             # Full history from when drinking started
+            if cached:
+                return cached
             start = self.start_time
 
-        end_time = start + timedelta(hours=hours)
-
-        # Sample every 5 minutes
-        current_time = start
-        while current_time <= end_time:
-            bac = self.calculate_bac_at_time(current_time)
-            timeline.append((current_time, bac))
-            current_time += timedelta(minutes=5)
-
+        origin = (start - self.start_time).total_seconds()
+        if tolerance is not None:
+            offsets, curve = self._adaptive_samples(origin, origin + hours * 3600, tolerance)
+            timeline = [(self.start_time + timedelta(seconds=t), bac)
+                        for t, bac in zip(offsets, curve)]
+            self._cache[key] = timeline
+            return timeline
+
+        # Sample every 5 minutes, evaluated as a single batch
+        offsets = bac_engine.time_grid(hours, self.TIMELINE_STEP_MINUTES, origin)
+        curve = self.calculate_bac_at_offsets(offsets)
+        if bac_engine.has_numpy():
+            curve = curve.tolist()
+
+        timeline = [(start + step * i, bac) for i, bac in enumerate(curve)]
+        self._cache[key] = timeline
         return timeline
 
-    def get_peak_bac(self) -> Tuple[float, datetime]:
-        """Find peak BAC and when it occurs"""
-        timeline = self.get_bac_timeline(hours=6)
-        peak_bac = 0.0
-        peak_time = self.start_time
-
-        for time, bac in timeline:
-            if bac > peak_bac:
-                peak_bac = bac
-                peak_time = time
-
-        return peak_bac, peak_time
-
-    def get_time_to_sobriety(self, threshold: float = 0.0) -> timedelta:
-        """Calculate time until BAC drops below threshold"""
-        timeline = self.get_bac_timeline(hours=24)
-
-        for time, bac in timeline:
-            if bac <= threshold:
-                return time - self.start_time
-
-        return timedelta(hours=24)
-
-    def get_time_to_legal_limit(self) -> timedelta:
-        """Calculate time until BAC reaches 0.08% (legal limit)"""
-        timeline = self.get_bac_timeline(hours=6)
+    def _adaptive_samples(self, lo: float, hi: float, tolerance: float):
+        """Adaptive (offsets, bac) over [lo, hi] seconds since start_time"""
+        min_step = self.ADAPTIVE_MIN_STEP_SECONDS
+        drink_offsets = [float(d) for d in self.get_drink_constants()[0]]
+        start = to_seconds(self.start_time)
+
+        # Each drink jumps the curve up, so sample just before it as well
+        breakpoints = drink_offsets + [d - min_step for d in drink_offsets]
+        breakpoints += [t - start for t in self.food_timeline.times]
+        breakpoints.append(0.0)
+        if drink_offsets:
+            curve = self.get_bac_curve()
+            breakpoints.append(curve.peak(lo)[1])
+            breakpoints.append(curve.time_below(max(lo, drink_offsets[-1]), 0.0))
+
+        return bac_engine.adaptive_grid(self.calculate_bac_at_offsets, lo, hi, breakpoints,
+                                        tolerance, min_step, self.ADAPTIVE_MAX_STEP_MINUTES * 60)
+
+    def get_bac_curve(self) -> bac_solver.AnalyticCurve:
+        """Analytic form of the current scenario's BAC curve (cached per version)"""
+        def build():
+            drink_offsets, drink_alcohol, drink_tau = self.get_drink_constants()
+            return bac_solver.AnalyticCurve(drink_offsets, drink_alcohol, drink_tau,
+                                            self.get_widmark_scale(), self.get_elimination_rate(),
+                                            self.IMMEDIATE_ABSORPTION)
+        return self._cached('curve', build)
+
+    def get_peak_bac(self, from_time: datetime = None) -> Tuple[float, datetime]:
+        """Find peak BAC (at or after from_time, default now) and when it occurs"""
+        if from_time is None:
+            from_time = datetime.now()
+        offset = (from_time - self.start_time).total_seconds()
+
+        # The peak found from an earlier time stays valid until it has passed
+        cached = self._cache.get('peak')
+        if cached and cached[0] <= offset and (cached[1] <= 0 or offset <= cached[2]):
+            peak_bac, peak_offset = cached[1], cached[2]
+        else:
+            peak_bac, peak_offset = self.get_bac_curve().peak(offset)
+            self._cache['peak'] = (offset, peak_bac, peak_offset)
 
-        for time, bac in timeline:
-            if bac >= 0.08:
-                return time - self.start_time
+        peak_bac = round(peak_bac, 4)
+        if peak_bac <= 0:
+            return 0.0, self.start_time
+        return peak_bac, self.start_time + timedelta(seconds=peak_offset)
 
-        return None
+    def _next_crossing(self, key, offset: float, find):
+        """
+        Memoize a first-crossing search. A crossing found from an earlier
+        offset is still the first one for any later offset before it.
+        """
+        cached = self._cache.get(key)
+        if cached and cached[0] <= offset and (cached[1] is None or offset <= cached[1]):
+            return cached[1]
+        crossing = find(offset)
+        self._cache[key] = (offset, crossing)
+        return crossing
+
+    def get_time_to_sobriety(self, threshold: float = 0.0, from_time: datetime = None) -> timedelta:
+        """
+        Calculate time (from start_time) until BAC drops to threshold.
+        None if it never does (zero elimination rate).
+        """
+        if from_time is None:
+            from_time = datetime.now()
+
+        offset = (from_time - self.start_time).total_seconds()
+        crossing = self._next_crossing(('sober', threshold), offset,
+                                       lambda t: self.get_bac_curve().time_below(t, threshold))
+        if math.isinf(crossing):
+            return None
+        return timedelta(seconds=crossing)
+
+    def get_time_to_legal_limit(self, from_time: datetime = None) -> timedelta:
+        """Calculate time (from start_time) until BAC reaches 0.08% (legal limit)"""
+        if from_time is None:
+            from_time = datetime.now()
+
+        offset = (from_time - self.start_time).total_seconds()
+        crossing = self._next_crossing(('legal_limit', 0.08), offset,
+                                       lambda t: self.get_bac_curve().time_above(t, 0.08))
+        if crossing is None:
+            return None
+        return timedelta(seconds=crossing)
 
     def get_impairment_level(self, bac: float = None) -> Dict:
         """Get impairment description and legal status for BAC level"""
@@ -355,6 +744,7 @@ class BACCalculator:
 
     def clear_scenario(self):
         """Reset all data for new scenario"""
-        self.drinks_timeline = []
-        self.food_timeline = []
-        self.start_time = datetime.now()
+        self.drinks_timeline.clear()
+        self.food_timeline.clear()
+        self._stale_contexts = None
+        self.start_time = datetime.now()  # Bumps the version
@@ -0,0 +1,258 @@
+"""
+Model Calibration
+Fits a person's Widmark ratio, elimination rate and absorption time
+constants to measured BAC readings, and remembers the fit per profile
+"""
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import bac_engine
+from bac_calculator import BACCalculator
+from bac_montecarlo import PARAMETER_BOUNDS
+
+np = bac_engine.load_numpy()
+
+FITTED_PARAMETERS = ('widmark_ratio', 'elimination_rate', 'absorption_time_empty', 'absorption_time_fed')
+
+# Spread (standard deviation of the log) of each parameter across people. Used
+# as a weak prior toward the calculator's defaults so that a few readings
+# cannot drag the poorly determined parameters to extremes.
+PRIOR_SIGMA = {
+    'widmark_ratio': 0.10,
+    'elimination_rate': 0.25,
+    'absorption_time_empty': 0.35,
+    'absorption_time_fed': 0.35,
+}
+
+# Typical breathalyzer error (BAC), the scale of the reading residuals
+MEASUREMENT_SD = 0.005
+
+# Step of the forward-difference Jacobian, in log-parameter space
+JACOBIAN_STEP = 1e-6
+
+
+class CalibrationResult(NamedTuple):
+    """Outcome of a fit"""
+    parameters: Dict[str, float]  # Every model parameter, fitted or default (see set_model_parameters)
+    fitted: Tuple[str, ...]       # Parameters that were fitted
+    rms_error: float              # Root-mean-square reading residual (BAC)
+    iterations: int
+    converged: bool
+    observations: int
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Calibration requires NumPy")
+
+
+class _ReadingModel:
+    """
+    The calculator's BAC model at the reading times, vectorized over
+    candidate parameter sets: predict() takes a (sets x parameters) array
+    and returns (sets x readings) BAC, unrounded.
+    """
+
+    def __init__(self, calculator: BACCalculator, times: Sequence[datetime], fitted: Sequence[str]):
+        self.defaults = calculator.get_model_parameters()
+        self.fitted = tuple(fitted)
+        self.weight = calculator.profile['weight_lbs']
+        self.immediate = calculator.IMMEDIATE_ABSORPTION
+        self.offsets = np.array([(t - calculator.start_time).total_seconds() for t in times])
+
+        # Food sets each drink's absorption time: the empty-stomach constant,
+        # or the fed constant times a stomach-emptying multiplier
+        drink_offsets, alcohol, tau = calculator.get_drink_constants()
+        empty = [calculator.get_food_context(drink['time'])['gastric_time'] == 0
+                 for drink in calculator.drinks_timeline]
+        self.alcohol = np.asarray(alcohol, dtype=np.float64)
+        self.empty = np.asarray(empty, dtype=bool)
+        self.multiplier = np.where(self.empty, 1.0,
+                                   np.asarray(tau, dtype=np.float64) / calculator.ABSORPTION_TIME_FED)
+
+        # Minutes from each drink to each reading: (readings x drinks)
+        self.minutes = (self.offsets[:, None] - np.asarray(drink_offsets, dtype=np.float64)[None, :]) / 60
+
+    def parameter(self, values, name: str):
+        """Column of `values` for a parameter, or its default broadcast"""
+        if name in self.fitted:
+            return values[:, self.fitted.index(name)]
+        return np.full(values.shape[0], self.defaults[name])
+
+    def predict(self, values):
+        ratio = self.parameter(values, 'widmark_ratio')
+        elimination = self.parameter(values, 'elimination_rate')
+        tau = np.where(self.empty[None, :], self.parameter(values, 'absorption_time_empty')[:, None],
+                       self.parameter(values, 'absorption_time_fed')[:, None] * self.multiplier[None, :])
+
+        # (sets x readings x drinks), as in bac_engine.absorbed_alcohol
+        minutes = self.minutes[None, :, :]
+        factor = self.immediate - (1 - self.immediate) * np.expm1(
+            -np.maximum(minutes, 0.0) / tau[:, None, :])
+        factor = np.where(minutes >= 0, np.minimum(factor, 1.0), 0.0)
+        absorbed = factor @ self.alcohol
+
+        bac = (5.14 / (self.weight * ratio))[:, None] * absorbed
+        bac -= elimination[:, None] * (np.maximum(self.offsets, 0.0) / 3600)[None, :]
+        return np.where(self.offsets[None, :] < 0, 0.0, np.maximum(bac, 0.0))
+
+
+def calibrate(calculator: BACCalculator, observations: Sequence[Tuple[datetime, float]],
+              parameters: Sequence[str] = FITTED_PARAMETERS, prior: bool = True,
+              measurement_sd: float = MEASUREMENT_SD, max_iterations: int = 100,
+              tolerance: float = 1e-8) -> CalibrationResult:
+    """
+    Least-squares fit of model parameters to BAC readings.
+
+    Levenberg-Marquardt in log-parameter space (which keeps the parameters
+    positive), clipped to bac_montecarlo.PARAMETER_BOUNDS. Each iteration
+    evaluates the current point and its Jacobian perturbations as one
+    NumPy batch.
+
+    Args:
+        calculator: Profile plus the drinks and food before the readings
+        observations: (time, measured BAC) pairs
+        parameters: Which of FITTED_PARAMETERS to fit; the rest keep the
+                    calculator's values
+        prior: Add the PRIOR_SIGMA pull toward the calculator's values
+        measurement_sd: Reading error, weighing readings against the prior
+        max_iterations: Iteration cap
+        tolerance: Stop once the relative cost change falls below this
+
+    Returns:
+        CalibrationResult; apply it with calculator.set_model_parameters(**result.parameters)
+    """
+    _require_numpy()
+    unknown = set(parameters) - set(FITTED_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Cannot fit: {', '.join(sorted(unknown))}")
+    if not observations:
+        raise ValueError("At least one reading is needed")
+
+    times = [time for time, _ in observations]
+    measured = np.array([bac for _, bac in observations], dtype=np.float64)
+    model = _ReadingModel(calculator, times, parameters)
+    fitted = model.fitted
+
+    center = np.log([model.defaults[name] for name in fitted])
+    sigma = np.array([PRIOR_SIGMA[name] for name in fitted])
+    low = np.log([PARAMETER_BOUNDS[name][0] for name in fitted])
+    high = np.log([PARAMETER_BOUNDS[name][1] for name in fitted])
+
+    def residuals(points):
+        """Stacked reading and prior residuals for each row of log-parameters"""
+        reading = (model.predict(np.exp(points)) - measured[None, :]) / measurement_sd
+        if not prior:
+            return reading
+        return np.concatenate([reading, (points - center[None, :]) / sigma[None, :]], axis=1)
+
+    x = center.copy()
+    r = residuals(x[None, :])[0]
+    cost = r @ r
+    damping = 1e-3
+    converged = False
+    iterations = 0
+
+    for iterations in range(1, max_iterations + 1):
+        # Current point and one forward step per parameter, in one batch
+        points = np.repeat(x[None, :], len(fitted) + 1, axis=0)
+        points[1:] += np.eye(len(fitted)) * JACOBIAN_STEP
+        batch = residuals(points)
+        r = batch[0]
+        jacobian = ((batch[1:] - r[None, :]) / JACOBIAN_STEP).T
+
+        gradient = jacobian.T @ r
+        normal = jacobian.T @ jacobian
+        improved = False
+        while damping < 1e10:
+            step = np.linalg.solve(normal + damping * np.diag(np.diag(normal) + 1e-12), -gradient)
+            candidate = np.clip(x + step, low, high)
+            r_new = residuals(candidate[None, :])[0]
+            cost_new = r_new @ r_new
+            if cost_new < cost:
+                improved = True
+                break
+            damping *= 4
+
+        if not improved:
+            converged = True  # No downhill step left
+            break
+
+        change = (cost - cost_new) / max(cost, 1e-300)
+        x, cost = candidate, cost_new
+        damping = max(damping / 3, 1e-9)
+        if change < tolerance:
+            converged = True
+            break
+
+    values = dict(model.defaults)
+    values.update(zip(fitted, np.exp(x).tolist()))
+    errors = model.predict(np.exp(x)[None, :])[0] - measured
+    return CalibrationResult(values, fitted, float(np.sqrt(np.mean(errors ** 2))),
+                             iterations, converged, len(observations))
+
+
+def profile_key(profile: Dict) -> Tuple:
+    """Cache key for a calculator profile"""
+    return (profile['sex'], float(profile['weight_lbs']), int(profile['age']),
+            bool(profile['chronic_drinker']))
+
+
+class CalibrationCache:
+    """
+    Fitted parameters per profile. Calculators whose profile has a fit get
+    its parameters through apply() (or automatically with CalibratedCalculator).
+    """
+
+    def __init__(self):
+        self._fits: Dict[Tuple, CalibrationResult] = {}
+
+    def fit(self, calculator: BACCalculator, observations: Sequence[Tuple[datetime, float]],
+            **kwargs) -> CalibrationResult:
+        """Calibrate on the readings (see calibrate) and remember the fit for this profile"""
+        result = calibrate(calculator, observations, **kwargs)
+        self._fits[profile_key(calculator.profile)] = result
+        return result
+
+    def get(self, profile: Dict) -> Optional[CalibrationResult]:
+        return self._fits.get(profile_key(profile))
+
+    def forget(self, profile: Dict):
+        self._fits.pop(profile_key(profile), None)
+
+    def apply(self, calculator: BACCalculator) -> bool:
+        """Give the calculator its profile's fitted parameters; False if there is no fit"""
+        result = self.get(calculator.profile)
+        if result is None:
+            return False
+        calculator.set_model_parameters(**result.parameters)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._fits)
+
+
+# Shared cache used by CalibratedCalculator
+CACHE = CalibrationCache()
+
+
+class CalibratedCalculator(BACCalculator):
+    """
+    BACCalculator that switches to the fitted parameters of its profile
+    whenever one is set, and back to the defaults for a profile without a
+    fit. Usable wherever a calculator_class is accepted (SessionPool,
+    ScenarioStore.load, bac_batch, bac_parallel, bac_sweep).
+    """
+
+    calibration_cache = CACHE
+
+    @classmethod
+    def profile_model_parameters(cls, profile: Dict) -> Dict[str, float]:
+        result = cls.calibration_cache.get(profile)
+        return dict(result.parameters) if result is not None else {}
+
+    def set_profile(self, sex: str, weight_lbs: float, age: int = 30,
+                    chronic_drinker: bool = False):
+        super().set_profile(sex, weight_lbs, age, chronic_drinker)
+        self.reset_model_parameters()
+        self.set_model_parameters(**self.profile_model_parameters(self.profile))
@@ -0,0 +1,199 @@
+"""
+Vectorized BAC Evaluation Engine
+Evaluates the Widmark/food absorption model over a whole time grid at once
+"""
+import math
+from typing import NamedTuple, Sequence
+
+# NumPy is optional - the app must run on a stock Python. It is imported on
+# first use (see load_numpy) so starting the app does not pay for it.
+np = None
+_numpy_checked = False
+
+# Upper bound on the (samples x drinks) block evaluated in one broadcast
+MAX_BLOCK_ELEMENTS = 1 << 22
+
+
+def load_numpy():
+    """Import NumPy on first call; returns the module, or None if it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+
+def has_numpy() -> bool:
+    """Return True if the NumPy batch path is available"""
+    return load_numpy() is not None
+
+
+class DrinkKernel(NamedTuple):
+    """
+    One drink's share of the model, fixed once its food context is known.
+    The scenario's absorbed alcohol is the sum of its kernels.
+    """
+    time: float            # Store seconds (event_store.to_seconds) of the drink
+    alcohol_oz: float      # Alcohol (oz), already scaled by the food peak reduction
+    absorption_tau: float  # Absorption time constant (minutes)
+    peak_reduction: float  # Food peak reduction behind alcohol_oz
+    immediate: float = 0.10
+
+    def absorbed(self, times: Sequence[float]):
+        """Alcohol (oz) this drink has released by each time (store seconds)"""
+        return absorbed_alcohol(times, (self.time,), (self.alcohol_oz,),
+                                (self.absorption_tau,), self.immediate)
+
+    def contribution(self, times: Sequence[float], widmark_scale: float):
+        """BAC this drink contributes at each time, before elimination"""
+        absorbed = self.absorbed(times)
+        if load_numpy() is None:
+            return [alcohol * widmark_scale for alcohol in absorbed]
+        return absorbed * widmark_scale
+
+
+def absorbed_fraction(minutes: float, tau: float, immediate: float = 0.10) -> float:
+    """Fraction of a drink absorbed `minutes` after it was consumed"""
+    if minutes < 0:
+        return 0.0
+    return min(1.0, immediate + (1 - immediate) * (1.0 - math.exp(-minutes / tau)))
+
+
+def absorbed_alcohol(offsets: Sequence[float], drink_offsets: Sequence[float],
+                     drink_alcohol: Sequence[float], drink_tau: Sequence[float],
+                     immediate: float = 0.10):
+    """
+    Total absorbed alcohol (liquid oz) at every grid offset: the sum of the
+    drink kernels, evaluated for all drinks at once.
+
+    Args:
+        offsets: Sample times in seconds since the scenario start
+        drink_offsets: Drink times in seconds since the scenario start
+        drink_alcohol: Alcohol per drink (oz), already scaled by food peak reduction
+        drink_tau: Absorption time constant per drink (minutes)
+        immediate: Fraction of each drink absorbed the moment it is consumed
+    """
+    if load_numpy() is None:
+        totals = []
+        for t in offsets:
+            total = 0.0
+            for d_off, alcohol, tau in zip(drink_offsets, drink_alcohol, drink_tau):
+                if d_off <= t:
+                    total += alcohol * absorbed_fraction((t - d_off) / 60, tau, immediate)
+            totals.append(total)
+        return totals
+
+    t = np.asarray(offsets, dtype=np.float64)
+    d_off = np.asarray(drink_offsets, dtype=np.float64)
+    alcohol = np.asarray(drink_alcohol, dtype=np.float64)
+    tau = np.asarray(drink_tau, dtype=np.float64)
+    totals = np.zeros(t.shape[0], dtype=np.float64)
+    if d_off.size == 0 or t.size == 0:
+        return totals
+
+    # Evaluate the (samples x drinks) broadcast in row blocks to bound memory
+    rows = max(1, MAX_BLOCK_ELEMENTS // d_off.size)
+    for lo in range(0, t.shape[0], rows):
+        minutes = (t[lo:lo + rows, None] - d_off[None, :]) / 60
+        factor = immediate - (1 - immediate) * np.expm1(-np.maximum(minutes, 0.0) / tau)
+        factor = np.where(minutes >= 0, np.minimum(factor, 1.0), 0.0)
+        totals[lo:lo + rows] = factor @ alcohol
+    return totals
+
+
+def bac_curve(offsets: Sequence[float], absorbed: Sequence[float],
+              widmark_scale: float, elimination_rate: float):
+    """
+    Apply the Widmark equation to absorbed alcohol at every grid offset.
+    BAC = [(A × 5.14) / (W × r)] - (0.015 × H), clamped at zero and rounded
+
+    Args:
+        offsets: Sample times in seconds since the scenario start
+        absorbed: Absorbed alcohol (oz) at each offset, from absorbed_alcohol()
+        widmark_scale: 5.14 / (W × r)
+        elimination_rate: BAC eliminated per hour
+    """
+    if load_numpy() is None:
+        curve = []
+        for t, alcohol in zip(offsets, absorbed):
+            if t < 0:
+                curve.append(0.0)
+                continue
+            bac = alcohol * widmark_scale - elimination_rate * (t / 3600)
+            curve.append(round(max(0.0, bac), 4))
+        return curve
+
+    t = np.asarray(offsets, dtype=np.float64)
+    bac = np.asarray(absorbed, dtype=np.float64) * widmark_scale
+    bac -= elimination_rate * (np.maximum(t, 0.0) / 3600)
+    bac = np.where(t < 0, 0.0, np.maximum(bac, 0.0))
+    return np.round(bac, 4)
+
+
+def evaluate(offsets: Sequence[float], drink_offsets: Sequence[float],
+             drink_alcohol: Sequence[float], drink_tau: Sequence[float],
+             widmark_scale: float, elimination_rate: float, immediate: float = 0.10):
+    """Evaluate BAC for all drinks x all samples in one pass"""
+    absorbed = absorbed_alcohol(offsets, drink_offsets, drink_alcohol, drink_tau, immediate)
+    return bac_curve(offsets, absorbed, widmark_scale, elimination_rate)
+
+
+def time_grid(hours: float, step_minutes: float = 5, origin: float = 0.0):
+    """Sample offsets (seconds) from origin to origin + hours, inclusive"""
+    count = int(hours * 60 // step_minutes) + 1
+    if load_numpy() is None:
+        return [origin + i * step_minutes * 60 for i in range(count)]
+    return origin + np.arange(count, dtype=np.float64) * (step_minutes * 60)
+
+
+def adaptive_grid(evaluate_at, lo: float, hi: float, breakpoints: Sequence[float],
+                  tolerance: float, min_step: float = 10.0, max_step: float = 3600.0):
+    """
+    Sample a curve on [lo, hi] with as few points as a linear interpolant
+    within `tolerance` needs.
+
+    Intervals between the seed points (the ends, the breakpoints and the
+    max_step grid) are bisected while the midpoint is further than the
+    tolerance from the chord, so samples gather at absorption onsets and
+    kinks and thin out on the straight elimination tail. Every round of
+    midpoints goes to evaluate_at as one batch.
+
+    Args:
+        evaluate_at: Function mapping a list of offsets to a sequence of values
+        lo, hi: Sampling range (seconds)
+        breakpoints: Offsets that must be sampled (events, peaks, kinks)
+        tolerance: Largest allowed |value - interpolant| at a tested midpoint
+        min_step: Intervals this short are never split
+        max_step: Longest interval between samples
+
+    Returns:
+        (offsets, values) as ascending lists
+    """
+    seeds = {lo, hi}
+    seeds.update(b for b in breakpoints if lo < b < hi)
+    knots = sorted(seeds)
+    for a, b in zip(knots, knots[1:]):
+        pieces = int(math.ceil((b - a) / max_step))
+        seeds.update(a + (b - a) * i / pieces for i in range(1, pieces))
+    knots = sorted(seeds)
+
+    samples = dict(zip(knots, (float(v) for v in evaluate_at(knots))))
+    pending = [(a, b) for a, b in zip(knots, knots[1:]) if b - a > 2 * min_step]
+
+    while pending:
+        mids = [0.5 * (a + b) for a, b in pending]
+        values = [float(v) for v in evaluate_at(mids)]
+        refined = []
+        for (a, b), m, value in zip(pending, mids, values):
+            samples[m] = value
+            if abs(value - 0.5 * (samples[a] + samples[b])) > tolerance:
+                if m - a > 2 * min_step:
+                    refined.extend(((a, m), (m, b)))
+        pending = refined
+
+    offsets = sorted(samples)
+    return offsets, [samples[t] for t in offsets]
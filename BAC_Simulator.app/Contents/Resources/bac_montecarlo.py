@@ -0,0 +1,156 @@
+"""
+Monte Carlo Uncertainty Engine
+Samples the model constants per person to give BAC percentile bands
+"""
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+import bac_engine
+
+np = bac_engine.load_numpy()
+
+# Distribution specs: ('normal', mean, sd), ('lognormal', median, sigma),
+# ('uniform', low, high) or ('fixed', value). A center of None means the
+# calculator's current point estimate (sex- and chronic-adjusted).
+DEFAULT_DISTRIBUTIONS = {
+    'widmark_ratio': ('normal', None, 0.08),
+    'elimination_rate': ('lognormal', None, 0.25),
+    'absorption_time_empty': ('lognormal', None, 0.35),
+    'absorption_time_fed': ('lognormal', None, 0.35),
+}
+
+# Sampled values are clipped to these physiological bounds
+PARAMETER_BOUNDS = {
+    'widmark_ratio': (0.3, 1.2),
+    'elimination_rate': (0.005, 0.05),
+    'absorption_time_empty': (2.0, 180.0),
+    'absorption_time_fed': (5.0, 360.0),
+}
+
+
+class UncertaintyResult(NamedTuple):
+    """BAC bands across sampled parameter sets"""
+    times: list                 # Sample datetimes
+    percentiles: Dict           # Percentile -> BAC array over times
+    prob_over_limit: 'np.ndarray'  # Fraction of draws over the limit at each time
+    samples: Dict               # Parameter name -> sampled values
+
+
+def _point_estimates(calculator) -> Dict[str, float]:
+    """The calculator's own values for each sampled parameter"""
+    return {
+        'widmark_ratio': calculator.WIDMARK_RATIOS.get(calculator.profile['sex'], 0.73),
+        'elimination_rate': calculator.get_elimination_rate(),
+        'absorption_time_empty': calculator.ABSORPTION_TIME_EMPTY,
+        'absorption_time_fed': calculator.ABSORPTION_TIME_FED,
+    }
+
+
+def sample_parameters(calculator, samples: int, rng, distributions: Dict = None) -> Dict:
+    """Draw `samples` values of every model parameter"""
+    unknown = set(distributions or {}) - set(DEFAULT_DISTRIBUTIONS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    specs = dict(DEFAULT_DISTRIBUTIONS)
+    specs.update(distributions or {})
+    centers = _point_estimates(calculator)
+    drawn = {}
+
+    for name, spec in specs.items():
+        kind, args = spec[0], list(spec[1:])
+        if args and args[0] is None:
+            args[0] = centers[name]
+
+        if kind == 'normal':
+            values = rng.normal(args[0], args[1], samples)
+        elif kind == 'lognormal':
+            values = args[0] * np.exp(rng.normal(0.0, args[1], samples))
+        elif kind == 'uniform':
+            values = rng.uniform(args[0], args[1], samples)
+        elif kind == 'fixed':
+            values = np.full(samples, float(args[0]))
+        else:
+            raise ValueError(f"Unknown distribution '{kind}' for {name}")
+
+        low, high = PARAMETER_BOUNDS[name]
+        drawn[name] = np.clip(values, low, high)
+
+    return drawn
+
+
+def _drink_timing(calculator) -> Tuple[list, list, list, list]:
+    """Per drink: (offset_seconds, effective_alcohol_oz, empty_stomach, fed_multiplier)"""
+    offsets, alcohol, tau = calculator.get_drink_constants()
+    empty, multiplier = [], []
+    for drink, drink_tau in zip(calculator.drinks_timeline, tau):
+        context = calculator.get_food_context(drink['time'])
+        is_empty = context['gastric_time'] == 0
+        empty.append(is_empty)
+        # Fed drinks scale the fed time constant by the stomach-emptying delay
+        multiplier.append(1.0 if is_empty else drink_tau / calculator.ABSORPTION_TIME_FED)
+    return list(offsets), list(alcohol), empty, multiplier
+
+
+def simulate_uncertainty(calculator, hours: float = 24, from_now: bool = False,
+                         samples: int = 10000, seed: int = None, distributions: Dict = None,
+                         percentiles: Sequence[float] = (5, 50, 95),
+                         limit: float = 0.08) -> UncertaintyResult:
+    """
+    Monte Carlo BAC bands for the calculator's scenario.
+
+    Args:
+        calculator: BACCalculator holding the profile and events
+        hours: Horizon of the 5-minute grid
+        from_now: Start the grid now instead of at start_time
+        samples: Number of parameter draws
+        seed: Seed for a reproducible run
+        distributions: Overrides for DEFAULT_DISTRIBUTIONS
+        percentiles: Percentile bands to return
+        limit: BAC threshold for prob_over_limit
+    """
+    if np is None:
+        raise ImportError("The Monte Carlo engine requires NumPy")
+
+    rng = np.random.default_rng(seed)
+    params = sample_parameters(calculator, samples, rng, distributions)
+
+    start = datetime.now() if from_now else calculator.start_time
+    step = calculator.TIMELINE_STEP_MINUTES
+    origin = (start - calculator.start_time).total_seconds()
+    offsets = bac_engine.time_grid(hours, step, origin)
+
+    # Absorbed alcohol per draw, accumulated one drink at a time: (samples x times)
+    immediate = calculator.IMMEDIATE_ABSORPTION
+    absorbed = np.zeros((samples, offsets.shape[0]))
+    for d_off, alcohol, is_empty, multiplier in zip(*_drink_timing(calculator)):
+        # The grid is ascending, so the drink only touches a suffix of it
+        first = int(np.searchsorted(offsets, d_off))
+        if first == offsets.shape[0]:
+            continue
+        minutes = (offsets[first:] - d_off) / 60
+        if is_empty:
+            rate = 1.0 / params['absorption_time_empty']
+        else:
+            rate = 1.0 / (params['absorption_time_fed'] * multiplier)
+
+        factor = np.multiply.outer(rate, -minutes)
+        np.expm1(factor, out=factor)
+        factor *= -(1 - immediate)
+        factor += immediate
+        np.minimum(factor, 1.0, out=factor)
+        factor *= alcohol
+        absorbed[:, first:] += factor
+
+    scale = 5.14 / (calculator.profile['weight_lbs'] * params['widmark_ratio'])
+    bac = absorbed * scale[:, None]
+    bac -= params['elimination_rate'][:, None] * (np.maximum(offsets, 0.0) / 3600)[None, :]
+    bac = np.where(offsets[None, :] < 0, 0.0, np.maximum(bac, 0.0))
+
+    bands = np.percentile(bac, percentiles, axis=0)
+    times = [start + timedelta(minutes=step * i) for i in range(offsets.shape[0])]
+    return UncertaintyResult(
+        times,
+        {p: np.round(band, 4) for p, band in zip(percentiles, bands)},
+        (bac >= limit).mean(axis=0),
+        params,
+    )
@@ -0,0 +1,131 @@
+"""
+Parallel Cohort Executor
+Shards population batch runs across a process pool
+"""
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Sequence, Tuple
+
+import bac_batch
+import bac_engine
+from bac_batch import PopulationResult
+from bac_calculator import BACCalculator
+
+np = bac_engine.load_numpy()
+
+# Profile rows per task
+DEFAULT_CHUNK_SIZE = 4096
+
+# Shared per-worker state installed by _init_worker
+_worker_kernel_sets = None
+_worker_offsets = None
+
+
+def _init_worker(kernel_sets, offsets):
+    """Receive the scenario kernels (one set per absorption group) and time grid once per worker"""
+    global _worker_kernel_sets, _worker_offsets
+    _worker_kernel_sets = kernel_sets
+    _worker_offsets = offsets
+
+
+def _run_chunk(lo: int, hi: int, scale, elimination, group_index, curves: bool, float32_curves: bool):
+    """Evaluate one shard of profile rows inside a worker"""
+    result = bac_batch.evaluate_groups(scale, elimination, group_index, _worker_kernel_sets,
+                                       _worker_offsets, curves)
+    if curves and float32_curves:
+        # Halve the transfer back to the parent; values differ from serial in the last bits
+        result = result._replace(curves=result.curves.astype(np.float32))
+    return lo, hi, result
+
+
+def iter_population_chunks(profiles, scenarios: Sequence[Dict], hours: float = 24,
+                           step_minutes: float = 5, curves: bool = False,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: int = None,
+                           deterministic: bool = True, float32_curves: bool = False,
+                           calculator_class=BACCalculator) -> Iterator[Tuple[int, int, PopulationResult]]:
+    """
+    Evaluate profiles x scenarios on a process pool, yielding (lo, hi, result)
+    for each shard of profile rows lo..hi-1.
+
+    Workers receive only compact arrays: the shared scenario kernels (one
+    set per group of profiles with the same absorption constants) and time
+    grid once at start-up, then each shard's Widmark scales, elimination
+    rates and group indexes. No calculators or timelines are pickled.
+
+    Args:
+        chunk_size: Profile rows per task
+        max_workers: Pool size (default: CPU count)
+        deterministic: Yield shards strictly in row order. When False,
+                       shards are yielded as they finish. Values are the
+                       same either way.
+        float32_curves: Send curves back as float32, halving the transfer;
+                        they then differ from bac_batch.simulate_population
+                        in the last bits. Off by default, so results are
+                        bit-for-bit equal to the serial run.
+    """
+    bac_batch._require_numpy()
+    offsets = bac_engine.time_grid(hours, step_minutes)
+    overrides = bac_batch.profile_parameters(profiles, calculator_class)
+    scale, elimination = bac_batch.profile_arrays(profiles, calculator_class, overrides)
+    groups, group_index = bac_batch.absorption_groups(overrides, scale.shape[0])
+    kernel_sets = [bac_batch.scenario_kernels(scenarios, offsets, calculator_class, parameters)
+                   for parameters in groups]
+    rows = scale.shape[0]
+    shards = ((lo, min(lo + chunk_size, rows)) for lo in range(0, rows, chunk_size))
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(kernel_sets, offsets)) as executor:
+        # Bound the number of shards in flight so results stream in memory
+        window = 2 * max_workers
+        pending = deque()
+
+        def submit_next():
+            shard = next(shards, None)
+            if shard is None:
+                return False
+            lo, hi = shard
+            pending.append(executor.submit(_run_chunk, lo, hi, scale[lo:hi], elimination[lo:hi],
+                                           group_index[lo:hi], curves, float32_curves))
+            return True
+
+        while len(pending) < window and submit_next():
+            pass
+
+        while pending:
+            if deterministic:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [f for f in pending if f in finished]
+                for future in done:
+                    pending.remove(future)
+
+            for future in done:
+                submit_next()
+                yield future.result()
+
+
+def simulate_population_parallel(profiles, scenarios: Sequence[Dict], hours: float = 24,
+                                 step_minutes: float = 5, curves: bool = False,
+                                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: int = None,
+                                 deterministic: bool = True, float32_curves: bool = False,
+                                 calculator_class=BACCalculator) -> PopulationResult:
+    """Parallel equivalent of bac_batch.simulate_population, assembled in row order"""
+    parts = sorted(iter_population_chunks(profiles, scenarios, hours, step_minutes, curves,
+                                          chunk_size, max_workers, deterministic,
+                                          float32_curves, calculator_class),
+                   key=lambda part: part[0])
+    if not parts:
+        return bac_batch.simulate_population(profiles, scenarios, hours, step_minutes,
+                                             curves, calculator_class)
+
+    results = [result for _, _, result in parts]
+    return PopulationResult(
+        results[0].offsets_hours,
+        np.concatenate([r.peak_bac for r in results]),
+        np.concatenate([r.time_to_peak for r in results]),
+        np.concatenate([r.time_to_sober for r in results]),
+        np.concatenate([r.curves for r in results]) if curves else None,
+    )
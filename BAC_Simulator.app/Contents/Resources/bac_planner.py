@@ -0,0 +1,164 @@
+"""
+Inverse BAC Planner
+Answers "how many more", "when can I drink" and "when can I leave" against a
+BAC target by bisection over the analytic curve
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from bac_calculator import BACCalculator
+
+# Time searches stop once the bracket is narrower than this (seconds)
+TIME_RESOLUTION = 1.0
+
+# Upper bounds of the searches
+MAX_DRINKS = 100
+MAX_WAIT_HOURS = 48
+
+
+def _offset(calculator: BACCalculator, time: datetime) -> float:
+    return (time - calculator.start_time).total_seconds()
+
+
+def _settle_offset(curve, threshold: float, offset: float) -> float:
+    """First offset >= `offset` from which the curve stays at or below threshold (inf if none)"""
+    while True:
+        offset = curve.time_below(offset, threshold)
+        if math.isinf(offset):
+            return offset
+        peak_bac, peak_offset = curve.peak(offset)
+        if peak_bac <= threshold:
+            return offset
+        offset = peak_offset  # A later drink lifts BAC back over; look past that peak
+
+
+def _stays_under(calculator: BACCalculator, threshold: float, offset: float) -> bool:
+    """True if BAC never exceeds threshold at or after offset"""
+    return calculator.get_bac_curve().peak(offset)[0] <= threshold
+
+
+def _with_drinks(calculator: BACCalculator, drinks: List[Dict]) -> BACCalculator:
+    """A copy of the scenario with extra drinks logged"""
+    trial = calculator.copy()
+    trial.add_drinks(drinks)
+    return trial
+
+
+def earliest_time_under(calculator: BACCalculator, threshold: float,
+                        from_time: datetime = None) -> Optional[datetime]:
+    """
+    When BAC falls to `threshold` and stays there, given the drinks logged
+    so far ("when can I leave"). Drinks logged for later times are taken
+    into account, so the answer may be after them. None if BAC never falls
+    that far (zero elimination rate).
+    """
+    if from_time is None:
+        from_time = datetime.now()
+    curve = calculator.get_bac_curve()
+    offset = _settle_offset(curve, threshold, _offset(calculator, from_time))
+    if math.isinf(offset):
+        return None
+    return calculator.start_time + timedelta(seconds=max(offset, 0.0))
+
+
+def max_additional_drinks(calculator: BACCalculator, drink_type: str, threshold: float,
+                          until: datetime = None, start: datetime = None,
+                          interval_minutes: float = 0, limit: int = MAX_DRINKS,
+                          **drink_kwargs) -> int:
+    """
+    Most extra drinks that keep BAC at or below `threshold` from `until` on
+    ("how many more can I have and still be under 0.05 by 11pm").
+
+    Every extra drink only adds alcohol, so BAC is non-decreasing in the
+    number of drinks at every instant and the feasible counts form a prefix
+    0..n. The search doubles n until it fails, then bisects.
+
+    Args:
+        calculator: Scenario so far (left unchanged)
+        drink_type: Drink to add (see BACCalculator.add_drink)
+        threshold: BAC target
+        until: Time from which BAC must stay under the target; default
+               start, i.e. never go over from the first extra drink on
+        start: Time of the first extra drink (default now)
+        interval_minutes: Spacing between the extra drinks
+        limit: Largest count considered
+        **drink_kwargs: size_oz / alcohol_percent, as for add_drink
+
+    Returns:
+        0 if even the current scenario goes over the target
+    """
+    if start is None:
+        start = datetime.now()
+    if until is None:
+        until = start
+    offset = _offset(calculator, until)
+
+    def feasible(count: int) -> bool:
+        drinks = [dict(drink_kwargs, time=start + timedelta(minutes=i * interval_minutes),
+                       type=drink_type) for i in range(count)]
+        return _stays_under(_with_drinks(calculator, drinks), threshold, offset)
+
+    if not feasible(0):
+        return 0
+
+    lo, hi = 0, 1   # feasible(lo) holds
+    while hi <= limit and feasible(hi):
+        lo, hi = hi, hi * 2
+    hi = min(hi, limit + 1)
+
+    # Invariant: feasible(lo), not feasible(hi)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if feasible(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def earliest_safe_drink_time(calculator: BACCalculator, drink_type: str, threshold: float,
+                             until: datetime = None, after: datetime = None,
+                             **drink_kwargs) -> Optional[datetime]:
+    """
+    Earliest time at or after `after` (default now) for one more drink that
+    still keeps BAC at or below `threshold` from `until` on (default: from
+    the drink itself on).
+
+    In this model elimination runs from start_time regardless of when a
+    drink is taken, so a later drink has absorbed less at any given moment:
+    the drink's contribution is non-increasing in its time and the safe
+    times form an interval [t*, ...). Any time after the returned one is
+    safe too, so there is no "latest" safe time to find; t* is found by
+    bisection. Food changes absorption speed with the time since eating,
+    which can bend this slightly, but the returned time is always checked
+    to be safe.
+
+    Returns:
+        None if no time within MAX_WAIT_HOURS works
+    """
+    if after is None:
+        after = datetime.now()
+
+    def feasible(offset: float) -> bool:
+        drink_time = after + timedelta(seconds=offset)
+        constraint = _offset(calculator, until if until is not None else drink_time)
+        trial = _with_drinks(calculator, [dict(drink_kwargs, time=drink_time, type=drink_type)])
+        return _stays_under(trial, threshold, constraint)
+
+    if feasible(0.0):
+        return after
+
+    lo, hi = 0.0, 900.0   # not feasible(lo)
+    while not feasible(hi):
+        if hi >= MAX_WAIT_HOURS * 3600:
+            return None
+        lo, hi = hi, min(hi * 2, MAX_WAIT_HOURS * 3600)
+
+    while hi - lo > TIME_RESOLUTION:
+        mid = (lo + hi) / 2
+        if feasible(mid):
+            hi = mid
+        else:
+            lo = mid
+    return after + timedelta(seconds=hi)
@@ -0,0 +1,401 @@
+"""
+BAC Simulation Service
+Headless HTTP/JSON server keeping one BACCalculator per session
+
+Run:
+    python bac_server.py --port 8765
+
+Every request is a POST of one JSON operation, or a JSON array of them
+(answered with an array in the same order):
+
+    {"session": "abc", "op": "drink", "type": "beer_regular", "time": "2024-05-01T20:15:00"}
+
+Operations: profile, start, drink, drinks, food, foods, bac, timeline,
+peak, sober, legal_limit, reset, close. GET /health reports pool stats.
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bac_calculator import BACCalculator
+
+# Largest accepted request body (bytes)
+MAX_BODY_BYTES = 1 << 20
+
+# Defaults for the session pool
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_IDLE_SECONDS = 1800
+
+# Bounds on request values that set how much work one operation does
+MAX_TIMELINE_HOURS = 72
+MIN_TOLERANCE = 1e-4
+MAX_QUANTITY = 100
+
+
+class RequestError(ValueError):
+    """A malformed or unsupported operation; reported back to the client"""
+
+
+class SessionPool:
+    """
+    Bounded LRU pool of per-session calculators. The least recently used
+    session is dropped when the pool is full, and sessions idle for longer
+    than idle_seconds are dropped by evict_idle().
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 idle_seconds: float = DEFAULT_IDLE_SECONDS, calculator_class=BACCalculator):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.calculator_class = calculator_class
+        self._sessions = OrderedDict()  # session id -> (calculator, last_used), oldest first
+        self.evicted = 0
+
+    def get(self, session_id: str) -> BACCalculator:
+        """Return the session's calculator, creating it on first use"""
+        entry = self._sessions.pop(session_id, None)
+        calculator = entry[0] if entry else self.calculator_class()
+        self._sessions[session_id] = (calculator, time.monotonic())
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        return calculator
+
+    def close(self, session_id: str) -> bool:
+        """Drop a session; returns False if it did not exist"""
+        return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle for longer than idle_seconds; returns how many"""
+        cutoff = time.monotonic() - self.idle_seconds
+        dropped = 0
+        # Oldest first, so stop at the first session still in use
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if last_used > cutoff:
+                break
+            del self._sessions[session_id]
+            dropped += 1
+        self.evicted += dropped
+        return dropped
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def _parse_time(value, default: datetime = None) -> datetime:
+    """
+    ISO 8601 string (or None for the default) to a naive datetime.
+    Times with a UTC offset are converted to local time, like datetime.now().
+    """
+    if value is None:
+        return default if default is not None else datetime.now()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RequestError(f"Invalid time: {value!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _number(value, name: str, low: float = None, high: float = None, integer: bool = False):
+    """A numeric field value checked against [low, high]; None passes through"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise RequestError(f"{name} must be a number")
+    if integer and value != int(value):
+        raise RequestError(f"{name} must be a whole number")
+    if low is not None and value < low:
+        raise RequestError(f"{name} must be at least {low}")
+    if high is not None and value > high:
+        raise RequestError(f"{name} must be at most {high}")
+    return int(value) if integer else float(value)
+
+
+def _boolean(value, name: str) -> bool:
+    """A JSON true/false field value"""
+    if not isinstance(value, bool):
+        raise RequestError(f"{name} must be true or false")
+    return value
+
+
+def _string(value, name: str) -> str:
+    """A string field value"""
+    if not isinstance(value, str):
+        raise RequestError(f"{name} must be a string")
+    return value
+
+
+def _seconds(delta: timedelta) -> float:
+    return None if delta is None else delta.total_seconds()
+
+
+def _json_default(value):
+    """Encode datetimes and NumPy scalars"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+class BACService:
+    """Executes JSON operations against a SessionPool"""
+
+    def __init__(self, pool: SessionPool):
+        self.pool = pool
+        self.operations = {
+            'profile': self.op_profile,
+            'start': self.op_start,
+            'drink': self.op_drink,
+            'drinks': self.op_drinks,
+            'food': self.op_food,
+            'foods': self.op_foods,
+            'bac': self.op_bac,
+            'timeline': self.op_timeline,
+            'peak': self.op_peak,
+            'sober': self.op_sober,
+            'legal_limit': self.op_legal_limit,
+            'reset': self.op_reset,
+        }
+
+    def execute(self, request) -> Dict:
+        """Run one operation, returning its result or {'error': message}"""
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Operation must be a JSON object")
+            op = request.get('op')
+            session_id = request.get('session')
+            if not isinstance(session_id, str) or not session_id:
+                raise RequestError("Missing 'session'")
+
+            if op == 'close':
+                return {'closed': self.pool.close(session_id)}
+            handler = self.operations.get(op)
+            if handler is None:
+                raise RequestError(f"Unknown op: {op!r}")
+            return handler(self.pool.get(session_id), request)
+        except (RequestError, KeyError, TypeError, ValueError) as e:
+            return {'error': str(e) if not isinstance(e, KeyError) else f"Missing field: {e}"}
+        except Exception as e:
+            # Keep one bad operation from losing the answers to a whole batch
+            return {'error': f"{type(e).__name__}: {e}"}
+
+    def execute_all(self, payload):
+        """Run a single operation or a batch (list) in order"""
+        if isinstance(payload, list):
+            return [self.execute(request) for request in payload]
+        return self.execute(payload)
+
+    def op_profile(self, calculator: BACCalculator, request: Dict) -> Dict:
+        if request.get('weight_lbs') is None:
+            raise RequestError("Missing field: 'weight_lbs'")
+        calculator.set_profile(_string(request.get('sex', 'male'), 'sex'),
+                               _number(request['weight_lbs'], 'weight_lbs', low=1, high=2000),
+                               _number(request.get('age', 30), 'age', low=0, high=150,
+                                       integer=True),
+                               _boolean(request.get('chronic_drinker', False), 'chronic_drinker'))
+        return {'profile': calculator.profile}
+
+    def op_start(self, calculator: BACCalculator, request: Dict) -> Dict:
+        calculator.start_time = _parse_time(request.get('start_time'))
+        return {'start_time': calculator.start_time}
+
+    def _drink(self, request: Dict) -> Dict:
+        if not isinstance(request, dict):
+            raise RequestError("Each drink must be a JSON object")
+        return {'time': _parse_time(request.get('time')), 'type': _string(request['type'], 'type'),
+                'size_oz': _number(request.get('size_oz'), 'size_oz', low=0, high=1000),
+                'alcohol_percent': _number(request.get('alcohol_percent'), 'alcohol_percent', low=0, high=100),
+                'quantity': _number(request.get('quantity', 1), 'quantity', low=1, high=MAX_QUANTITY,
+                                    integer=True)}
+
+    def _food(self, request: Dict) -> Dict:
+        if not isinstance(request, dict):
+            raise RequestError("Each food must be a JSON object")
+        return {'time': _parse_time(request.get('time')), 'type': _string(request['type'], 'type')}
+
+    def op_drink(self, calculator: BACCalculator, request: Dict) -> Dict:
+        # add_drink inserts in place; add_drinks re-sorts and refreshes every food context
+        drink = self._drink(request)
+        calculator.add_drink(drink['time'], drink['type'], drink['size_oz'],
+                             drink['alcohol_percent'], drink['quantity'])
+        return {'drinks': len(calculator.drinks_timeline)}
+
+    def op_drinks(self, calculator: BACCalculator, request: Dict) -> Dict:
+        calculator.add_drinks([self._drink(d) for d in request['drinks']])
+        return {'drinks': len(calculator.drinks_timeline)}
+
+    def op_food(self, calculator: BACCalculator, request: Dict) -> Dict:
+        food = self._food(request)
+        calculator.add_food(food['time'], food['type'])
+        return {'foods': len(calculator.food_timeline)}
+
+    def op_foods(self, calculator: BACCalculator, request: Dict) -> Dict:
+        calculator.add_foods([self._food(f) for f in request['foods']])
+        return {'foods': len(calculator.food_timeline)}
+
+    def op_bac(self, calculator: BACCalculator, request: Dict) -> Dict:
+        bac = calculator.calculate_bac_at_time(_parse_time(request.get('time')))
+        return {'bac': bac, 'impairment': calculator.get_impairment_level(bac)}
+
+    def op_timeline(self, calculator: BACCalculator, request: Dict) -> Dict:
+        timeline = calculator.get_bac_timeline(_number(request.get('hours', 6), 'hours', low=0,
+                                                       high=MAX_TIMELINE_HOURS),
+                                               _boolean(request.get('from_now', True), 'from_now'),
+                                               _number(request.get('tolerance'), 'tolerance',
+                                                       low=MIN_TOLERANCE))
+        return {'times': [t for t, _ in timeline], 'bac': [b for _, b in timeline]}
+
+    def op_peak(self, calculator: BACCalculator, request: Dict) -> Dict:
+        peak_bac, peak_time = calculator.get_peak_bac(_parse_time(request.get('from_time')))
+        return {'peak_bac': peak_bac, 'peak_time': peak_time}
+
+    def op_sober(self, calculator: BACCalculator, request: Dict) -> Dict:
+        delta = calculator.get_time_to_sobriety(_number(request.get('threshold', 0.0), 'threshold', low=0),
+                                                _parse_time(request.get('from_time')))
+        return {'seconds_from_start': _seconds(delta),
+                'time': calculator.start_time + delta if delta is not None else None}
+
+    def op_legal_limit(self, calculator: BACCalculator, request: Dict) -> Dict:
+        delta = calculator.get_time_to_legal_limit(_parse_time(request.get('from_time')))
+        return {'seconds_from_start': _seconds(delta),
+                'time': calculator.start_time + delta if delta is not None else None}
+
+    def op_reset(self, calculator: BACCalculator, request: Dict) -> Dict:
+        calculator.clear_scenario()
+        return {'reset': True}
+
+
+class BACServer:
+    """Minimal HTTP/1.1 front end (keep-alive, Content-Length bodies) for BACService"""
+
+    def __init__(self, service: BACService, sweep_seconds: float = 60):
+        self.service = service
+        self.sweep_seconds = sweep_seconds
+
+    async def _respond(self, writer, status: str, payload, keep_alive: bool):
+        body = json.dumps(payload, default=_json_default).encode()
+        head = (f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    await self._respond(writer, '400 Bad Request', {'error': 'Bad request line'}, False)
+                    break
+                method, path, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, '400 Bad Request', {'error': 'Bad Content-Length'}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, '413 Payload Too Large', {'error': 'Body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = self.route(method, path, body)
+                    await self._respond(writer, status, payload, keep_alive)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    await self._respond(writer, '500 Internal Server Error',
+                                        {'error': f"{type(e).__name__}: {e}"}, False)
+                    break
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method: str, path: str, body: bytes):
+        """Return (status, payload) for one request"""
+        if method == 'GET' and path == '/health':
+            pool = self.service.pool
+            return '200 OK', {'sessions': len(pool), 'max_sessions': pool.max_sessions,
+                              'evicted': pool.evicted}
+        if method != 'POST':
+            return '405 Method Not Allowed', {'error': 'POST a JSON operation'}
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            return '400 Bad Request', {'error': 'Invalid JSON'}
+
+        result = self.service.execute_all(payload)
+        if isinstance(result, dict) and 'error' in result:
+            return '400 Bad Request', result
+        return '200 OK', result
+
+    async def sweep(self):
+        """Evict idle sessions periodically"""
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            self.service.pool.evict_idle()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765):
+        """Listen until cancelled"""
+        server = await asyncio.start_server(self.handle, host, port)
+        sweeper = asyncio.create_task(self.sweep())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='BAC Simulator HTTP/JSON service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-sessions', type=int, default=DEFAULT_MAX_SESSIONS)
+    parser.add_argument('--idle-seconds', type=float, default=DEFAULT_IDLE_SECONDS)
+    args = parser.parse_args(argv)
+
+    pool = SessionPool(args.max_sessions, args.idle_seconds)
+    # Sweep at least once a second so a tiny or zero idle time cannot spin the loop
+    server = BACServer(BACService(pool), sweep_seconds=max(1, min(60, args.idle_seconds)))
+    print(f"BAC service listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
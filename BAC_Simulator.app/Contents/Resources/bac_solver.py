@@ -0,0 +1,186 @@
+"""
+Analytic BAC Curve Solver
+Peak BAC and threshold crossings by bracketed root finding on the model curve
+"""
+import math
+from typing import Iterator, Optional, Sequence, Tuple
+
+# Bisection stops once the bracket is narrower than this (seconds)
+TIME_TOLERANCE = 1e-3
+
+# Decayed absorption weights below this are treated as fully absorbed
+NEGLIGIBLE_WEIGHT = 1e-15
+
+
+class AnalyticCurve:
+    """
+    Closed form of the calculator's BAC model for t >= 0 (seconds since start):
+
+        f(t) = S × Σ a_i × [1 - (1 - im) × exp(-(t - d_i) / τ_i)] - E × t
+
+    summed over drinks with d_i <= t. Between consecutive drink times f is
+    concave (a sum of saturating exponentials minus a line), and each drink
+    adds an upward jump of S × im × a_i. Every piece therefore has a single
+    maximum and at most one crossing of any threshold on each side of it,
+    so each query is a walk over the pieces plus one bisection.
+
+    Drinks sharing a time constant are merged into one decaying weight per
+    τ, so stepping from one piece to the next costs O(distinct τ).
+    """
+
+    def __init__(self, drink_offsets: Sequence[float], drink_alcohol: Sequence[float],
+                 drink_tau: Sequence[float], widmark_scale: float,
+                 elimination_rate: float, immediate: float = 0.10):
+        """
+        Args:
+            drink_offsets: Drink times in seconds since the scenario start
+            drink_alcohol: Alcohol per drink (oz), already scaled by food peak reduction
+            drink_tau: Absorption time constant per drink (minutes)
+            widmark_scale: 5.14 / (W × r)
+            elimination_rate: BAC eliminated per hour
+            immediate: Fraction of each drink absorbed the moment it is consumed
+        """
+        self.events = sorted(zip((float(d) for d in drink_offsets),
+                                 (float(a) for a in drink_alcohol),
+                                 (float(t) * 60 for t in drink_tau)))
+        self.scale = widmark_scale
+        self.elimination = elimination_rate / 3600  # per second
+        self.delayed = 1 - immediate
+
+    def _pieces(self, t0: float) -> Iterator[Tuple[float, Optional[float], float, dict]]:
+        """
+        Yield (start, end, total_alcohol, weights) for every concave piece from t0 on.
+        weights maps τ (seconds) to the not-yet-absorbed alcohol at `start`;
+        end is None for the final, unbounded piece.
+        """
+        events = self.events
+        total = 0.0
+        weights = {}
+        idx = 0
+
+        while idx < len(events) and events[idx][0] <= t0:
+            d, alcohol, tau = events[idx]
+            total += alcohol
+            weights[tau] = weights.get(tau, 0.0) + alcohol * self.delayed * math.exp(-(t0 - d) / tau)
+            idx += 1
+
+        start = t0
+        while True:
+            end = events[idx][0] if idx < len(events) else None
+            yield start, end, total, weights
+            if end is None:
+                return
+
+            # Decay the pending alcohol to the next drink, then add it
+            decayed = ((tau, w * math.exp(-(end - start) / tau)) for tau, w in weights.items())
+            weights = {tau: w for tau, w in decayed if w > NEGLIGIBLE_WEIGHT}
+            while idx < len(events) and events[idx][0] == end:
+                _, alcohol, tau = events[idx]
+                total += alcohol
+                weights[tau] = weights.get(tau, 0.0) + alcohol * self.delayed
+                idx += 1
+            start = end
+
+    def _value(self, start: float, total: float, weights: dict, u: float) -> float:
+        """Unclamped BAC at start + u within a piece"""
+        pending = sum(w * math.exp(-u / tau) for tau, w in weights.items())
+        return self.scale * (total - pending) - self.elimination * (start + u)
+
+    def _slope(self, weights: dict, u: float) -> float:
+        """dBAC/dt (per second) at start + u within a piece"""
+        rate = sum(w / tau * math.exp(-u / tau) for tau, w in weights.items())
+        return self.scale * rate - self.elimination
+
+    def _piece_max(self, start: float, end: Optional[float], weights: dict) -> float:
+        """Offset u of the maximum within a piece, measured from its start"""
+        if self._slope(weights, 0.0) <= 0:
+            return 0.0
+
+        if end is None:
+            # The slope tends to -E, so double until it turns negative
+            hi = 60.0
+            while self._slope(weights, hi) > 0:
+                hi *= 2
+        else:
+            hi = end - start
+            if self._slope(weights, hi) > 0:
+                return hi
+
+        return _bisect(lambda u: self._slope(weights, u), 0.0, hi)
+
+    def value(self, t: float) -> float:
+        """BAC at offset t, clamped at zero (unrounded)"""
+        if t < 0:
+            return 0.0
+        start, _, total, weights = next(self._pieces(t))
+        return max(0.0, self._value(start, total, weights, 0.0))
+
+    def peak(self, t0: float = 0.0) -> Tuple[float, float]:
+        """Return (peak_bac, offset) of the maximum BAC at or after offset t0"""
+        t0 = max(t0, 0.0)
+        best_bac, best_t = 0.0, t0
+
+        for start, end, total, weights in self._pieces(t0):
+            # Nothing in this piece can beat the best so far
+            if self.scale * total - self.elimination * start <= best_bac:
+                continue
+            u = self._piece_max(start, end, weights)
+            bac = self._value(start, total, weights, u)
+            if bac > best_bac:
+                best_bac, best_t = bac, start + u
+
+        return best_bac, best_t
+
+    def time_below(self, t0: float, threshold: float = 0.0) -> float:
+        """
+        Return the first offset >= t0 at which BAC <= threshold, or inf if
+        BAC never falls that far (no elimination)
+        """
+        if t0 < 0:
+            return t0  # Before the scenario starts BAC is zero
+
+        for start, end, total, weights in self._pieces(t0):
+            if self._value(start, total, weights, 0.0) <= threshold:
+                return start
+
+            if end is None:
+                if self.elimination <= 0:
+                    return math.inf  # Without elimination BAC only rises to its plateau
+                # f(t) <= S × total - E × t bounds the crossing from above
+                hi = max((self.scale * total - threshold) / self.elimination - start, TIME_TOLERANCE)
+            else:
+                hi = end - start
+                if self._value(start, total, weights, hi) > threshold:
+                    continue  # Concave piece above threshold at both ends
+
+            u = _bisect(lambda x: self._value(start, total, weights, x) - threshold, 0.0, hi)
+            return start + u
+
+    def time_above(self, t0: float, threshold: float) -> Optional[float]:
+        """Return the first offset >= t0 at which BAC >= threshold, or None"""
+        t0 = max(t0, 0.0)
+
+        for start, end, total, weights in self._pieces(t0):
+            if self._value(start, total, weights, 0.0) >= threshold:
+                return start
+
+            u_max = self._piece_max(start, end, weights)
+            if self._value(start, total, weights, u_max) < threshold:
+                continue
+
+            # BAC rises monotonically up to the piece maximum
+            u = _bisect(lambda x: threshold - self._value(start, total, weights, x), 0.0, u_max)
+            return start + u
+
+        return None
+
+
+def _bisect(fn, lo: float, hi: float) -> float:
+    """Given fn(lo) > 0 >= fn(hi), return the sign change to within TIME_TOLERANCE"""
+    while hi - lo > TIME_TOLERANCE:
+        mid = 0.5 * (lo + hi)
+        if fn(mid) > 0:
+            lo = mid
+        else:
+            hi = mid
+    return hi
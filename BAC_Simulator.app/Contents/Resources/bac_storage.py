@@ -0,0 +1,167 @@
+"""
+Persistent Scenario Store
+Keeps profiles and drink/food events in SQLite (WAL mode) so sessions survive restarts
+"""
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from bac_calculator import BACCalculator
+from event_store import to_datetime, to_seconds
+
+# Buffered events are written once this many are pending
+DEFAULT_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT PRIMARY KEY,
+    sex TEXT NOT NULL,
+    weight_lbs REAL NOT NULL,
+    age INTEGER NOT NULL,
+    chronic_drinker INTEGER NOT NULL,
+    start_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    session TEXT NOT NULL,
+    time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size_oz REAL,
+    alcohol_percent REAL,
+    quantity INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS events_session_time ON events (session, time);
+"""
+
+
+class ScenarioStore:
+    """
+    SQLite-backed store of sessions: one profile row per session and one
+    row per logged drink or food event.
+
+    Event writes are buffered and inserted in batches inside a single
+    transaction; reads flush the buffer first. Event times are stored as
+    event_store seconds, so a session's events are one indexed range scan
+    on (session, time) and come back already sorted for the calculator.
+
+        store = ScenarioStore('scenarios.db')
+        store.save_profile('alice', calculator)
+        store.add_events('alice', chatbot.ingest_transcript(log))
+        calculator = store.load('alice')
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            path: Database file (':memory:' for a throwaway store)
+            batch_size: Pending event rows that trigger a write
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._pending = []
+
+    def save_profile(self, session: str, calculator: BACCalculator):
+        """Store (or replace) the session's profile and start time"""
+        profile = calculator.profile
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)',
+                (session, profile['sex'], profile['weight_lbs'], profile['age'],
+                 int(bool(profile['chronic_drinker'])), to_seconds(calculator.start_time)))
+
+    def add_events(self, session: str, events: Iterable[Dict]):
+        """
+        Queue drink and food events for the session. Events are dicts with
+        'kind' ('drink' or 'food'), 'time' and 'type', plus the optional
+        drink keys of BACCalculator.add_drinks.
+        """
+        for event in events:
+            self._pending.append((
+                session, to_seconds(event['time']), event['kind'], event['type'],
+                event.get('size_oz'), event.get('alcohol_percent'), event.get('quantity') or 1,
+            ))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def add_drink(self, session: str, time: datetime, drink_type: str, **kwargs):
+        """Queue one drink (keyword arguments as in BACCalculator.add_drink)"""
+        self.add_events(session, [dict(kwargs, kind='drink', time=time, type=drink_type)])
+
+    def add_food(self, session: str, time: datetime, food_type: str):
+        """Queue one food event"""
+        self.add_events(session, [{'kind': 'food', 'time': time, 'type': food_type}])
+
+    def flush(self):
+        """Write all queued events in one transaction"""
+        if not self._pending:
+            return
+        with self.connection:
+            self.connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                        self._pending)
+        self._pending = []
+
+    def iter_events(self, session: str, since: datetime = None,
+                    until: datetime = None) -> Iterator[Dict]:
+        """Stream the session's events in time order, optionally limited to [since, until)"""
+        self.flush()
+        query = ('SELECT time, kind, type, size_oz, alcohol_percent, quantity FROM events '
+                 'WHERE session = ? AND time >= ? AND time < ? ORDER BY time')
+        low = to_seconds(since) if since is not None else float('-inf')
+        high = to_seconds(until) if until is not None else float('inf')
+
+        for time, kind, event_type, size_oz, alcohol_percent, quantity in \
+                self.connection.execute(query, (session, low, high)):
+            event = {'kind': kind, 'time': to_datetime(time), 'type': event_type}
+            if kind == 'drink':
+                event.update(size_oz=size_oz, alcohol_percent=alcohol_percent, quantity=quantity)
+            yield event
+
+    def load(self, session: str, since: datetime = None, until: datetime = None,
+             calculator_class=BACCalculator) -> Optional[BACCalculator]:
+        """
+        Rebuild a session's calculator from its profile and one range read of
+        its events (bulk-added, not replayed). Returns None for an unknown session.
+        """
+        row = self.connection.execute(
+            'SELECT sex, weight_lbs, age, chronic_drinker, start_time FROM sessions WHERE session = ?',
+            (session,)).fetchone()
+        if row is None:
+            return None
+
+        sex, weight_lbs, age, chronic_drinker, start_time = row
+        calculator = calculator_class()
+        calculator.set_profile(sex, weight_lbs, age, bool(chronic_drinker))
+        calculator.start_time = to_datetime(start_time)
+        calculator.add_events(self.iter_events(session, since, until))
+        return calculator
+
+    def sessions(self) -> List[str]:
+        """Every stored session id"""
+        return [row[0] for row in self.connection.execute('SELECT session FROM sessions ORDER BY session')]
+
+    def clear_events(self, session: str):
+        """Delete the session's events but keep its profile (as clear_scenario does)"""
+        self.flush()
+        with self.connection:
+            self.connection.execute('DELETE FROM events WHERE session = ?', (session,))
+
+    def delete(self, session: str):
+        """Delete the session and all its events"""
+        self.clear_events(session)
+        with self.connection:
+            self.connection.execute('DELETE FROM sessions WHERE session = ?', (session,))
+
+    def close(self):
+        """Flush pending events and close the database"""
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
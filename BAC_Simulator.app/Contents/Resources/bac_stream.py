@@ -0,0 +1,225 @@
+"""
+Streaming BAC Feed
+Pushes BAC snapshots to asyncio subscribers when events arrive or the curve crosses a level
+"""
+import asyncio
+import math
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# BAC levels whose crossings trigger a push: the get_impairment_level bands
+LEVEL_THRESHOLDS = (0.0, 0.02, 0.05, 0.08, 0.15, 0.20, 0.30)
+
+# Displayed BAC is rounded to 4 decimals, so it reaches a level this much early
+HALF_STEP = 0.00005
+
+# Never sleep less than this between pushes (seconds)
+MIN_WAKEUP_SECONDS = 0.1
+
+
+class BACSnapshot(NamedTuple):
+    """State pushed to subscribers"""
+    time: datetime
+    bac: float
+    impairment: Dict
+    peak_bac: float
+    peak_time: datetime
+    legal_limit_time: Optional[datetime]  # When BAC next reaches 0.08 (None if it will not)
+    sober_time: Optional[datetime]        # When BAC next reaches 0 (None if it never does)
+    next_crossing: Optional[datetime]     # When BAC next moves across a level
+    next_level: Optional[float]           # The level crossed then
+
+
+def next_crossing(calculator, now: datetime,
+                  thresholds: Sequence[float] = LEVEL_THRESHOLDS) -> Tuple[Optional[datetime], Optional[float]]:
+    """
+    Return (time, level) of the next moment the displayed BAC crosses one of
+    `thresholds` after `now`, or (None, None) if it never will.
+    """
+    offset = (now - calculator.start_time).total_seconds()
+    curve = calculator.get_bac_curve()
+    bac = round(curve.value(offset), 4)
+    candidates = []
+
+    above = [level for level in thresholds if level > bac]
+    if above:
+        crossing = curve.time_above(offset, above[0] - HALF_STEP)
+        if crossing is not None:
+            candidates.append((crossing, above[0]))
+
+    below = [level for level in thresholds if level <= bac]
+    if below and bac > 0:
+        level = below[-1]
+        target = level - HALF_STEP if level > 0 else HALF_STEP
+        crossing = curve.time_below(offset, target)
+        if not math.isinf(crossing):
+            candidates.append((crossing, level))
+
+    if not candidates:
+        return None, None
+    crossing, level = min(candidates)
+    return calculator.start_time + timedelta(seconds=crossing), level
+
+
+class Subscription:
+    """
+    Async iterator over snapshots for one subscriber. Holds at most
+    `maxsize` unread snapshots; a slow reader loses the oldest ones.
+
+    Nothing here is bound to an event loop outside get(), so a
+    subscription may be created outside the loop that reads it (on
+    Python 3.9 asyncio primitives bind to a loop when constructed).
+    """
+
+    def __init__(self, publisher: 'BACPublisher', maxsize: int = 16):
+        self.publisher = publisher
+        self._items = deque(maxlen=maxsize)
+        self._ready = None  # asyncio.Event of a pending get(), created inside its loop
+
+    def _push(self, item):
+        self._items.append(item)
+        if self._ready is not None:
+            self._ready.set()
+
+    async def get(self) -> Optional[BACSnapshot]:
+        """Next snapshot, or None once the publisher has stopped"""
+        while not self._items:
+            self._ready = asyncio.Event()  # Fresh per wait, so it belongs to the running loop
+            await self._ready.wait()
+        self._ready = None
+        return self._items.popleft()
+
+    def close(self):
+        """Stop receiving snapshots"""
+        self.publisher.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> BACSnapshot:
+        snapshot = await self.get()
+        if snapshot is None:
+            raise StopAsyncIteration
+        return snapshot
+
+
+class BACPublisher:
+    """
+    Recomputes a calculator's BAC only when an event arrives or a level
+    crossing is due, and pushes the snapshot to every subscriber.
+
+    Between events the publisher sleeps until the next crossing found by
+    the analytic solver, so an idle scenario costs one wakeup per level
+    change rather than one per polling tick.
+
+        publisher = BACPublisher(calculator)
+        asyncio.create_task(publisher.run())
+        async for snapshot in publisher.subscribe():
+            ...
+    """
+
+    def __init__(self, calculator, thresholds: Sequence[float] = LEVEL_THRESHOLDS,
+                 max_interval: float = None, clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            calculator: BACCalculator to publish
+            thresholds: BAC levels whose crossings trigger a push
+            max_interval: Also push at least this often (seconds), for
+                          displays that show the live number
+            clock: Source of the current time
+        """
+        self.calculator = calculator
+        self.thresholds = tuple(sorted(thresholds))
+        self.max_interval = max_interval
+        self.clock = clock
+        self.latest = None
+        self._subscribers: List[Subscription] = []
+        self._changed = None  # asyncio.Event, created by run() inside its loop
+        self._running = False
+
+    def subscribe(self, maxsize: int = 16) -> Subscription:
+        """Register a subscriber; it receives the latest snapshot straight away"""
+        subscription = Subscription(self, maxsize)
+        if self.latest is not None:
+            subscription._push(self.latest)
+        self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber"""
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+
+    def notify(self):
+        """Recompute and push now; call after changing the calculator directly"""
+        if self._changed is not None:
+            self._changed.set()  # Before run() there is nothing to wake; it starts with a snapshot
+
+    def add_drink(self, time: datetime, drink_type: str, **kwargs):
+        """Log a drink (see BACCalculator.add_drink) and push the new state"""
+        self.calculator.add_drink(time, drink_type, **kwargs)
+        self.notify()
+
+    def add_food(self, time: datetime, food_type: str):
+        """Log food (see BACCalculator.add_food) and push the new state"""
+        self.calculator.add_food(time, food_type)
+        self.notify()
+
+    def add_events(self, events: Iterable[Dict]):
+        """Log a batch of drink/food events (see BACCalculator.add_events) and push once"""
+        self.calculator.add_events(events)
+        self.notify()
+
+    def snapshot(self, now: datetime = None) -> BACSnapshot:
+        """Compute the current state"""
+        calculator = self.calculator
+        if now is None:
+            now = self.clock()
+
+        bac = calculator.calculate_bac_at_time(now)
+        peak_bac, peak_time = calculator.get_peak_bac(now)
+        legal_limit = calculator.get_time_to_legal_limit(now)
+        sober = calculator.get_time_to_sobriety(from_time=now)
+        crossing, level = next_crossing(calculator, now, self.thresholds)
+
+        return BACSnapshot(
+            now, bac, calculator.get_impairment_level(bac), peak_bac, peak_time,
+            calculator.start_time + legal_limit if legal_limit is not None else None,
+            calculator.start_time + sober if sober is not None else None, crossing, level,
+        )
+
+    def _publish(self, snapshot: Optional[BACSnapshot]):
+        for subscription in list(self._subscribers):
+            subscription._push(snapshot)
+
+    async def run(self):
+        """Publish until stop() is called"""
+        # Created here rather than in __init__: on Python 3.9 an Event binds to
+        # the loop current at construction, which may not be the one running us
+        self._changed = asyncio.Event()
+        self._running = True
+        while self._running:
+            self._changed.clear()
+            self.latest = self.snapshot()
+            self._publish(self.latest)
+
+            timeout = None
+            if self.latest.next_crossing is not None:
+                wait = (self.latest.next_crossing - self.clock()).total_seconds()
+                timeout = max(wait, MIN_WAKEUP_SECONDS)
+            if self.max_interval is not None:
+                timeout = self.max_interval if timeout is None else min(timeout, self.max_interval)
+
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        self._publish(None)
+
+    def stop(self):
+        """End run() and close every subscriber's iteration"""
+        self._running = False
+        if self._changed is not None:
+            self._changed.set()
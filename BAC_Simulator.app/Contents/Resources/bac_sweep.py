@@ -0,0 +1,264 @@
+"""
+Parameter Sweeps and Sensitivity
+Evaluates peak BAC and time to sober over grids of profile, drinking and
+model parameters, and their local finite-difference gradients
+"""
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import bac_batch
+import bac_engine
+from bac_calculator import BACCalculator
+
+np = bac_engine.load_numpy()
+
+# Values for every parameter not being swept
+DEFAULT_POINT = {
+    # Profile
+    'sex': 'male',
+    'weight_lbs': 180,
+    'age': 30,
+    'chronic_drinker': False,
+    # Drinking: `drinks` of `drink_type` spread evenly over `duration_hours`,
+    # unless `schedule` gives the drinks explicitly (bac_batch scenario format)
+    'drinks': 3,
+    'duration_hours': 2.0,
+    'drink_type': 'beer_regular',
+    'schedule': None,
+    # Food eaten `food_minutes` after the start ('empty_stomach' for none)
+    'food_type': 'empty_stomach',
+    'food_minutes': 0.0,
+    # Model constants; None keeps the calculator's own value
+    'widmark_ratio': None,          # Replaces the sex-based ratio
+    'elimination_rate': None,       # BAC per hour, replaces the chronic-adjusted rate
+    'absorption_time_empty': None,
+    'absorption_time_fed': None,
+    'immediate_absorption': None,
+}
+
+# Parameters that only change a person's (widmark_scale, elimination_rate)
+PROFILE_PARAMETERS = ('sex', 'weight_lbs', 'age', 'chronic_drinker', 'widmark_ratio', 'elimination_rate')
+
+# Parameters sensitivity() can differentiate by default
+NUMERIC_PARAMETERS = ('weight_lbs', 'drinks', 'duration_hours', 'food_minutes', 'widmark_ratio',
+                      'elimination_rate', 'absorption_time_empty', 'absorption_time_fed',
+                      'immediate_absorption')
+
+# Sweep start; scenarios are relative to it
+SWEEP_START = datetime(2000, 1, 1)
+
+
+class SweepResult(NamedTuple):
+    """Metric arrays with one axis per swept parameter, in `dims` order"""
+    dims: Tuple[str, ...]
+    coords: Dict[str, list]         # Parameter -> values along its axis
+    peak_bac: 'np.ndarray'          # Highest sampled BAC
+    time_to_peak: 'np.ndarray'      # Hours to the peak sample
+    time_to_sober: 'np.ndarray'     # Hours to the first zero sample after the peak (nan if beyond horizon)
+
+    def sel(self, metric: str, **labels):
+        """Slice a metric by parameter values, e.g. sel('peak_bac', weight_lbs=150)"""
+        index = tuple(self.coords[dim].index(labels[dim]) if dim in labels else slice(None)
+                      for dim in self.dims)
+        return getattr(self, metric)[index]
+
+    def gradient(self, metric: str, dim: str):
+        """d(metric)/d(dim) at every grid point, by finite differences along a numeric axis"""
+        axis = self.dims.index(dim)
+        values = getattr(self, metric)
+        if values.shape[axis] < 2:
+            raise ValueError(f"Need at least two values of {dim} for a gradient")
+        return np.gradient(values, np.asarray(self.coords[dim], dtype=np.float64), axis=axis)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Parameter sweeps require NumPy")
+
+
+def _point(values: Dict) -> Dict:
+    unknown = set(values) - set(DEFAULT_POINT)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    return dict(DEFAULT_POINT, **values)
+
+
+def scenario(point: Dict) -> Dict:
+    """The bac_batch scenario (drinks and food in minutes) a point describes"""
+    if point['schedule'] is not None:
+        drinks = list(point['schedule'])
+    else:
+        count = int(point['drinks'])
+        spacing = point['duration_hours'] * 60 / count if count else 0.0
+        drinks = [{'time': i * spacing, 'type': point['drink_type']} for i in range(count)]
+
+    foods = []
+    if point['food_type'] not in (None, 'empty_stomach'):
+        foods.append({'time': point['food_minutes'], 'type': point['food_type']})
+    return {'drinks': drinks, 'foods': foods, 'start_time': SWEEP_START}
+
+
+def point_calculator(values: Dict, calculator_class=BACCalculator,
+                     profile_parameters: Dict = None) -> BACCalculator:
+    """
+    A calculator set up for one parameter point (unset parameters use DEFAULT_POINT).
+    profile_parameters, if given, replace whatever set_profile applied for the
+    point's profile (see BACCalculator.profile_model_parameters).
+    """
+    point = _point(values)
+    calculator = calculator_class()
+    calculator.set_profile(point['sex'], point['weight_lbs'], point['age'], point['chronic_drinker'])
+    if profile_parameters is not None:
+        calculator.reset_model_parameters()
+        calculator.set_model_parameters(**profile_parameters)
+
+    calculator.set_model_parameters(point['widmark_ratio'], point['elimination_rate'],
+                                     point['absorption_time_empty'], point['absorption_time_fed'],
+                                     point['immediate_absorption'])
+
+    events = scenario(point)
+    calculator.start_time = SWEEP_START
+
+    def at(event):
+        return dict(event, time=SWEEP_START + timedelta(minutes=float(event['time'])))
+
+    calculator.add_foods(at(f) for f in events['foods'])
+    calculator.add_drinks(at(d) for d in events['drinks'])
+    return calculator
+
+
+def _profile_rows(points: List[Dict], calculator_class):
+    """(widmark_scale, elimination_rate, per-row overrides) for the profile points"""
+    columns = {name: [p[name] for p in points] for name in ('sex', 'weight_lbs', 'age', 'chronic_drinker')}
+    overrides = bac_batch.profile_parameters(columns, calculator_class)
+    scale, elimination = bac_batch.profile_arrays(columns, calculator_class, overrides)
+
+    for row, point in enumerate(points):
+        if point['widmark_ratio'] is not None:
+            scale[row] = 5.14 / (point['weight_lbs'] * point['widmark_ratio'])
+        if point['elimination_rate'] is not None:
+            elimination[row] = point['elimination_rate']
+    return scale, elimination, overrides
+
+
+def sweep(grid: Dict[str, Sequence], base: Dict = None, hours: float = 24,
+          step_minutes: float = 5, calculator_class=BACCalculator) -> SweepResult:
+    """
+    Evaluate every combination of the grid values.
+
+    Profile parameters become rows and everything else becomes scenarios
+    of one bac_batch evaluation, so each scenario's absorption is computed
+    once and shared by all profiles.
+
+        result = sweep({'weight_lbs': range(100, 301, 25), 'drinks': range(1, 11)},
+                       base={'duration_hours': 3})
+        result.peak_bac.shape              # (9, 10)
+        result.gradient('peak_bac', 'weight_lbs')
+
+    Args:
+        grid: Parameter name -> values to try (names as in DEFAULT_POINT)
+        base: Fixed values for parameters outside the grid
+        hours: Horizon from the start of drinking
+        step_minutes: Sample spacing; sets the resolution of the metrics
+        calculator_class: Calculator supplying the model constants
+
+    Returns:
+        SweepResult with axes in grid order
+    """
+    _require_numpy()
+    base = _point(base or {})
+    _point(grid)
+    dims = tuple(grid)
+    coords = {dim: list(grid[dim]) for dim in dims}
+    profile_dims = [dim for dim in dims if dim in PROFILE_PARAMETERS]
+    scenario_dims = [dim for dim in dims if dim not in PROFILE_PARAMETERS]
+
+    def points(names):
+        return [dict(base, **dict(zip(names, values)))
+                for values in itertools.product(*(coords[name] for name in names))]
+
+    profile_points = points(profile_dims)
+    scenario_points = points(scenario_dims)
+
+    offsets = bac_engine.time_grid(hours, step_minutes)
+    scale, elimination, overrides = _profile_rows(profile_points, calculator_class)
+    groups, group_index = bac_batch.absorption_groups(overrides, len(profile_points))
+    kernel_sets = []
+    for parameters in groups:
+        kernels = np.zeros((len(scenario_points), len(offsets)), dtype=np.float64)
+        for i, point in enumerate(scenario_points):
+            calculator = point_calculator(point, calculator_class,
+                                          parameters if overrides else None)
+            kernels[i] = bac_engine.absorbed_alcohol(offsets, *calculator.get_drink_constants(),
+                                                     calculator.IMMEDIATE_ABSORPTION)
+        kernel_sets.append(kernels)
+
+    result = bac_batch.evaluate_groups(scale, elimination, group_index, kernel_sets, offsets,
+                                       curves=False)
+
+    # [profile combination, scenario combination] -> one axis per parameter, in grid order
+    shape = [len(coords[dim]) for dim in profile_dims + scenario_dims]
+    order = [(profile_dims + scenario_dims).index(dim) for dim in dims]
+
+    def labelled(matrix):
+        return matrix.reshape(shape).transpose(order)
+
+    return SweepResult(dims, coords, labelled(result.peak_bac), labelled(result.time_to_peak),
+                       labelled(result.time_to_sober))
+
+
+def _metrics(calculator) -> Tuple[float, float]:
+    """Unrounded (peak BAC, hours from start to sober) from the analytic curve (inf if never sober)"""
+    curve = calculator.get_bac_curve()
+    peak_bac, peak_offset = curve.peak(0.0)
+    return peak_bac, curve.time_below(peak_offset) / 3600
+
+
+def _center(point: Dict, name: str, calculator_class) -> float:
+    """Numeric value of a parameter at a point, resolving None to the model default"""
+    value = point[name]
+    if value is not None:
+        return float(value)
+    # Only model constants default to None; the calculator resolves them,
+    # including any per-profile fit
+    return float(point_calculator(point, calculator_class).get_model_parameters()[name])
+
+
+def sensitivity(point: Dict = None, parameters: Sequence[str] = NUMERIC_PARAMETERS,
+                relative_step: float = 0.01,
+                calculator_class=BACCalculator) -> Dict[str, Dict[str, float]]:
+    """
+    Local gradients of peak BAC and time to sober (hours) at one point.
+
+    Uses central differences on the exact analytic curve, with a step of
+    relative_step x the parameter value (one drink for `drinks`). Falls back
+    to a forward difference where the backward step would go negative.
+
+    Returns:
+        {parameter: {'peak_bac': d peak / d parameter,
+                     'time_to_sober': d hours / d parameter}}
+    """
+    point = _point(point or {})
+    gradients = {}
+
+    for name in parameters:
+        if name not in NUMERIC_PARAMETERS:
+            raise ValueError(f"{name} is not a numeric parameter")
+        center = _center(point, name, calculator_class)
+        if name == 'drinks':
+            step = 1.0
+        else:
+            step = relative_step * abs(center) or relative_step
+
+        low = center - step if center - step >= (1 if name == 'drinks' else 0) else center
+        high = center + step
+        low_metrics = _metrics(point_calculator(dict(point, **{name: low}), calculator_class))
+        high_metrics = _metrics(point_calculator(dict(point, **{name: high}), calculator_class))
+
+        gradients[name] = {
+            metric: (high_value - low_value) / (high - low)
+            for metric, high_value, low_value in zip(('peak_bac', 'time_to_sober'),
+                                                      high_metrics, low_metrics)
+        }
+    return gradients
@@ -4,7 +4,135 @@ Conversational interface for collecting drinking/eating data
 """
 import re
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, Optional, List
+from typing import Dict, Iterable, Iterator, Tuple, Optional, List, Union
+
+# Term tables, in priority order: the first key with any term in the text wins
+DRINK_TERMS = {
+    'beer_light': ['light beer', 'lite beer', 'bud light', 'corona light'],
+    'beer_regular': ['beer', 'regular beer', 'domestic beer', 'pbr'],
+    'beer_ipa': ['ipa', 'ipa beer'],
+    'beer_stout': ['stout', 'guinness'],
+    'wine_light': ['white wine', 'wine'],
+    'wine_red': ['red wine'],
+    'spirits': ['whiskey', 'vodka', 'rum', 'gin', 'tequila', 'liquor', 'shot'],
+    'mixed_drink': ['cocktail', 'mixed drink', 'margarita', 'cosmopolitan', 'martini'],
+}
+
+FOOD_TERMS = {
+    'empty_stomach': ['empty stomach', "haven't eaten", "didn't eat", 'no food', 'nothing'],
+    'water': ['water', 'juice', 'soda', 'clear liquid'],
+    'light_snack': ['snack', 'crackers', 'toast', 'chips', 'nuts', 'candy'],
+    'light_meal': ['soup', 'salad', 'sandwich', 'light meal'],
+    'moderate_meal': ['meal', 'dinner', 'lunch', 'breakfast'],
+    'full_meal': ['full meal', 'big meal', 'large meal'],
+    'high_fat_meal': ['pizza', 'burger', 'fries', 'fatty', 'greasy', 'fast food', 'high-fat'],
+}
+
+# Words that make a scenario message count as a drink or food report
+DRINK_MENTIONS = ['beer', 'wine', 'shot', 'cocktail', 'drink', 'alcohol', 'had', 'drank']
+FOOD_MENTIONS = ['ate', 'eaten', 'food', 'meal', 'lunch', 'dinner', 'breakfast', 'pizza', 'burger', 'salad']
+
+# Food words that fall back to a light meal when no food type matched
+FOOD_FALLBACK = ['ate', 'eaten', 'had', 'food']
+
+WEIGHT_LBS_RE = re.compile(r'(\d+)\s*(?:lbs?|pounds?)', re.IGNORECASE)
+WEIGHT_PHRASE_RE = re.compile(r'(?:weigh|weight)\s+(?:about\s+)?(\d+)', re.IGNORECASE)
+WEIGHT_KG_RE = re.compile(r'(\d+)\s*(?:kg|kilos?)', re.IGNORECASE)
+
+HEIGHT_PATTERNS = [
+    (re.compile(r"(\d+)\s*'\s*(\d+)?", re.IGNORECASE), 'feet'),           # 6'2" format
+    (re.compile(r"(\d+)\s+(?:feet|ft)(?:\s+(\d+)\s+(?:in|inches?))?", re.IGNORECASE), 'feet'),
+    (re.compile(r"(\d+)\s+(?:inches?|in)(?!\s*ago)", re.IGNORECASE), 'inches'),
+    (re.compile(r"(\d+)\s*cm", re.IGNORECASE), 'cm'),
+]
+
+AGE_PATTERNS = [
+    re.compile(r"(?:i'm\s+|i am\s+)?(\d+)\s+(?:years?\s+)?old", re.IGNORECASE),
+    re.compile(r"age\s+(?:is\s+)?(\d+)", re.IGNORECASE),
+    re.compile(r"^(\d+)$", re.IGNORECASE),  # Just a number
+]
+
+HOURS_AGO_RE = re.compile(r'(\d+)\s+(?:hours?|hrs?)\s+ago', re.IGNORECASE)
+MINUTES_AGO_RE = re.compile(r'(\d+)\s+(?:minutes?|mins?)\s+ago', re.IGNORECASE)
+CLOCK_TIME_RE = re.compile(r'(\d{1,2}):?(\d{2})?\s*(?:am|pm)?|(\d{1,2})\s*(?:am|pm)', re.IGNORECASE)
+
+QUANTITY_RE = re.compile(r'(\d+)\s+(?:beers?|glasses?|shots?|drinks?)', re.IGNORECASE)
+PERCENT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+
+
+class TermScanner:
+    """
+    Finds which keys of several prioritized term tables occur in a text,
+    using one regex pass instead of a substring test per term.
+
+    All terms share one prefix-tree regex inside a lookahead, so the scan
+    reports the longest term starting at every position, overlaps included. Any
+    shorter term found at the same position is a prefix of that one, so
+    each term carries the best-ranked key among its prefixes and the result
+    matches testing every term with `in`.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        """
+        Args:
+            tables: Category name -> {key: [terms]}, keys in priority order
+        """
+        self.tables = tables
+        ranked = {}  # term -> {category: (rank, key)}
+        for category, table in tables.items():
+            for rank, (key, terms) in enumerate(table.items()):
+                for term in terms:
+                    best = ranked.setdefault(term, {}).get(category)
+                    if best is None or rank < best[0]:
+                        ranked[term][category] = (rank, key)
+
+        self.entries = {}
+        for term in ranked:
+            hits = {}
+            for other, categories in ranked.items():
+                if not term.startswith(other):
+                    continue
+                for category, (rank, key) in categories.items():
+                    if category not in hits or rank < hits[category][0]:
+                        hits[category] = (rank, key)
+            self.entries[term] = [(category, rank, key) for category, (rank, key) in hits.items()]
+
+        trie = {}
+        for term in ranked:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self.pattern = re.compile(f'(?=({_trie_regex(trie)}))')
+
+    def scan(self, text_lower: str) -> Dict[str, str]:
+        """Return category -> highest-priority key with a term in the (lowercased) text"""
+        found = {}
+        for term in set(self.pattern.findall(text_lower)):
+            for category, rank, key in self.entries[term]:
+                best = found.get(category)
+                if best is None or rank < best[0]:
+                    found[category] = (rank, key)
+        return {category: key for category, (_, key) in found.items()}
+
+
+def _trie_regex(node: Dict) -> str:
+    """Regex for a character trie; optional tails are greedy, so longer terms win"""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+TERMS = TermScanner({
+    'drink': DRINK_TERMS,
+    'food': FOOD_TERMS,
+    'drink_mention': {True: DRINK_MENTIONS},
+    'food_mention': {True: FOOD_MENTIONS},
+    'food_fallback': {'light_meal': FOOD_FALLBACK},
+})
+
 
 class BACChatbot:
     """Intelligent conversational bot for building BAC scenarios"""
@@ -56,32 +184,19 @@ class BACChatbot:
 
     def parse_weight(self, text: str) -> Optional[float]:
         """Extract weight from natural language"""
-        patterns = [
-            r'(\d+)\s*(?:lbs?|pounds?)',
-            r'(?:weigh|weight)\s+(?:about\s+)?(\d+)',
-            r'(\d+)\s*(?:kg|kilos?)',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in (WEIGHT_LBS_RE, WEIGHT_PHRASE_RE, WEIGHT_KG_RE):
+            match = pattern.search(text)
             if match:
                 weight = float(match.group(1))
-                if 'kg' in pattern or 'kilo' in text.lower():
+                if pattern is WEIGHT_KG_RE or 'kilo' in text.lower():
                     weight *= 2.205  # Convert kg to lbs
                 return weight
         return None
 
     def parse_height(self, text: str) -> Optional[float]:
         """Extract height in inches from natural language"""
-        patterns = [
-            (r"(\d+)\s*'\s*(\d+)?", 'feet'),           # 6'2" format
-            (r"(\d+)\s+(?:feet|ft)(?:\s+(\d+)\s+(?:in|inches?))?", 'feet'),
-            (r"(\d+)\s+(?:inches?|in)(?!\s*ago)", 'inches'),
-            (r"(\d+)\s*cm", 'cm'),
-        ]
-
-        for pattern, unit in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, unit in HEIGHT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 if unit == 'feet':
                     feet = int(match.group(1))
@@ -104,47 +219,45 @@ class BACChatbot:
 
     def parse_age(self, text: str) -> Optional[int]:
         """Extract age from natural language"""
-        patterns = [
-            r"(?:i'm\s+|i am\s+)?(\d+)\s+(?:years?\s+)?old",
-            r"age\s+(?:is\s+)?(\d+)",
-            r"^(\d+)$",  # Just a number
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in AGE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 age = int(match.group(1))
                 if 18 <= age <= 120:  # Sanity check
                     return age
         return None
 
-    def parse_time_phrase(self, text: str) -> Optional[datetime]:
-        """Parse time references like 'now', '7pm', '2 hours ago', etc."""
+    def parse_time_phrase(self, text: str, now: datetime = None) -> Optional[datetime]:
+        """
+        Parse time references like 'now', '7pm', '2 hours ago', etc.
+        Relative times are resolved against `now` (default: the current time).
+        """
         text_lower = text.lower()
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
 
         # Handle "now" or "just now"
-        if any(word in text_lower for word in ['now', 'just now', 'right now']):
+        if 'now' in text_lower:
             return now
 
         # Handle relative times like "X hours ago", "X minutes ago"
-        ago_match = re.search(r'(\d+)\s+(?:hours?|hrs?)\s+ago', text, re.IGNORECASE)
+        ago_match = HOURS_AGO_RE.search(text)
         if ago_match:
             hours = int(ago_match.group(1))
             return now - timedelta(hours=hours)
 
-        ago_match = re.search(r'(\d+)\s+(?:minutes?|mins?)\s+ago', text, re.IGNORECASE)
+        ago_match = MINUTES_AGO_RE.search(text)
         if ago_match:
             minutes = int(ago_match.group(1))
             return now - timedelta(minutes=minutes)
 
         # Handle time like "7pm", "7:30pm", "19:30"
-        time_match = re.search(r'(\d{1,2}):?(\d{2})?\s*(?:am|pm)?|(\d{1,2})\s*(?:am|pm)', text, re.IGNORECASE)
+        time_match = CLOCK_TIME_RE.search(text)
         if time_match:
             try:
                 if time_match.group(3):  # Format: "7pm"
                     hour = int(time_match.group(3))
-                    is_pm = 'pm' in text.lower()
+                    is_pm = 'pm' in text_lower
                     if is_pm and hour < 12:
                         hour += 12
                     minute = 0
@@ -169,67 +282,51 @@ class BACChatbot:
         Parse drink information from natural language.
         Returns (drink_type, quantity, alcohol_percent)
         """
-        text_lower = text.lower()
-
-        # Check for common drink types
-        drink_types = {
-            'beer_light': ['light beer', 'lite beer', 'bud light', 'corona light'],
-            'beer_regular': ['beer', 'regular beer', 'domestic beer', 'pbr'],
-            'beer_ipa': ['ipa', 'ipa beer'],
-            'beer_stout': ['stout', 'guinness'],
-            'wine_light': ['white wine', 'wine'],
-            'wine_red': ['red wine'],
-            'spirits': ['whiskey', 'vodka', 'rum', 'gin', 'tequila', 'liquor', 'shot'],
-            'mixed_drink': ['cocktail', 'mixed drink', 'margarita', 'cosmopolitan', 'martini'],
-        }
-
-        detected_type = None
-        for drink_key, terms in drink_types.items():
-            for term in terms:
-                if term in text_lower:
-                    detected_type = drink_key
-                    break
-            if detected_type:
-                break
+        detected_type = TERMS.scan(text.lower()).get('drink')
+        quantity, alcohol_percent = self._parse_amounts(text)
+        return detected_type, quantity, alcohol_percent
 
-        # Extract quantity
+    def _parse_amounts(self, text: str) -> Tuple[int, Optional[float]]:
+        """Extract the drink quantity (default 1) and alcohol percent if specified"""
         quantity = 1
-        qty_match = re.search(r'(\d+)\s+(?:beers?|glasses?|shots?|drinks?)', text, re.IGNORECASE)
+        qty_match = QUANTITY_RE.search(text)
         if qty_match:
             quantity = int(qty_match.group(1))
 
-        # Extract alcohol percent if specified
         alcohol_percent = None
-        alc_match = re.search(r'(\d+(?:\.\d+)?)\s*%', text)
+        alc_match = PERCENT_RE.search(text)
         if alc_match:
             alcohol_percent = float(alc_match.group(1))
 
-        return detected_type, quantity, alcohol_percent
+        return quantity, alcohol_percent
 
     def parse_food(self, text: str) -> Optional[str]:
         """Parse food type from natural language"""
-        text_lower = text.lower()
-
-        food_types = {
-            'empty_stomach': ['empty stomach', "haven't eaten", "didn't eat", 'no food', 'nothing'],
-            'water': ['water', 'juice', 'soda', 'clear liquid'],
-            'light_snack': ['snack', 'crackers', 'toast', 'chips', 'nuts', 'candy'],
-            'light_meal': ['soup', 'salad', 'sandwich', 'light meal'],
-            'moderate_meal': ['meal', 'dinner', 'lunch', 'breakfast'],
-            'full_meal': ['full meal', 'big meal', 'large meal'],
-            'high_fat_meal': ['pizza', 'burger', 'fries', 'fatty', 'greasy', 'fast food', 'high-fat'],
-        }
-
-        for food_key, terms in food_types.items():
-            for term in terms:
-                if term in text_lower:
-                    return food_key
-
+        terms = TERMS.scan(text.lower())
         # If mentions "ate" but we didn't match, default to light meal
-        if any(word in text_lower for word in ['ate', 'eaten', 'had', 'food']):
-            return 'light_meal'
+        return terms.get('food') or terms.get('food_fallback')
 
-        return None
+    def extract_entities(self, text: str, now: datetime = None) -> Dict:
+        """
+        Pull every scenario entity out of a message with a single term scan.
+        Times are resolved against `now` (default: the current time).
+
+        Returns:
+            {'drink_type', 'quantity', 'alcohol_percent', 'food_type', 'time',
+             'mentions_drink', 'mentions_food'} - the same values parse_drink,
+            parse_food and parse_time_phrase give for the message
+        """
+        terms = TERMS.scan(text.lower())
+        quantity, alcohol_percent = self._parse_amounts(text)
+        return {
+            'drink_type': terms.get('drink'),
+            'quantity': quantity,
+            'alcohol_percent': alcohol_percent,
+            'food_type': terms.get('food') or terms.get('food_fallback'),
+            'time': self.parse_time_phrase(text, now),
+            'mentions_drink': 'drink_mention' in terms,
+            'mentions_food': 'food_mention' in terms,
+        }
 
     def parse_chronic_drinker(self, text: str) -> Optional[bool]:
         """Determine if user is chronic drinker - FIXED TO INCLUDE YES/NO"""
@@ -314,50 +411,54 @@ class BACChatbot:
 
         return response
 
-    def process_scenario_update(self, user_message: str) -> str:
-        """Process updates to drinking/food scenario and extract data"""
-        text_lower = user_message.lower()
-        
+    def scenario_events(self, entities: Dict, now: datetime = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Turn extract_entities() output into (drink_event, food_event), either
+        of which is None when the message does not report one. Events without
+        a time of their own happen at `now` (default: the current time).
+        """
+        drink = food = None
+        if entities['mentions_drink'] and entities['drink_type']:
+            drink = {
+                'type': entities['drink_type'],
+                'quantity': entities['quantity'] or 1,
+                'alcohol_percent': entities['alcohol_percent'],
+                'time': entities['time'] or now or datetime.now(),
+            }
+        if entities['mentions_food'] and entities['food_type']:
+            food = {
+                'type': entities['food_type'],
+                'time': entities['time'] or now or datetime.now(),
+            }
+        return drink, food
+
+    def process_scenario_update(self, user_message: str, now: datetime = None) -> str:
+        """
+        Process updates to drinking/food scenario and extract data.
+        Times are resolved against `now` (default: the current time).
+        """
+        entities = self.extract_entities(user_message, now)
+        drink, food = self.scenario_events(entities, now)
+
         self.pending_drinks = []  # Reset pending drinks for this message
         self.pending_foods = []   # Reset pending foods for this message
 
         # Check for drink mentions
-        if any(word in text_lower for word in ['beer', 'wine', 'shot', 'cocktail', 'drink', 'alcohol', 'had', 'drank']):
-            drink_type, quantity, alc_percent = self.parse_drink(user_message)
-            if drink_type:
-                # Extract time from message
-                drink_time = self.parse_time_phrase(user_message)
-                if not drink_time:
-                    # If no time specified, use current time
-                    drink_time = datetime.now()
-                
+        if entities['mentions_drink']:
+            if drink:
                 # Store pending drink data for GUI to process
-                self.pending_drinks.append({
-                    'type': drink_type,
-                    'quantity': quantity or 1,
-                    'alcohol_percent': alc_percent,
-                    'time': drink_time
-                })
+                self.pending_drinks.append(drink)
                 
-                response = f"Got it! I recorded {quantity or 1} {drink_type.replace('_', ' ')}(s) at {drink_time.strftime('%I:%M %p')}. "
+                response = f"Got it! I recorded {drink['quantity']} {drink['type'].replace('_', ' ')}(s) at {drink['time'].strftime('%I:%M %p')}. "
             else:
                 response = "I didn't catch the drink type. Try 'beer', 'wine', 'shot', or 'cocktail'. "
 
         # Check for food mentions
-        if any(word in text_lower for word in ['ate', 'eaten', 'food', 'meal', 'lunch', 'dinner', 'breakfast', 'pizza', 'burger', 'salad']):
-            food_type = self.parse_food(user_message)
-            if food_type:
-                # Extract time from message
-                food_time = self.parse_time_phrase(user_message)
-                if not food_time:
-                    food_time = datetime.now()
-                
-                self.pending_foods.append({
-                    'type': food_type,
-                    'time': food_time
-                })
+        if entities['mentions_food']:
+            if food:
+                self.pending_foods.append(food)
                 
-                response = f"Noted - you had {food_type.replace('_', ' ')} at {food_time.strftime('%I:%M %p')}. This affects absorption significantly. "
+                response = f"Noted - you had {food['type'].replace('_', ' ')} at {food['time'].strftime('%I:%M %p')}. This affects absorption significantly. "
             else:
                 response = "I didn't catch the food type clearly. "
         
@@ -368,6 +469,40 @@ class BACChatbot:
         
         return response
 
+    def ingest_transcript(self, messages: Iterable[Tuple[Union[datetime, str, None], str]],
+                          now: datetime = None) -> Iterator[Dict]:
+        """
+        Stream drink and food events out of a chat log, in message order.
+
+        Each message is parsed against its own timestamp, so "2 hours ago"
+        means two hours before the message was sent and replaying a log
+        always gives the same events. Nothing is stored on the chatbot;
+        the events can go straight to BACCalculator.add_events().
+
+        Args:
+            messages: (timestamp, text) pairs; timestamps are datetimes or
+                      ISO 8601 strings, or None to use `now`
+            now: Reference clock for messages without a timestamp
+
+        Yields:
+            Drink events {'kind': 'drink', 'type', 'quantity', 'alcohol_percent', 'time'}
+            and food events {'kind': 'food', 'type', 'time'}
+        """
+        for timestamp, text in messages:
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            clock = timestamp or now
+            if clock is None:
+                raise ValueError(f"Message has no timestamp and no reference clock: {text!r}")
+
+            drink, food = self.scenario_events(self.extract_entities(text, clock), clock)
+            if drink:
+                drink['kind'] = 'drink'
+                yield drink
+            if food:
+                food['kind'] = 'food'
+                yield food
+
     def get_pending_drinks(self) -> List[Dict]:
         """Get drinks to be added to calculator"""
         drinks = self.pending_drinks.copy()
@@ -0,0 +1,137 @@
+"""
+Columnar Event Store for Drink and Food Timelines
+Compact parallel arrays with sorted insertion and dict-like row views
+"""
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Sequence
+
+# Event times are stored as float seconds since this naive epoch
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(time: datetime) -> float:
+    """Convert a naive datetime to store seconds"""
+    return (time - EPOCH).total_seconds()
+
+
+def to_datetime(seconds: float) -> datetime:
+    """Convert store seconds back to a naive datetime"""
+    return EPOCH + timedelta(seconds=seconds)
+
+
+class EventStore:
+    """
+    Time-sorted events held as parallel arrays: float64 times, interned
+    uint16 type codes and one float64 array per extra field.
+
+    Indexing or iterating yields plain dicts shaped like the original
+    timeline entries ({'time': datetime, 'type': str, <fields>...}), so code
+    written against the old lists of dicts keeps working. Views are built on
+    demand; editing one does not change the store.
+
+    Derived columns are kept in the same order as the events but are left
+    out of the views; their owner fills them in after inserting.
+    """
+
+    def __init__(self, fields: Sequence[str] = (), derived: Sequence[str] = ()):
+        self.fields = tuple(fields)
+        self.derived = tuple(derived)
+        self.times = array('d')
+        self.codes = array('H')
+        self.columns = {name: array('d') for name in self.fields + self.derived}
+        self.type_names = []   # Interned type names, indexed by code
+        self._type_codes = {}  # Type name -> code
+
+    def intern(self, type_name: str) -> int:
+        """Return the code for a type name, assigning one on first use"""
+        code = self._type_codes.get(type_name)
+        if code is None:
+            code = len(self.type_names)
+            self.type_names.append(type_name)
+            self._type_codes[type_name] = code
+        return code
+
+    def insert(self, time: datetime, type_name: str, **values) -> int:
+        """Insert one event at its sorted position (after equal times); returns its index"""
+        seconds = to_seconds(time)
+        index = bisect_right(self.times, seconds)
+        self.times.insert(index, seconds)
+        self.codes.insert(index, self.intern(type_name))
+        for name in self.fields + self.derived:
+            self.columns[name].insert(index, float(values.get(name, 0.0)))
+        return index
+
+    def extend(self, events: Iterable[Dict]):
+        """
+        Bulk-append events given as dicts with 'time', 'type' and field values.
+        Appends in place when the batch continues the time order; otherwise
+        sorts once (stably, so equal times keep insertion order).
+        """
+        start = len(self.times)
+        for event in events:
+            self.times.append(to_seconds(event['time']))
+            self.codes.append(self.intern(event['type']))
+            for name in self.fields + self.derived:
+                self.columns[name].append(float(event.get(name, 0.0)))
+
+        times = self.times
+        if all(times[i - 1] <= times[i] for i in range(max(start, 1), len(times))):
+            return
+
+        order = sorted(range(len(times)), key=times.__getitem__)
+        self.times = array('d', (times[i] for i in order))
+        self.codes = array('H', (self.codes[i] for i in order))
+        for name in self.fields + self.derived:
+            column = self.columns[name]
+            self.columns[name] = array('d', (column[i] for i in order))
+
+    def copy(self) -> 'EventStore':
+        """Independent copy of the events, derived columns and type table"""
+        other = EventStore.__new__(EventStore)
+        other.fields = self.fields
+        other.derived = self.derived
+        other.times = array('d', self.times)
+        other.codes = array('H', self.codes)
+        other.columns = {name: array('d', column) for name, column in self.columns.items()}
+        other.type_names = list(self.type_names)
+        other._type_codes = dict(self._type_codes)
+        return other
+
+    def clear(self):
+        """Remove every event (interned type codes are kept)"""
+        self.times = array('d')
+        self.codes = array('H')
+        self.columns = {name: array('d') for name in self.fields + self.derived}
+
+    def type_of(self, index: int) -> str:
+        """Type name of the event at index"""
+        return self.type_names[self.codes[index]]
+
+    def time_of(self, index: int) -> datetime:
+        """Time of the event at index"""
+        return to_datetime(self.times[index])
+
+    def nbytes(self) -> int:
+        """Memory held by the column buffers"""
+        arrays = [self.times, self.codes] + list(self.columns.values())
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += len(self.times)
+        if not 0 <= index < len(self.times):
+            raise IndexError('event index out of range')
+
+        row = {'time': self.time_of(index), 'type': self.type_of(index)}
+        for name in self.fields:
+            row[name] = self.columns[name][index]
+        return row
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self.times)):
+            yield self[index]
@@ -6,9 +6,15 @@ import tkinter as tk
 from tkinter import scrolledtext, messagebox, ttk
 from datetime import datetime, timedelta
 import math
-import subprocess
 import os
 
+import log_view
+import sim_worker
+import timeline_render
+
+# How often the Tk thread checks for worker results (ms)
+WORKER_POLL_MS = 30
+
 class BACSimulatorGUI:
     def __init__(self, root, calculator, chatbot):
         self.root = root
@@ -55,6 +61,12 @@ class BACSimulatorGUI:
         self.profile_complete = False
         self.consumption_items = []  # Track drinks and food
 
+        # Calculator queries run on a background thread
+        self.worker = sim_worker.SimulationWorker(hours=6)
+        self.timeline = None        # Latest timeline from the worker
+        self.shown_request = 0
+        self._polling = False
+
         self.setup_ui()
         self.update_display()
 
@@ -311,22 +323,12 @@ class BACSimulatorGUI:
 
         self.log_canvas = tk.Canvas(list_frame, bg=self.colors['card_bg'],
                                    highlightthickness=0, height=200)
-        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.log_canvas.yview)
-        self.log_inner = tk.Frame(self.log_canvas, bg=self.colors['card_bg'])
+        self.consumption_log = log_view.VirtualLog(self.log_canvas, self.colors, self.fonts)
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.consumption_log.yview)
 
         self.log_canvas.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.log_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.log_canvas.create_window((0, 0), window=self.log_inner, anchor='nw')
-
-        self.log_inner.bind("<Configure>", lambda e: self.log_canvas.configure(
-            scrollregion=self.log_canvas.bbox("all")))
-
-        # Empty state message
-        self.empty_log_label = tk.Label(self.log_inner, text="No items logged yet\nAdd drinks or food using the chat",
-                                        font=self.fonts['body_small'], bg=self.colors['card_bg'],
-                                        fg=self.colors['neutral'], justify='center')
-        self.empty_log_label.pack(pady=40)
 
     def create_bac_display(self, parent):
         """Create BAC display card"""
@@ -408,6 +410,7 @@ class BACSimulatorGUI:
         self.canvas = tk.Canvas(card, bg=self.colors['white'], height=220,
                                highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=16, pady=(8, 16))
+        self.chart = timeline_render.TkChart(self.canvas)
         self.canvas.bind("<Configure>", lambda e: self.draw_timeline())
 
         # Legend
@@ -635,60 +638,14 @@ class BACSimulatorGUI:
         self.chat_display.tag_config('user', foreground=self.colors['accent'])
 
     def update_consumption_log(self):
-        """Update consumption log display"""
-        # Clear existing items
-        for widget in self.log_inner.winfo_children():
-            widget.destroy()
-
+        """Update consumption log display (only new items are added)"""
         drinks = self.calculator.drinks_timeline
         foods = self.calculator.food_timeline
 
         self.log_count_label.config(
             text=f"{len(drinks)} drink{'s' if len(drinks) != 1 else ''}, {len(foods)} food item{'s' if len(foods) != 1 else ''}"
         )
-
-        if not drinks and not foods:
-            self.empty_log_label = tk.Label(self.log_inner,
-                text="No items logged yet\nAdd drinks or food using the chat",
-                font=self.fonts['body_small'], bg=self.colors['card_bg'],
-                fg=self.colors['neutral'], justify='center')
-            self.empty_log_label.pack(pady=40)
-            return
-
-        # Combine and sort by time
-        all_items = []
-        for d in drinks:
-            all_items.append(('drink', d))
-        for f in foods:
-            all_items.append(('food', f))
-        all_items.sort(key=lambda x: x[1]['time'], reverse=True)
-
-        for item_type, item in all_items:
-            item_frame = tk.Frame(self.log_inner, bg=self.colors['neutral_bg'])
-            item_frame.pack(fill=tk.X, pady=2)
-
-            if item_type == 'drink':
-                emoji = "🍺" if 'beer' in item['type'] else "🍷" if 'wine' in item['type'] else "🥃"
-                name = item['type'].replace('_', ' ').title()
-                detail = f"{item['size_oz']}oz · {item['alcohol_percent']}%"
-            else:
-                emoji = "🍔"
-                name = item['type'].replace('_', ' ').title()
-                detail = ""
-
-            tk.Label(item_frame, text=emoji, font=('Helvetica', 16),
-                    bg=self.colors['neutral_bg']).pack(side=tk.LEFT, padx=8)
-
-            info_frame = tk.Frame(item_frame, bg=self.colors['neutral_bg'])
-            info_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-            tk.Label(info_frame, text=name, font=self.fonts['body_small'],
-                    bg=self.colors['neutral_bg'], fg=self.colors['slate']).pack(anchor='w')
-
-            time_str = item['time'].strftime('%I:%M %p')
-            sub_text = f"{time_str}" + (f" · {detail}" if detail else "")
-            tk.Label(info_frame, text=sub_text, font=self.fonts['caption'],
-                    bg=self.colors['neutral_bg'], fg=self.colors['neutral']).pack(anchor='w')
+        self.consumption_log.update(self.calculator)
 
     def get_bac_color(self, bac):
         """Get color for BAC level"""
@@ -704,53 +661,73 @@ class BACSimulatorGUI:
             return self.colors['bac_critical']
 
     def update_display(self):
-        """Update all displays"""
+        """Update all displays (the numbers arrive from the worker)"""
+        if self.profile_complete:
+            self.worker.submit(self.calculator)
+            if not self._polling:
+                self._polling = True
+                self.root.after(WORKER_POLL_MS, self._poll_worker)
+
+        self.root.after(2000, self.update_display)
+
+    def _poll_worker(self):
+        """Show finished worker results; keep polling while it is busy"""
+        for result in self.worker.results():
+            if result.request_id > self.shown_request and result.error is None:
+                self.shown_request = result.request_id
+                self.show_result(result)
+
+        if self.worker.busy:
+            self.root.after(WORKER_POLL_MS, self._poll_worker)
+        else:
+            self._polling = False
+
+    def show_result(self, result):
+        """Display one SimulationResult"""
         try:
-            if self.profile_complete:
-                current_bac = self.calculator.calculate_bac_at_time()
-                impairment = self.calculator.get_impairment_level(current_bac)
-                peak_bac, peak_time = self.calculator.get_peak_bac()
-                time_to_sober = self.calculator.get_time_to_sobriety()
-
-                bac_color = self.get_bac_color(current_bac)
-
-                # Update BAC card background
-                self.bac_card.config(bg=bac_color)
-                for widget in self.bac_card.winfo_children():
-                    self._update_bg_recursive(widget, bac_color)
-
-                # Update BAC label
-                self.bac_label.config(text=f"{current_bac:.3f}", bg=bac_color)
-
-                # Update status
-                self.status_badge.config(text=f"  {impairment['level']}  ")
-                self.status_desc.config(text=impairment['description'][:50] + "..."
-                                       if len(impairment['description']) > 50
-                                       else impairment['description'])
-
-                # Update drive status
-                if impairment['fitness_to_drive'] == 'YES':
-                    self.drive_label.config(text="✓ Safe to Drive")
-                elif impairment['fitness_to_drive'] == 'CAUTION':
-                    self.drive_label.config(text="⚠ Caution Advised")
-                else:
-                    self.drive_label.config(text="✗ Do NOT Drive")
-
-                self.legal_label.config(text=f"Legal Status: {impairment['legal_status']}")
-
-                # Update peak and sober time
-                self.peak_label.config(text=f"{peak_bac:.3f}")
-                if time_to_sober:
-                    hours = int(time_to_sober.total_seconds() // 3600)
-                    mins = int((time_to_sober.total_seconds() % 3600) // 60)
-                    self.sober_label.config(text=f"{hours}h {mins}m")
-
-                self.draw_timeline()
+            current_bac = result.bac
+            impairment = result.impairment
+            peak_bac = result.peak_bac
+            time_to_sober = result.time_to_sober
+
+            bac_color = self.get_bac_color(current_bac)
+
+            # Update BAC card background
+            self.bac_card.config(bg=bac_color)
+            for widget in self.bac_card.winfo_children():
+                self._update_bg_recursive(widget, bac_color)
+
+            # Update BAC label
+            self.bac_label.config(text=f"{current_bac:.3f}", bg=bac_color)
+
+            # Update status
+            self.status_badge.config(text=f"  {impairment['level']}  ")
+            self.status_desc.config(text=impairment['description'][:50] + "..."
+                                   if len(impairment['description']) > 50
+                                   else impairment['description'])
+
+            # Update drive status
+            if impairment['fitness_to_drive'] == 'YES':
+                self.drive_label.config(text="✓ Safe to Drive")
+            elif impairment['fitness_to_drive'] == 'CAUTION':
+                self.drive_label.config(text="⚠ Caution Advised")
+            else:
+                self.drive_label.config(text="✗ Do NOT Drive")
+
+            self.legal_label.config(text=f"Legal Status: {impairment['legal_status']}")
+
+            # Update peak and sober time
+            self.peak_label.config(text=f"{peak_bac:.3f}")
+            if time_to_sober:
+                hours = int(time_to_sober.total_seconds() // 3600)
+                mins = int((time_to_sober.total_seconds() % 3600) // 60)
+                self.sober_label.config(text=f"{hours}h {mins}m")
+
+            self.timeline = result.timeline
+            self.draw_timeline()
         except Exception as e:
             pass
 
-        self.root.after(2000, self.update_display)
-
     def _update_bg_recursive(self, widget, color):
         """Recursively update background color"""
         try:
@@ -762,9 +739,7 @@ class BACSimulatorGUI:
             self._update_bg_recursive(child, color)
 
     def draw_timeline(self):
-        """Draw BAC timeline chart"""
-        self.canvas.delete("all")
-
+        """Draw BAC timeline chart, updating the existing canvas items in place"""
         width = self.canvas.winfo_width()
         height = self.canvas.winfo_height()
 
@@ -773,75 +748,25 @@ class BACSimulatorGUI:
         if height < 50:
             height = 200
 
-        padding = 40
-        graph_width = width - padding * 2
-        graph_height = height - padding * 2
-
         if not self.profile_complete or not self.calculator.drinks_timeline:
-            self.canvas.create_text(width // 2, height // 2,
-                                   text="Add drinks to see timeline",
-                                   font=self.fonts['body_small'],
-                                   fill=self.colors['neutral'])
-            return
+            timeline = None
+        else:
+            timeline = self.timeline
+            if not timeline:
+                return
 
-        timeline = self.calculator.get_bac_timeline(hours=6)
-        if not timeline:
+        # The worker hands back the same cached list until the data changes
+        source = (timeline, width, height)
+        if self.chart.is_current(source):
             return
 
-        # Calculate max BAC
-        max_bac = max(max(bac for _, bac in timeline), 0.1) * 1.2
-
-        # Draw grid lines
-        for i in range(5):
-            y = padding + (i / 4) * graph_height
-            self.canvas.create_line(padding, y, width - padding, y,
-                                   fill=self.colors['neutral_bg'], width=1)
-            bac_val = max_bac * (4 - i) / 4
-            self.canvas.create_text(padding - 8, y, text=f"{bac_val:.2f}",
-                                   font=self.fonts['caption'], fill=self.colors['neutral'], anchor='e')
-
-        # Legal limit line (0.08%)
-        if 0.08 <= max_bac:
-            legal_y = padding + (1 - 0.08 / max_bac) * graph_height
-            self.canvas.create_line(padding, legal_y, width - padding, legal_y,
-                                   fill=self.colors['bac_danger'], dash=(6, 4), width=2)
-            self.canvas.create_text(width - padding - 5, legal_y - 10,
-                                   text="0.08%", font=self.fonts['caption'],
-                                   fill=self.colors['bac_danger'], anchor='e')
-
-        # Draw BAC curve
-        start_time = timeline[0][0]
-        end_time = timeline[-1][0]
-        time_span = (end_time - start_time).total_seconds()
-
-        if time_span > 0:
-            points = []
-            for time_point, bac_val in timeline:
-                elapsed = (time_point - start_time).total_seconds()
-                x = padding + (elapsed / time_span) * graph_width
-                y = padding + (1 - bac_val / max_bac) * graph_height
-                points.append((x, y))
-
-            # Fill area
-            fill_points = [(padding, height - padding)] + points + [(width - padding, height - padding)]
-            self.canvas.create_polygon(fill_points, fill=self.colors['primary_light'], outline='')
-
-            # Draw line
-            for i in range(len(points) - 1):
-                self.canvas.create_line(points[i][0], points[i][1],
-                                       points[i + 1][0], points[i + 1][1],
-                                       fill=self.colors['primary'], width=3)
-
-            # Current point
-            self.canvas.create_oval(points[0][0] - 6, points[0][1] - 6,
-                                   points[0][0] + 6, points[0][1] + 6,
-                                   fill=self.colors['primary'], outline=self.colors['white'], width=2)
-
-        # X-axis labels
-        for i in range(7):
-            x = padding + (i / 6) * graph_width
-            self.canvas.create_text(x, height - padding + 15, text=f"{i}h",
-                                   font=self.fonts['caption'], fill=self.colors['neutral'])
+        if timeline is None:
+            display = timeline_render.layout_message(width, height, "Add drinks to see timeline",
+                                                     self.colors, self.fonts)
+        else:
+            display = timeline_render.layout_timeline(timeline, width, height, 6,
+                                                      self.colors, self.fonts)
+        self.chart.draw(display, source)
 
     def reset_scenario(self):
         """Reset entire scenario"""
@@ -853,6 +778,8 @@ class BACSimulatorGUI:
 
     def take_screenshot(self):
         """Capture screenshot of the application window"""
+        import subprocess  # Only needed here; kept off the startup path
+
         try:
             # Create screenshots directory if it doesn't exist
             home_dir = os.path.expanduser("~")
@@ -0,0 +1,202 @@
+"""
+Consumption Log View
+Keeps the merged drink/food log in sync with a calculator incrementally and
+shows it in a Tk canvas with live widgets only for the rows in view
+"""
+import tkinter as tk
+from bisect import bisect_right
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from event_store import to_datetime
+
+# Height of one log row in pixels (two text lines plus spacing)
+ROW_HEIGHT = 44
+
+EMPTY_TEXT = "No items logged yet\nAdd drinks or food using the chat"
+
+
+class LogRow(NamedTuple):
+    kind: str                     # 'drink' or 'food'
+    time: datetime
+    type: str
+    size_oz: Optional[float]
+    alcohol_percent: Optional[float]
+
+
+def row_text(row: LogRow) -> Tuple[str, str, str]:
+    """(emoji, name, sub text) shown for a row"""
+    name = row.type.replace('_', ' ').title()
+    time_str = row.time.strftime('%I:%M %p')
+    if row.kind == 'drink':
+        emoji = "🍺" if 'beer' in row.type else "🍷" if 'wine' in row.type else "🥃"
+        return emoji, name, f"{time_str} · {row.size_oz}oz · {row.alcohol_percent}%"
+    return "🍔", name, time_str
+
+
+class LogModel:
+    """
+    Drinks and foods of a calculator merged newest first (on equal times
+    drinks come before foods, each kind in logging order).
+
+    sync() compares the calculator's event stores with the entries it has
+    already seen and inserts only the new ones at their sorted place; it
+    rebuilds from scratch only when events were removed.
+    """
+
+    def __init__(self):
+        self.rows: List[LogRow] = []
+        self._keys = []     # Sort key per row: (-time, kind rank, sequence)
+        self._seen = {'drink': [], 'food': []}  # Store entries per kind, in store order
+        self._sequence = 0
+        self.version = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> LogRow:
+        return self.rows[index]
+
+    @staticmethod
+    def _entries(calculator):
+        drinks, foods = calculator.drinks_timeline, calculator.food_timeline
+        return {
+            'drink': list(zip(drinks.times, drinks.codes, drinks.columns['size_oz'],
+                              drinks.columns['alcohol_percent'])),
+            'food': list(zip(foods.times, foods.codes)),
+        }
+
+    @staticmethod
+    def _added(seen: List, current: List) -> Optional[List]:
+        """Entries of `current` not in `seen`, or None if any seen entry is gone"""
+        if len(current) < len(seen):
+            return None
+        added = []
+        j = 0
+        for entry in current:
+            if j < len(seen) and entry == seen[j]:
+                j += 1
+            else:
+                added.append(entry)
+        return added if j == len(seen) else None
+
+    def _insert(self, kind: str, entry: Tuple, type_names: List[str]):
+        seconds, code = entry[0], entry[1]
+        extra = entry[2:] if kind == 'drink' else (None, None)
+        key = (-seconds, 0 if kind == 'drink' else 1, self._sequence)
+        self._sequence += 1
+
+        index = bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self.rows.insert(index, LogRow(kind, to_datetime(seconds), type_names[code], *extra))
+
+    def sync(self, calculator) -> bool:
+        """Bring the log up to date with the calculator; returns True if rows changed"""
+        if calculator.version == self.version:
+            return False
+        self.version = calculator.version
+
+        entries = self._entries(calculator)
+        added = {kind: self._added(self._seen[kind], entries[kind]) for kind in entries}
+        if None in added.values():
+            self.rows, self._keys = [], []
+            added = entries
+
+        type_names = {'drink': calculator.drinks_timeline.type_names,
+                      'food': calculator.food_timeline.type_names}
+        for kind, new_entries in added.items():
+            for entry in new_entries:
+                self._insert(kind, entry, type_names[kind])
+
+        changed = any(added.values()) or entries != self._seen
+        self._seen = entries
+        return changed
+
+
+class VirtualLog:
+    """
+    Scrolling log on a tk.Canvas. A small pool of row widgets is placed
+    over the visible part of the scroll region and refilled as the view
+    moves, so the widget count follows the viewport height rather than
+    the number of logged items.
+    """
+
+    def __init__(self, canvas: tk.Canvas, colors, fonts, row_height: int = ROW_HEIGHT):
+        self.canvas = canvas
+        self.colors = colors
+        self.fonts = fonts
+        self.row_height = row_height
+        self.model = LogModel()
+        self._slots = []    # [frame, labels, window id, row shown, index shown, width]
+
+        self.empty_label = tk.Label(canvas, text=EMPTY_TEXT, font=fonts['body_small'],
+                                    bg=colors['card_bg'], fg=colors['neutral'], justify='center')
+        self._empty_window = canvas.create_window(0, 40, window=self.empty_label, anchor='n')
+        canvas.bind("<Configure>", lambda e: self.refresh())
+
+    def yview(self, *args):
+        """Scrollbar command: scroll the canvas, then refill the visible rows"""
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def update(self, calculator):
+        """Pick up new drinks and food from the calculator"""
+        if self.model.sync(calculator):
+            self.refresh(force=True)
+
+    def _make_slot(self):
+        background = self.colors['neutral_bg']
+        frame = tk.Frame(self.canvas, bg=background)
+        emoji = tk.Label(frame, font=('Helvetica', 16), bg=background)
+        emoji.pack(side=tk.LEFT, padx=8)
+        info_frame = tk.Frame(frame, bg=background)
+        info_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        name = tk.Label(info_frame, font=self.fonts['body_small'], bg=background, fg=self.colors['slate'])
+        name.pack(anchor='w')
+        sub = tk.Label(info_frame, font=self.fonts['caption'], bg=background, fg=self.colors['neutral'])
+        sub.pack(anchor='w')
+
+        window = self.canvas.create_window(0, 0, window=frame, anchor='nw',
+                                           height=self.row_height - 4, state='hidden')
+        return [frame, (emoji, name, sub), window, None, None, None]
+
+    def refresh(self, force: bool = False):
+        """Place and fill row widgets for the rows currently in view"""
+        canvas = self.canvas
+        count = len(self.model)
+        width = max(canvas.winfo_width(), 1)
+        height = canvas.winfo_height()
+
+        canvas.itemconfig(self._empty_window, state='hidden' if count else 'normal')
+        canvas.coords(self._empty_window, width // 2, 40)
+        canvas.configure(scrollregion=(0, 0, width, count * self.row_height))
+
+        top = max(canvas.canvasy(0), 0)
+        first = min(int(top // self.row_height), count)
+        last = min(count, int((top + height) // self.row_height) + 1)
+
+        while len(self._slots) < last - first:
+            self._slots.append(self._make_slot())
+
+        for offset, slot in enumerate(self._slots):
+            index = first + offset
+            frame, labels, window, shown_row, shown_index, shown_width = slot
+            if index >= last:
+                if shown_index is not None:
+                    canvas.itemconfig(window, state='hidden')
+                    slot[4] = None
+                continue
+
+            row = self.model[index]
+            if force or row is not shown_row:
+                for label, text in zip(labels, row_text(row)):
+                    label.config(text=text)
+                slot[3] = row
+            if index != shown_index:
+                canvas.coords(window, 0, index * self.row_height + 2)
+                if shown_index is None:
+                    canvas.itemconfig(window, state='normal')
+                slot[4] = index
+            if width != shown_width:
+                canvas.itemconfig(window, width=width)
+                slot[5] = width
@@ -0,0 +1,136 @@
+"""
+Simulation Worker
+Answers the GUI's display queries on a background thread, against a private
+copy of the calculator, so the Tk event loop never waits on a computation
+"""
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Seconds a timeline projection is reused for (see get_bac_timeline max_age).
+# Under one pixel of a 6-hour chart, so the current-point marker keeps up.
+TIMELINE_MAX_AGE = 30
+
+
+class SimulationResult(NamedTuple):
+    """Everything update_display shows, computed for one request"""
+    request_id: int
+    version: int                  # Calculator version the numbers belong to
+    time: datetime
+    bac: float
+    impairment: Dict
+    peak_bac: float
+    peak_time: datetime
+    time_to_sober: Optional[timedelta]
+    timeline: List[Tuple[datetime, float]]
+    error: Optional[Exception] = None
+
+
+class _Request(NamedTuple):
+    request_id: int
+    calculator: object            # Fresh copy, or None to keep using the last one
+    hours: int
+
+
+def simulate(calculator, request_id: int = 0, hours: int = 6) -> SimulationResult:
+    """Compute the display numbers for `calculator` at the current time"""
+    now = datetime.now()
+    bac = calculator.calculate_bac_at_time(now)
+    peak_bac, peak_time = calculator.get_peak_bac(now)
+    return SimulationResult(
+        request_id, calculator.version, now, bac, calculator.get_impairment_level(bac),
+        peak_bac, peak_time, calculator.get_time_to_sobriety(from_time=now),
+        calculator.get_bac_timeline(hours=hours, max_age=TIMELINE_MAX_AGE),
+    )
+
+
+class SimulationWorker:
+    """
+    One background thread computing SimulationResults.
+
+    submit() is called on the Tk thread; it copies the calculator only when
+    its version moved since the last submit. Requests are coalesced: one
+    that has not started yet is replaced by the next, so a burst of edits
+    costs a single computation. Finished results wait in a queue that the
+    Tk thread drains with results() from a root.after callback.
+
+    The worker keeps the copy between requests, so the calculator's
+    per-version cache (and the timeline list identity draw_timeline relies
+    on) survives from one periodic refresh to the next.
+    """
+
+    def __init__(self, hours: int = 6):
+        self.hours = hours
+        self.coalesced = 0            # Requests replaced before they started
+        self._condition = threading.Condition()
+        self._pending: Optional[_Request] = None
+        self._active = False
+        self._running = True
+        self._submitted = 0
+        self._sent_version = None
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='bac-simulation', daemon=True)
+        self._thread.start()
+
+    def submit(self, calculator) -> int:
+        """Request fresh numbers for the calculator; returns the request id"""
+        snapshot = None
+        if calculator.version != self._sent_version:
+            snapshot = calculator.copy()
+            self._sent_version = calculator.version
+
+        with self._condition:
+            self._submitted += 1
+            if self._pending is not None:
+                self.coalesced += 1
+                if snapshot is None:
+                    snapshot = self._pending.calculator
+            self._pending = _Request(self._submitted, snapshot, self.hours)
+            self._condition.notify()
+            return self._submitted
+
+    def results(self) -> List[SimulationResult]:
+        """Finished results, oldest first (call from the Tk thread)"""
+        finished = []
+        while True:
+            try:
+                finished.append(self._results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    @property
+    def busy(self) -> bool:
+        """True while a request is queued or running, or a result is unread"""
+        with self._condition:
+            return self._pending is not None or self._active or not self._results.empty()
+
+    def stop(self):
+        """Let the thread finish its current request and exit"""
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+
+    def _run(self):
+        calculator = None
+        while True:
+            with self._condition:
+                while self._pending is None and self._running:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                request, self._pending = self._pending, None
+                self._active = True
+
+            if request.calculator is not None:
+                calculator = request.calculator
+            try:
+                result = simulate(calculator, request.request_id, request.hours)
+            except Exception as e:
+                result = SimulationResult(request.request_id, calculator.version, datetime.now(),
+                                          0.0, {}, 0.0, None, None, None, e)
+            self._results.put(result)
+
+            with self._condition:
+                self._active = False
@@ -122,6 +122,8 @@ class TerminalUI:
 
     def _format_timedelta(self, td: timedelta) -> str:
         """Format timedelta as readable string"""
+        if td is None:
+            return "never (no elimination)"
         total_seconds = int(td.total_seconds())
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
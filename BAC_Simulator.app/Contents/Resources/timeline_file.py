@@ -0,0 +1,193 @@
+"""
+Binary Timeline Files
+Compact column files for BAC timelines and cohort curves, written in a
+streaming fashion and read back through mmap without loading them
+
+Layout (little endian):
+    header     64 bytes (HEADER, padded)
+    metadata   meta_len bytes of JSON, zero-padded to a multiple of 8
+    times      n_rows int64 - milliseconds since `origin`
+    series     n_series x n_rows float64 - one contiguous column per curve
+"""
+import json
+import mmap
+import struct
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import bac_engine
+from event_store import to_datetime, to_seconds
+
+np = bac_engine.load_numpy()
+
+MAGIC = b'BACTL\x00\r\n'
+VERSION = 1
+
+# magic, version, flags, n_series, n_rows, origin (store seconds), meta_len
+HEADER = struct.Struct('<8sHHIQdI')
+HEADER_SIZE = 64
+
+
+def _padded(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+class TimelineWriter:
+    """
+    Streams columns into a timeline file whose shape is fixed up front.
+    The file is sized on creation and each write seeks to its slot, so
+    columns and row ranges can arrive in any order and in chunks.
+    """
+
+    def __init__(self, path: str, n_rows: int, n_series: int = 1, origin: float = 0.0,
+                 metadata: Dict = None):
+        """
+        Args:
+            path: File to create (overwritten)
+            n_rows: Samples per series
+            n_series: Number of BAC columns sharing the time column
+            origin: Store seconds (event_store.to_seconds) of time offset zero
+            metadata: JSON-serializable extras (labels, shapes, ...)
+        """
+        self.path = path
+        self.n_rows = n_rows
+        self.n_series = n_series
+        meta = json.dumps(metadata or {}).encode()
+        self.data_offset = HEADER_SIZE + _padded(len(meta))
+
+        self.file = open(path, 'w+b')
+        header = HEADER.pack(MAGIC, VERSION, 0, n_series, n_rows, origin, len(meta))
+        self.file.write(header.ljust(HEADER_SIZE, b'\0'))
+        self.file.write(meta.ljust(self.data_offset - HEADER_SIZE, b'\0'))
+        self.file.truncate(self.data_offset + 8 * n_rows * (1 + n_series))
+
+    def _write(self, position: int, values, typecode: str):
+        if np is not None:
+            data = np.ascontiguousarray(values, dtype='<i8' if typecode == 'q' else '<f8').tobytes()
+        else:
+            data = array(typecode, values).tobytes()
+        self.file.seek(position)
+        self.file.write(data)
+
+    def write_times(self, offsets_seconds: Sequence[float], row: int = 0):
+        """Write time offsets (seconds since origin) for rows row.. onward"""
+        if np is not None:
+            millis = np.rint(np.asarray(offsets_seconds, dtype=np.float64) * 1000)
+        else:
+            millis = [int(round(t * 1000)) for t in offsets_seconds]
+        self._write(self.data_offset + 8 * row, millis, 'q')
+
+    def write_series(self, index: int, values: Sequence[float], row: int = 0):
+        """Write BAC values of one series for rows row.. onward"""
+        position = self.data_offset + 8 * (self.n_rows * (1 + index) + row)
+        self._write(position, values, 'd')
+
+    def write_block(self, first: int, block):
+        """Write whole consecutive series first.. from a (series x rows) array in one go"""
+        self._write(self.data_offset + 8 * self.n_rows * (1 + first), block, 'd')
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TimelineFile:
+    """
+    Read-only view of a timeline file through mmap. With NumPy, `times`,
+    `curves` and series() are zero-copy arrays over the mapping; otherwise
+    they are memoryviews. Drop those views before calling close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, n_series, n_rows, origin, meta_len = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a BAC timeline file")
+        if version > VERSION:
+            raise ValueError(f"{path} uses format version {version}; this reader supports {VERSION}")
+
+        self.n_series = n_series
+        self.n_rows = n_rows
+        self.origin = origin
+        self.metadata = json.loads(bytes(self.mmap[HEADER_SIZE:HEADER_SIZE + meta_len]) or b'{}')
+        self.data_offset = HEADER_SIZE + _padded(meta_len)
+
+        expected = self.data_offset + 8 * n_rows * (1 + n_series)
+        if len(self.mmap) < expected:
+            raise ValueError(f"{path} is truncated ({len(self.mmap)} of {expected} bytes)")
+
+    def _column(self, position: int, count: int, dtype: str):
+        if np is not None:
+            return np.frombuffer(self.mmap, dtype='<i8' if dtype == 'q' else '<f8',
+                                 count=count, offset=position)
+        return memoryview(self.mmap)[position:position + 8 * count].cast(dtype)
+
+    @property
+    def times(self):
+        """Time offsets in milliseconds since origin (int64)"""
+        return self._column(self.data_offset, self.n_rows, 'q')
+
+    @property
+    def curves(self):
+        """Every series as an (n_series x n_rows) float64 array"""
+        if np is None:
+            raise ImportError("curves requires NumPy; use series() instead")
+        return self._column(self.data_offset + 8 * self.n_rows, self.n_series * self.n_rows,
+                            'd').reshape(self.n_series, self.n_rows)
+
+    def series(self, index: int = 0):
+        """One series' BAC values"""
+        if not 0 <= index < self.n_series:
+            raise IndexError('series index out of range')
+        return self._column(self.data_offset + 8 * self.n_rows * (1 + index), self.n_rows, 'd')
+
+    def timeline(self, index: int = 0) -> List[Tuple[datetime, float]]:
+        """Materialize one series as get_bac_timeline-style (datetime, bac) pairs"""
+        start = to_datetime(self.origin)
+        return [(start + timedelta(milliseconds=int(ms)), float(bac))
+                for ms, bac in zip(self.times, self.series(index))]
+
+    def close(self):
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_timeline(path: str, timeline: Sequence[Tuple[datetime, float]]):
+    """Save a get_bac_timeline() result; offsets are relative to its first sample"""
+    origin = timeline[0][0] if timeline else datetime(1970, 1, 1)
+    with TimelineWriter(path, len(timeline), 1, to_seconds(origin)) as writer:
+        writer.write_times([(t - origin).total_seconds() for t, _ in timeline])
+        writer.write_series(0, [bac for _, bac in timeline])
+
+
+def write_population(path: str, offsets_hours: Sequence[float], n_profiles: int, n_scenarios: int,
+                     chunks: Iterable[Tuple[int, int, object]]):
+    """
+    Stream cohort curves to disk as they are produced.
+
+    Series p x n_scenarios + s holds profile p under scenario s, with times
+    relative to the scenario start. `chunks` yields (lo, hi, result) with
+    result.curves shaped (hi - lo, scenarios, samples), as
+    bac_parallel.iter_population_chunks(..., curves=True) does; a single
+    bac_batch result can be passed as [(0, n_profiles, result)].
+    """
+    metadata = {'profiles': n_profiles, 'scenarios': n_scenarios, 'layout': 'profile-major'}
+    with TimelineWriter(path, len(offsets_hours), n_profiles * n_scenarios, 0.0, metadata) as writer:
+        writer.write_times([h * 3600 for h in offsets_hours])
+        for lo, hi, result in chunks:
+            curves = result.curves
+            writer.write_block(lo * n_scenarios, curves.reshape((hi - lo) * n_scenarios, -1))
@@ -0,0 +1,397 @@
+"""
+Timeline Chart Renderer
+Lays a BAC timeline out once as a display list of drawing primitives,
+then draws it on a Tk canvas, as SVG or as PNG - no display needed for
+the last two
+"""
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Chart colors and fonts (the GUI's design system values)
+DEFAULT_COLORS = {
+    'primary': '#00BFAE',
+    'primary_light': '#E6FAF8',
+    'neutral': '#BFBEBE',
+    'neutral_bg': '#F3F4F6',
+    'bac_danger': '#EF4444',
+    'white': '#FFFFFF',
+}
+
+DEFAULT_FONTS = {
+    'caption': ('Helvetica', 10),
+    'body_small': ('Helvetica', 11),
+}
+
+PADDING = 40
+LEGAL_LIMIT = 0.08
+
+
+class Polyline(NamedTuple):
+    key: str
+    points: Tuple[float, ...]  # Flat x0, y0, x1, y1, ...
+    color: str
+    width: float
+
+
+class Polygon(NamedTuple):
+    key: str
+    points: Tuple[float, ...]
+    fill: str
+
+
+class Line(NamedTuple):
+    key: str
+    points: Tuple[float, float, float, float]
+    color: str
+    width: float
+    dash: Optional[Tuple[int, ...]] = None
+
+
+class Text(NamedTuple):
+    key: str
+    x: float
+    y: float
+    text: str
+    font: Tuple
+    color: str
+    anchor: str = 'center'  # Tk anchor: 'center', 'e' or 'w'
+
+
+class Oval(NamedTuple):
+    key: str
+    points: Tuple[float, float, float, float]
+    fill: str
+    outline: str
+    width: float
+
+
+class DisplayList(NamedTuple):
+    """Primitives in drawing order; every key is unique within a list"""
+    width: int
+    height: int
+    background: str
+    items: List
+
+
+def layout_message(width: int, height: int, text: str, colors: Dict = None,
+                   fonts: Dict = None) -> DisplayList:
+    """A chart holding only a centered message"""
+    colors = {**DEFAULT_COLORS, **(colors or {})}
+    fonts = {**DEFAULT_FONTS, **(fonts or {})}
+    message = Text('message', width // 2, height // 2, text, fonts['body_small'], colors['neutral'])
+    return DisplayList(width, height, colors['white'], [message])
+
+
+def layout_timeline(timeline: Sequence[Tuple[datetime, float]], width: int, height: int,
+                    hours: int = 6, colors: Dict = None, fonts: Dict = None) -> DisplayList:
+    """
+    Scale a get_bac_timeline() result into chart primitives: gridlines
+    with BAC labels, the legal limit line, the filled curve, a marker on
+    the first sample and hour labels along the x axis.
+    """
+    colors = {**DEFAULT_COLORS, **(colors or {})}
+    fonts = {**DEFAULT_FONTS, **(fonts or {})}
+    graph_width = width - PADDING * 2
+    graph_height = height - PADDING * 2
+    items = []
+
+    max_bac = max(max((bac for _, bac in timeline), default=0.0), 0.1) * 1.2
+
+    # Grid lines
+    for i in range(5):
+        y = PADDING + (i / 4) * graph_height
+        items.append(Line(f'grid{i}', (PADDING, y, width - PADDING, y), colors['neutral_bg'], 1))
+        items.append(Text(f'grid_label{i}', PADDING - 8, y, f"{max_bac * (4 - i) / 4:.2f}",
+                          fonts['caption'], colors['neutral'], 'e'))
+
+    # Legal limit line (0.08%)
+    if LEGAL_LIMIT <= max_bac:
+        legal_y = PADDING + (1 - LEGAL_LIMIT / max_bac) * graph_height
+        items.append(Line('limit', (PADDING, legal_y, width - PADDING, legal_y),
+                          colors['bac_danger'], 2, (6, 4)))
+        items.append(Text('limit_label', width - PADDING - 5, legal_y - 10, "0.08%",
+                          fonts['caption'], colors['bac_danger'], 'e'))
+
+    # BAC curve
+    if len(timeline) > 1:
+        start_time = timeline[0][0]
+        time_span = (timeline[-1][0] - start_time).total_seconds()
+        if time_span > 0:
+            points = []
+            for time_point, bac in timeline:
+                elapsed = (time_point - start_time).total_seconds()
+                points.append(PADDING + (elapsed / time_span) * graph_width)
+                points.append(PADDING + (1 - bac / max_bac) * graph_height)
+
+            fill = (PADDING, height - PADDING) + tuple(points) + (width - PADDING, height - PADDING)
+            items.append(Polygon('fill', fill, colors['primary_light']))
+            items.append(Polyline('curve', tuple(points), colors['primary'], 3))
+
+            # Current point
+            x, y = points[0], points[1]
+            items.append(Oval('current', (x - 6, y - 6, x + 6, y + 6),
+                              colors['primary'], colors['white'], 2))
+
+    # X-axis labels
+    for i in range(hours + 1):
+        x = PADDING + (i / hours) * graph_width
+        items.append(Text(f'hour{i}', x, height - PADDING + 15, f"{i}h",
+                          fonts['caption'], colors['neutral']))
+
+    return DisplayList(width, height, colors['white'], items)
+
+
+def layout_calculator(calculator, width: int = 600, height: int = 240, hours: int = 6,
+                      from_now: bool = True, colors: Dict = None, fonts: Dict = None) -> DisplayList:
+    """Display list for a calculator's timeline (a message when it has no drinks)"""
+    if not calculator.drinks_timeline:
+        return layout_message(width, height, "Add drinks to see timeline", colors, fonts)
+    timeline = calculator.get_bac_timeline(hours=hours, from_now=from_now)
+    return layout_timeline(timeline, width, height, hours, colors, fonts)
+
+
+# --- Tk backend ---
+
+def tk_options(item) -> Dict:
+    """Canvas item options for a primitive"""
+    if isinstance(item, Polyline):
+        return {'fill': item.color, 'width': item.width}
+    if isinstance(item, Polygon):
+        return {'fill': item.fill, 'outline': ''}
+    if isinstance(item, Line):
+        options = {'fill': item.color, 'width': item.width}
+        if item.dash:
+            options['dash'] = item.dash
+        return options
+    if isinstance(item, Text):
+        return {'text': item.text, 'font': item.font, 'fill': item.color, 'anchor': item.anchor}
+    return {'fill': item.fill, 'outline': item.outline, 'width': item.width}
+
+
+def tk_coords(item) -> Sequence[float]:
+    """Canvas coordinates for a primitive"""
+    if isinstance(item, Text):
+        return (item.x, item.y)
+    return item.points
+
+
+def tk_create(canvas, item) -> int:
+    """Create one canvas item (a polyline is a single create_line call)"""
+    create = {
+        Polyline: canvas.create_line,
+        Line: canvas.create_line,
+        Polygon: canvas.create_polygon,
+        Text: canvas.create_text,
+        Oval: canvas.create_oval,
+    }[type(item)]
+    return create(*tk_coords(item), **tk_options(item))
+
+
+def render_tk(canvas, display: DisplayList) -> Dict[str, int]:
+    """Draw a display list on a tk.Canvas; returns key -> canvas item id"""
+    return {item.key: tk_create(canvas, item) for item in display.items}
+
+
+class TkChart:
+    """
+    Retained-mode chart on a tk.Canvas: one canvas item per display-list
+    key, created once and then moved with coords() or restyled with
+    itemconfig() only where the new display list differs.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.items = {}      # key -> (canvas item id, primitive drawn)
+        self.source = None   # What the current drawing was built from
+
+    def is_current(self, source) -> bool:
+        """True if the chart was last drawn from an equal source"""
+        return self.source is not None and self.source == source
+
+    def draw(self, display: DisplayList, source=None):
+        """
+        Bring the canvas in line with a display list.
+
+        Args:
+            display: Primitives to show
+            source: Whatever the display was built from (e.g. the timeline
+                    and canvas size), for is_current() checks next time
+        """
+        canvas = self.canvas
+        items = {}
+        created = False
+
+        for item in display.items:
+            existing = self.items.pop(item.key, None)
+            if existing is not None and type(existing[1]) is type(item):
+                item_id, old = existing
+                if tk_coords(old) != tk_coords(item):
+                    canvas.coords(item_id, *tk_coords(item))
+                options = tk_options(item)
+                if tk_options(old) != options:
+                    canvas.itemconfig(item_id, **options)
+            else:
+                if existing is not None:
+                    canvas.delete(existing[0])
+                item_id = tk_create(canvas, item)
+                created = True
+            items[item.key] = (item_id, item)
+
+        # Items missing from the new list
+        for item_id, _ in self.items.values():
+            canvas.delete(item_id)
+
+        # New items land on top; restore the display-list stacking order
+        if created and len(items) > 1:
+            for item_id, _ in items.values():
+                canvas.tag_raise(item_id)
+
+        self.items = items
+        self.source = source
+
+    def clear(self):
+        """Remove every chart item from the canvas"""
+        for item_id, _ in self.items.values():
+            self.canvas.delete(item_id)
+        self.items = {}
+        self.source = None
+
+
+# --- SVG backend ---
+
+_SVG_ANCHORS = {'e': 'end', 'w': 'start', 'center': 'middle'}
+
+
+def _svg_points(points: Sequence[float]) -> str:
+    return ' '.join(f"{points[i]:.2f},{points[i + 1]:.2f}" for i in range(0, len(points), 2))
+
+
+def _svg_font(font: Tuple) -> str:
+    family, size = font[0], font[1]
+    weight = ' font-weight="bold"' if 'bold' in font[2:] else ''
+    return f'font-family="{escape(family)}" font-size="{size}"{weight}'
+
+
+def render_svg(display: DisplayList) -> str:
+    """Render a display list as a standalone SVG document"""
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{display.width}" '
+             f'height="{display.height}" viewBox="0 0 {display.width} {display.height}">',
+             f'<rect width="100%" height="100%" fill="{display.background}"/>']
+
+    for item in display.items:
+        if isinstance(item, Polyline):
+            parts.append(f'<polyline points="{_svg_points(item.points)}" fill="none" '
+                         f'stroke="{item.color}" stroke-width="{item.width}" '
+                         f'stroke-linejoin="round" stroke-linecap="round"/>')
+        elif isinstance(item, Polygon):
+            parts.append(f'<polygon points="{_svg_points(item.points)}" fill="{item.fill}"/>')
+        elif isinstance(item, Line):
+            x1, y1, x2, y2 = item.points
+            dash = f' stroke-dasharray="{",".join(map(str, item.dash))}"' if item.dash else ''
+            parts.append(f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
+                         f'stroke="{item.color}" stroke-width="{item.width}"{dash}/>')
+        elif isinstance(item, Text):
+            parts.append(f'<text x="{item.x:.2f}" y="{item.y:.2f}" {_svg_font(item.font)} '
+                         f'fill="{item.color}" text-anchor="{_SVG_ANCHORS.get(item.anchor, "middle")}" '
+                         f'dominant-baseline="middle">{escape(item.text)}</text>')
+        elif isinstance(item, Oval):
+            x0, y0, x1, y1 = item.points
+            parts.append(f'<ellipse cx="{(x0 + x1) / 2:.2f}" cy="{(y0 + y1) / 2:.2f}" '
+                         f'rx="{(x1 - x0) / 2:.2f}" ry="{(y1 - y0) / 2:.2f}" fill="{item.fill}" '
+                         f'stroke="{item.outline}" stroke-width="{item.width}"/>')
+
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+# --- PNG backend (Pillow) ---
+# Pillow is optional and slow to import, so it is only imported when a PNG
+# is rendered; the GUI never pays for it.
+
+_PIL_ANCHORS = {'e': 'rm', 'w': 'lm', 'center': 'mm'}
+_font_cache = {}
+
+
+def _pil_font(font: Tuple):
+    """Best available Pillow font for a Tk font tuple"""
+    if font not in _font_cache:
+        from PIL import ImageFont
+
+        size = int(font[1])
+        names = ['DejaVuSans-Bold.ttf' if 'bold' in font[2:] else 'DejaVuSans.ttf',
+                 f"{font[0]}.ttf", f"{font[0]}.ttc"]
+        loaded = None
+        for name in names:
+            try:
+                loaded = ImageFont.truetype(name, size)
+                break
+            except OSError:
+                continue
+        if loaded is None:
+            try:
+                loaded = ImageFont.load_default(size)
+            except TypeError:  # Pillow < 10.1 has a single bitmap font
+                loaded = ImageFont.load_default()
+        _font_cache[font] = loaded
+    return _font_cache[font]
+
+
+def _dashed(draw, points, color: str, width: float, dash: Sequence[int]):
+    """Pillow has no dash pattern, so draw the 'on' runs of a straight line"""
+    x1, y1, x2, y2 = points
+    length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+    if length == 0:
+        return
+    position, i = 0.0, 0
+    while position < length:
+        run = dash[i % len(dash)]
+        if i % 2 == 0:
+            end = min(position + run, length)
+            draw.line([(x1 + (x2 - x1) * position / length, y1 + (y2 - y1) * position / length),
+                       (x1 + (x2 - x1) * end / length, y1 + (y2 - y1) * end / length)],
+                      fill=color, width=int(width))
+        position += run
+        i += 1
+
+
+def render_image(display: DisplayList, scale: float = 1.0):
+    """Rasterize a display list to a Pillow Image (requires Pillow)"""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        raise ImportError("PNG rendering requires Pillow")
+
+    def px(points):
+        return [(points[i] * scale, points[i + 1] * scale) for i in range(0, len(points), 2)]
+
+    image = Image.new('RGB', (int(display.width * scale), int(display.height * scale)),
+                      display.background)
+    draw = ImageDraw.Draw(image)
+    for item in display.items:
+        if isinstance(item, Polyline):
+            draw.line(px(item.points), fill=item.color, width=int(item.width * scale), joint='curve')
+        elif isinstance(item, Polygon):
+            draw.polygon(px(item.points), fill=item.fill)
+        elif isinstance(item, Line):
+            points = [v * scale for v in item.points]
+            if item.dash:
+                _dashed(draw, points, item.color, item.width * scale, [d * scale for d in item.dash])
+            else:
+                draw.line(points, fill=item.color, width=int(item.width * scale))
+        elif isinstance(item, Text):
+            font = _pil_font((item.font[0], item.font[1] * scale) + tuple(item.font[2:]))
+            try:
+                draw.text((item.x * scale, item.y * scale), item.text, fill=item.color, font=font,
+                          anchor=_PIL_ANCHORS.get(item.anchor, 'mm'))
+            except ValueError:  # Bitmap fonts do not support anchors
+                draw.text((item.x * scale, item.y * scale), item.text, fill=item.color, font=font)
+        elif isinstance(item, Oval):
+            draw.ellipse([v * scale for v in item.points], fill=item.fill,
+                         outline=item.outline, width=int(item.width * scale))
+    return image
+
+
+def render_png(display: DisplayList, path: str, scale: float = 1.0):
+    """Write a display list to a PNG file (requires Pillow)"""
+    render_image(display, scale).save(path, format='PNG')
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+BAC Simulator Benchmarks
+Times the calculator, chatbot parsers and timeline drawing on fixed
+synthetic scenarios and writes the results as JSON.
+
+Usage:
+    python benchmarks/bench_bac.py                      # full run to stdout
+    python benchmarks/bench_bac.py -o bench.json        # save results
+    python benchmarks/bench_bac.py --quick --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import bac_engine
+from bac_calculator import BACCalculator
+from chatbot import BACChatbot
+
+# Every scenario is built from this seed, so runs are comparable
+SEED = 20240101
+SESSION_START = datetime(2000, 1, 1, 20, 0)
+SESSION_HOURS = 4
+
+DRINK_COUNTS = (1, 10, 100, 1000)
+FOOD_COUNTS = (0, 20, 200)
+HORIZONS = (6, 24)
+
+DRINK_PHRASES = [
+    "I had 2 beers",
+    "just finished a glass of red wine",
+    "3 shots of tequila",
+    "a margarita at 12%",
+    "one bud light",
+    "had a guinness and some water",
+    "two IPAs with my pizza",
+    "a vodka soda",
+    "nothing to drink yet",
+    "4 drinks over the last hour",
+]
+
+FOOD_PHRASES = [
+    "I had pizza",
+    "a burger and fries",
+    "just a salad",
+    "on an empty stomach",
+    "some crackers",
+    "big meal before we went out",
+    "had dinner around 6",
+    "a sandwich for lunch",
+    "nothing but water",
+    "ate a while ago",
+]
+
+TIME_PHRASES = [
+    "now",
+    "2 hours ago",
+    "45 minutes ago",
+    "at 7pm",
+    "around 7:30pm",
+    "19:30",
+    "started at 9",
+    "a while back",
+]
+
+
+def build_scenario(drinks: int, foods: int) -> BACCalculator:
+    """Calculator holding `drinks` drinks and `foods` meals spread over the session"""
+    rng = random.Random(SEED + drinks * 1000 + foods)
+    drink_types = sorted(BACCalculator.STANDARD_DRINKS)
+    food_types = sorted(BACCalculator.FOOD_GASTRIC_TIMES)
+
+    def at():
+        return SESSION_START + timedelta(seconds=rng.uniform(0, SESSION_HOURS * 3600))
+
+    calculator = BACCalculator()
+    calculator.set_profile('male', 180)
+    calculator.start_time = SESSION_START
+    calculator.add_foods({'time': at(), 'type': rng.choice(food_types)} for _ in range(foods))
+    calculator.add_drinks({'time': at(), 'type': rng.choice(drink_types)} for _ in range(drinks))
+    return calculator
+
+
+def measure(fn, repeat: int, setup=None, min_time: float = 0.02) -> dict:
+    """
+    Time fn() and return per-call seconds {'min', 'median', 'calls'}.
+    setup() runs untimed before every call (e.g. to drop caches).
+    """
+    def run(number):
+        elapsed = 0.0
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            begin = time.perf_counter()
+            fn()
+            elapsed += time.perf_counter() - begin
+        return elapsed
+
+    # Batch calls so each sample is long enough to time reliably
+    number = 1
+    while run(number) < min_time and number < 1 << 16:
+        number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        samples.append(run(number) / number)
+
+    return {'min': min(samples), 'median': statistics.median(samples), 'calls': number * repeat}
+
+
+class StubCanvas:
+    """Headless stand-in for tk.Canvas that counts the items drawn"""
+
+    def __init__(self, width: int = 800, height: int = 300):
+        self.width = width
+        self.height = height
+        self.items = 0
+        self.calls = 0
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def delete(self, *tags):
+        self.calls += 1
+        if 'all' in tags:
+            self.items = 0
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls += 1
+            if name.startswith('create_'):
+                self.items += 1
+                return self.items
+            return None
+        return call
+
+
+class _Palette(dict):
+    def __missing__(self, key):
+        return '#000000'
+
+
+def headless_gui(calculator):
+    """A BACSimulatorGUI drawing onto a StubCanvas, or None without Tkinter"""
+    try:
+        from gui import BACSimulatorGUI
+        from timeline_render import TkChart
+    except ImportError:
+        return None
+
+    app = BACSimulatorGUI.__new__(BACSimulatorGUI)
+    app.calculator = calculator
+    app.canvas = StubCanvas()
+    app.chart = TkChart(app.canvas)
+    app.colors = _Palette()
+    app.fonts = _Palette()
+    app.profile_complete = True
+    return app
+
+
+def bench_calculator(drink_counts, food_counts, horizons, repeat: int) -> dict:
+    """Calculator timings per scenario; 'cold' calls start from an empty cache"""
+    results = {}
+    for drinks in drink_counts:
+        for foods in food_counts:
+            calculator = build_scenario(drinks, foods)
+            midpoint = SESSION_START + timedelta(hours=SESSION_HOURS / 2)
+
+            def drop_cache():
+                calculator.start_time = SESSION_START
+
+            name = f"drinks={drinks},foods={foods}"
+            entry = {
+                'build': measure(lambda: build_scenario(drinks, foods), repeat),
+                'calculate_bac_at_time.cold': measure(
+                    lambda: calculator.calculate_bac_at_time(midpoint), repeat, drop_cache),
+                'calculate_bac_at_time.warm': measure(
+                    lambda: calculator.calculate_bac_at_time(midpoint), repeat),
+                'get_peak_bac.cold': measure(
+                    lambda: calculator.get_peak_bac(SESSION_START), repeat, drop_cache),
+                'get_time_to_sobriety.cold': measure(
+                    lambda: calculator.get_time_to_sobriety(from_time=SESSION_START),
+                    repeat, drop_cache),
+            }
+            for hours in horizons:
+                entry[f'get_bac_timeline.{hours}h.cold'] = measure(
+                    lambda: calculator.get_bac_timeline(hours, from_now=False), repeat, drop_cache)
+                entry[f'get_bac_timeline.{hours}h.warm'] = measure(
+                    lambda: calculator.get_bac_timeline(hours, from_now=False), repeat)
+            results[name] = entry
+    return results
+
+
+def bench_parser(repeat: int) -> dict:
+    """Chatbot parser throughput over fixed phrase corpora (phrases per second)"""
+    chatbot = BACChatbot()
+    results = {}
+    for name, parse, corpus in (('parse_drink', chatbot.parse_drink, DRINK_PHRASES),
+                                ('parse_food', chatbot.parse_food, FOOD_PHRASES),
+                                ('parse_time_phrase', chatbot.parse_time_phrase, TIME_PHRASES)):
+        timing = measure(lambda: [parse(text) for text in corpus], repeat)
+        timing['phrases_per_second'] = len(corpus) / timing['min']
+        results[name] = timing
+    return results
+
+
+def bench_render(drink_counts, repeat: int) -> dict:
+    """
+    Headless draw_timeline passes. 'cold' updates the chart in place for a
+    timeline with one more drink; 'warm' redraws an unchanged timeline.
+    """
+    results = {}
+    for drinks in drink_counts:
+        calculator = build_scenario(drinks, 0)
+        # draw_timeline projects from now, so move the session into the present
+        now = datetime.now()
+        calculator.start_time = now - timedelta(hours=1)
+        app = headless_gui(calculator)
+        if app is None:
+            return {'skipped': 'tkinter unavailable'}
+
+        # The timelines the simulation worker would hand over before and
+        # after a drink is logged
+        changed = calculator.copy()
+        changed.add_drink(now, 'beer_regular')
+        timelines = [calculator.get_bac_timeline(hours=6), changed.get_bac_timeline(hours=6)]
+        app.timeline = timelines[0]
+
+        def change_scenario():
+            app.timeline = timelines[1] if app.timeline is timelines[0] else timelines[0]
+
+        app.draw_timeline()
+        first_calls = app.canvas.calls
+        app.canvas.calls = 0
+        change_scenario()
+        app.draw_timeline()
+        redraw_calls = app.canvas.calls
+        results[f"drinks={drinks}"] = {
+            'draw_timeline.cold': measure(app.draw_timeline, repeat, change_scenario),
+            'draw_timeline.warm': measure(app.draw_timeline, repeat),
+            'canvas_calls.first_draw': first_calls,
+            'canvas_calls.redraw': redraw_calls,
+        }
+    return results
+
+
+def environment() -> dict:
+    """Interpreter, platform and commit the numbers were taken on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': bac_engine.np.__version__ if bac_engine.has_numpy() else None,
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    """Map 'section/scenario/metric' -> fastest per-call seconds"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict) and 'min' in value:
+            flat[path] = value['min']
+        elif isinstance(value, dict):
+            flat.update(flatten(value, path))
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float = 1.25):
+    """Print the current/baseline ratio of every shared timing"""
+    old = flatten(baseline['results'])
+    new = flatten(current['results'])
+    print(f"{'benchmark':<72} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for path in sorted(old.keys() & new.keys()):
+        ratio = new[path] / old[path] if old[path] else float('inf')
+        flag = '  <- slower' if ratio > threshold else ''
+        print(f"{path:<72} {old[path] * 1e3:>8.3f}ms {new[path] * 1e3:>8.3f}ms {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', help='Write JSON results to this file')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing samples per benchmark')
+    parser.add_argument('--quick', action='store_true',
+                        help='Skip the 1000-drink and 200-food scenarios')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Print ratios against an earlier JSON result')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Ratio above which --compare flags a timing as slower')
+    args = parser.parse_args()
+
+    drink_counts = DRINK_COUNTS[:-1] if args.quick else DRINK_COUNTS
+    food_counts = FOOD_COUNTS[:-1] if args.quick else FOOD_COUNTS
+
+    report = {
+        'environment': environment(),
+        'config': {'seed': SEED, 'drinks': drink_counts, 'foods': food_counts,
+                   'horizons': HORIZONS, 'repeat': args.repeat},
+        'results': {
+            'calculator': bench_calculator(drink_counts, food_counts, HORIZONS, args.repeat),
+            'parser': bench_parser(args.repeat),
+            'render': bench_render(drink_counts, args.repeat),
+        },
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Calibration cache tests
+
+Run:
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import bac_engine
+from bac_calculator import BACCalculator
+
+START = datetime(2000, 1, 1, 20, 0)
+
+
+@unittest.skipUnless(bac_engine.has_numpy(), "calibration requires NumPy")
+class CalibratedProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        import bac_calibration
+        self.calibration = bac_calibration
+        self.cache = bac_calibration.CalibrationCache()
+
+        class Calculator(bac_calibration.CalibratedCalculator):
+            calibration_cache = self.cache
+        self.calculator_class = Calculator
+
+    def scenario(self, calculator):
+        calculator.start_time = START
+        calculator.add_drinks({'time': START + timedelta(minutes=m), 'type': 'wine_red'}
+                              for m in (0, 30, 60))
+        return calculator
+
+    def fit_male(self):
+        """Fit male/180/30 to readings from a lighter, slower-eliminating person"""
+        truth = self.scenario(BACCalculator())
+        truth.set_profile('male', 180, 30)
+        truth.set_model_parameters(widmark_ratio=0.62, elimination_rate=0.012)
+        readings = [(START + timedelta(minutes=m), truth.calculate_bac_at_time(START + timedelta(minutes=m)))
+                    for m in range(15, 360, 15)]
+
+        calculator = self.scenario(BACCalculator())
+        calculator.set_profile('male', 180, 30)
+        return self.cache.fit(calculator, readings)
+
+    def test_fitted_profile_gets_its_parameters(self):
+        result = self.fit_male()
+        calculator = self.scenario(self.calculator_class())
+        calculator.set_profile('male', 180, 30)
+
+        parameters = calculator.get_model_parameters()
+        for name in self.calibration.FITTED_PARAMETERS:
+            self.assertAlmostEqual(parameters[name], result.parameters[name])
+        self.assertNotAlmostEqual(parameters['widmark_ratio'], 0.73, places=2)
+
+    def test_switching_to_an_unfitted_profile_restores_defaults(self):
+        self.fit_male()
+        calculator = self.scenario(self.calculator_class())
+        calculator.set_profile('male', 180, 30)
+        calculator.set_profile('female', 120, 25, chronic_drinker=True)
+
+        reference = self.scenario(BACCalculator())
+        reference.set_profile('female', 120, 25, chronic_drinker=True)
+
+        self.assertEqual(calculator.get_model_parameters(), reference.get_model_parameters())
+        self.assertAlmostEqual(calculator.get_model_parameters()['elimination_rate'], 0.018)
+        for name in BACCalculator.MODEL_CONSTANTS:
+            self.assertNotIn(name, vars(calculator))
+        probe = START + timedelta(hours=2)
+        self.assertEqual(calculator.calculate_bac_at_time(probe), reference.calculate_bac_at_time(probe))
+
+    def test_batch_uses_cached_fits(self):
+        import bac_batch
+
+        self.fit_male()
+        profiles = [{'sex': 'male', 'weight_lbs': 180, 'age': 30},
+                    {'sex': 'female', 'weight_lbs': 130, 'age': 40}]
+        scenario = {'start_time': START,
+                    'drinks': [{'time': m, 'type': 'wine_red'} for m in (0, 30, 60)]}
+        result = bac_batch.simulate_population(profiles, [scenario], hours=8, step_minutes=1,
+                                               curves=False, calculator_class=self.calculator_class)
+        plain = bac_batch.simulate_population(profiles, [scenario], hours=8, step_minutes=1,
+                                              curves=False)
+
+        for row, profile in enumerate(profiles):
+            calculator = self.scenario(self.calculator_class())
+            calculator.set_profile(profile['sex'], profile['weight_lbs'], profile['age'])
+            # One-minute samples land within a rounding step of the exact peak
+            self.assertAlmostEqual(result.peak_bac[row, 0], calculator.get_peak_bac(START)[0], delta=2e-4)
+        self.assertNotAlmostEqual(result.peak_bac[0, 0], plain.peak_bac[0, 0], places=3)
+        self.assertEqual(result.peak_bac[1, 0], plain.peak_bac[1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
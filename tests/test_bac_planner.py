@@ -0,0 +1,159 @@
+"""
+Inverse planner tests: answers sit exactly on the feasibility boundary
+
+Run:
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import bac_planner
+from bac_calculator import BACCalculator
+
+START = datetime(2000, 1, 1, 20, 0)
+
+
+def at(minutes: float) -> datetime:
+    return START + timedelta(minutes=minutes)
+
+
+def session() -> BACCalculator:
+    calculator = BACCalculator()
+    calculator.set_profile('female', 140, 32)
+    calculator.start_time = START
+    calculator.add_food(at(10), 'light_meal')
+    calculator.add_drink(at(0), 'beer_regular')
+    calculator.add_drink(at(15), 'wine_red')
+    calculator.add_drink(at(30), 'wine_red')
+    calculator.add_drink(at(30), 'spirits')
+    return calculator
+
+
+def peak_from(calculator: BACCalculator, time: datetime) -> float:
+    return calculator.get_bac_curve().peak((time - calculator.start_time).total_seconds())[0]
+
+
+def with_drinks(calculator: BACCalculator, drink_type: str, times) -> BACCalculator:
+    trial = calculator.copy()
+    for time in times:
+        trial.add_drink(time, drink_type)
+    return trial
+
+
+class MaxAdditionalDrinksTest(unittest.TestCase):
+
+    def check_boundary(self, calculator, threshold, until, start, interval_minutes=0):
+        count = bac_planner.max_additional_drinks(calculator, 'beer_regular', threshold, until=until,
+                                                  start=start, interval_minutes=interval_minutes)
+
+        def times(n):
+            return [start + timedelta(minutes=i * interval_minutes) for i in range(n)]
+        self.assertLessEqual(peak_from(with_drinks(calculator, 'beer_regular', times(count)), until), threshold)
+        self.assertGreater(peak_from(with_drinks(calculator, 'beer_regular', times(count + 1)), until), threshold)
+        return count
+
+    def test_by_a_later_time(self):
+        calculator = session()
+        count = self.check_boundary(calculator, 0.08, until=at(420), start=at(120))
+        self.assertGreater(count, 0)
+        self.assertEqual(len(calculator.drinks_timeline), 4)  # Left unchanged
+
+    def test_spaced_drinks(self):
+        together = self.check_boundary(session(), 0.12, until=at(60), start=at(60))
+        spaced = self.check_boundary(session(), 0.12, until=at(60), start=at(60), interval_minutes=45)
+        self.assertGreaterEqual(spaced, together)
+
+    def test_matches_a_linear_scan(self):
+        calculator = session()
+        for threshold in (0.03, 0.06, 0.1, 0.2):
+            count = bac_planner.max_additional_drinks(calculator, 'beer_regular', threshold,
+                                                      until=at(120), start=at(45), interval_minutes=20)
+            scan = 0
+            while peak_from(with_drinks(calculator, 'beer_regular',
+                                        [at(45 + 20 * i) for i in range(scan + 1)]), at(120)) <= threshold:
+                scan += 1
+            self.assertEqual(count, scan, threshold)
+
+    def test_already_over(self):
+        self.assertEqual(bac_planner.max_additional_drinks(session(), 'spirits', 0.01,
+                                                           until=at(30), start=at(40)), 0)
+
+    def test_limit(self):
+        self.assertEqual(bac_planner.max_additional_drinks(session(), 'beer_light', 10.0,
+                                                           start=at(60), limit=7), 7)
+
+
+class EarliestSafeDrinkTimeTest(unittest.TestCase):
+
+    def check_boundary(self, calculator, threshold, until=None, after=at(40)):
+        time = bac_planner.earliest_safe_drink_time(calculator, 'wine_red', threshold,
+                                                    until=until, after=after)
+        self.assertIsNotNone(time)
+        earlier = time - timedelta(seconds=bac_planner.TIME_RESOLUTION)
+        self.assertLessEqual(peak_from(with_drinks(calculator, 'wine_red', [time]), until or time), threshold)
+        self.assertGreater(peak_from(with_drinks(calculator, 'wine_red', [earlier]), until or earlier),
+                           threshold)
+        return time
+
+    def test_constraint_from_the_drink_on(self):
+        time = self.check_boundary(session(), 0.05)
+        self.assertGreater(time, at(40))
+
+    def test_constraint_from_a_fixed_time(self):
+        calculator = session()
+        time = self.check_boundary(calculator, 0.04, until=at(360))
+        self.assertGreater(time, at(40))
+
+    def test_already_safe(self):
+        self.assertEqual(bac_planner.earliest_safe_drink_time(session(), 'beer_light', 0.2, after=at(40)),
+                         at(40))
+
+    def test_never_safe(self):
+        calculator = session()
+        calculator.set_model_parameters(elimination_rate=0.0)
+        self.assertIsNone(bac_planner.earliest_safe_drink_time(calculator, 'wine_red', 0.03, after=at(40)))
+
+
+class EarliestTimeUnderTest(unittest.TestCase):
+
+    def check_boundary(self, calculator, threshold, from_time):
+        time = bac_planner.earliest_time_under(calculator, threshold, from_time)
+        curve = calculator.get_bac_curve()
+        offset = (time - calculator.start_time).total_seconds()
+        self.assertLessEqual(peak_from(calculator, time), threshold)
+        self.assertGreater(curve.value(offset - bac_planner.TIME_RESOLUTION), threshold)
+        return time
+
+    def test_single_session(self):
+        calculator = session()
+        for threshold in (0.05, 0.02, 0.0):
+            time = self.check_boundary(calculator, threshold, at(0))
+            self.assertGreater(time, at(30))
+
+    def test_later_drink_pushes_it_back(self):
+        calculator = session()
+        first = bac_planner.earliest_time_under(calculator, 0.02, at(0))
+        calculator.add_drink(first + timedelta(minutes=30), 'spirits')
+        time = self.check_boundary(calculator, 0.02, at(0))
+        self.assertGreater(time, first + timedelta(minutes=30))
+
+    def test_already_under(self):
+        calculator = session()
+        later = bac_planner.earliest_time_under(calculator, 0.0, at(0)) + timedelta(minutes=5)
+        self.assertEqual(bac_planner.earliest_time_under(calculator, 0.0, later), later)
+
+    def test_never_under(self):
+        calculator = session()
+        calculator.set_model_parameters(elimination_rate=0.0)
+        self.assertIsNone(bac_planner.earliest_time_under(calculator, 0.02, at(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
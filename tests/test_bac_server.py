@@ -0,0 +1,231 @@
+"""
+BAC service tests: operations, validation and the HTTP front end
+
+Run:
+    python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import bac_server
+from bac_calculator import BACCalculator
+
+START = datetime(2000, 1, 1, 20, 0)
+
+
+def iso(minutes: float) -> str:
+    return (START + timedelta(minutes=minutes)).isoformat()
+
+
+class ServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = bac_server.BACService(bac_server.SessionPool())
+
+    def run_ops(self, *requests, session='s1'):
+        results = self.service.execute_all([dict(request, session=session) for request in requests])
+        for request, result in zip(requests, results):
+            self.assertNotIn('error', result, request)
+        return results
+
+    def setup_session(self):
+        return self.run_ops(
+            {'op': 'profile', 'sex': 'female', 'weight_lbs': 135, 'age': 26},
+            {'op': 'start', 'start_time': iso(0)},
+            {'op': 'drink', 'type': 'wine_red', 'time': iso(0)},
+            {'op': 'drinks', 'drinks': [{'type': 'beer_regular', 'time': iso(40), 'quantity': 2},
+                                        {'type': 'spirits', 'time': iso(20)}]},
+            {'op': 'food', 'type': 'light_meal', 'time': iso(30)},
+        )
+
+    def reference(self):
+        calculator = BACCalculator()
+        calculator.set_profile('female', 135, 26)
+        calculator.start_time = START
+        calculator.add_drink(START, 'wine_red')
+        calculator.add_drink(START + timedelta(minutes=40), 'beer_regular', quantity=2)
+        calculator.add_drink(START + timedelta(minutes=20), 'spirits')
+        calculator.add_food(START + timedelta(minutes=30), 'light_meal')
+        return calculator
+
+    def test_operations_match_the_calculator(self):
+        results = self.setup_session()
+        self.assertEqual(results[3], {'drinks': 4})
+        self.assertEqual(results[4], {'foods': 1})
+
+        reference = self.reference()
+        probe = START + timedelta(hours=2)
+        bac, peak, sober, legal = self.run_ops(
+            {'op': 'bac', 'time': probe.isoformat()},
+            {'op': 'peak', 'from_time': iso(0)},
+            {'op': 'sober', 'from_time': iso(0)},
+            {'op': 'legal_limit', 'from_time': iso(0)},
+        )
+        self.assertEqual(bac['bac'], reference.calculate_bac_at_time(probe))
+        self.assertEqual(bac['impairment'], reference.get_impairment_level(bac['bac']))
+        self.assertEqual((peak['peak_bac'], peak['peak_time']), reference.get_peak_bac(START))
+        delta = reference.get_time_to_sobriety(from_time=START)
+        self.assertEqual(sober, {'seconds_from_start': delta.total_seconds(), 'time': START + delta})
+        self.assertEqual(legal['seconds_from_start'],
+                         reference.get_time_to_legal_limit(START).total_seconds())
+
+    def test_timeline(self):
+        self.setup_session()
+        timeline, = self.run_ops({'op': 'timeline', 'hours': 3, 'from_now': False})
+        expected = self.reference().get_bac_timeline(hours=3, from_now=False)
+        self.assertEqual(timeline['times'], [t for t, _ in expected])
+        self.assertEqual(timeline['bac'], [b for _, b in expected])
+
+    def test_never_sober_reports_none(self):
+        self.setup_session()
+        self.service.pool.get('s1').set_model_parameters(elimination_rate=0.0)
+        sober, = self.run_ops({'op': 'sober', 'from_time': iso(0)})
+        self.assertEqual(sober, {'seconds_from_start': None, 'time': None})
+
+    def test_sessions_are_separate_and_closable(self):
+        self.setup_session()
+        other, = self.run_ops({'op': 'drinks', 'drinks': []}, session='s2')
+        self.assertEqual(other, {'drinks': 0})
+
+        self.assertEqual(self.run_ops({'op': 'reset'}), [{'reset': True}])
+        self.assertEqual(len(self.service.pool.get('s1').drinks_timeline), 0)
+        self.assertEqual(self.service.execute({'session': 's1', 'op': 'close'}), {'closed': True})
+        self.assertEqual(self.service.execute({'session': 's1', 'op': 'close'}), {'closed': False})
+
+    def test_offset_times_become_local(self):
+        result, = self.run_ops({'op': 'start', 'start_time': '2000-01-01T20:00:00+00:00'})
+        expected = datetime(2000, 1, 1, 20, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        self.assertEqual(result['start_time'], expected)
+
+    def test_batch_keeps_order_and_isolates_errors(self):
+        results = self.service.execute_all([
+            {'session': 's1', 'op': 'drink', 'type': 'beer_regular', 'time': iso(0)},
+            {'session': 's1', 'op': 'explode'},
+            {'session': 's1', 'op': 'drink', 'type': 'beer_regular', 'time': iso(10)},
+        ])
+        self.assertEqual(results[0], {'drinks': 1})
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2], {'drinks': 2})
+
+    def test_invalid_requests(self):
+        cases = [
+            ['not an object', 'JSON object'],
+            [{'op': 'bac'}, "Missing 'session'"],
+            [{'session': '', 'op': 'bac'}, "Missing 'session'"],
+            [{'session': 's', 'op': 'nope'}, 'Unknown op'],
+            [{'session': 's', 'op': 'profile'}, 'weight_lbs'],
+            [{'session': 's', 'op': 'profile', 'weight_lbs': 'heavy'}, 'weight_lbs must be a number'],
+            [{'session': 's', 'op': 'profile', 'weight_lbs': 150, 'age': 30.5}, 'whole number'],
+            [{'session': 's', 'op': 'profile', 'weight_lbs': 0}, 'at least'],
+            [{'session': 's', 'op': 'profile', 'weight_lbs': 150, 'chronic_drinker': 'no'}, 'true or false'],
+            [{'session': 's', 'op': 'start', 'start_time': 'yesterday'}, 'Invalid time'],
+            [{'session': 's', 'op': 'drink'}, 'Missing field'],
+            [{'session': 's', 'op': 'drink', 'type': 7}, 'type must be a string'],
+            [{'session': 's', 'op': 'drink', 'type': 'beer', 'quantity': True}, 'quantity must be a number'],
+            [{'session': 's', 'op': 'drink', 'type': 'beer', 'quantity': bac_server.MAX_QUANTITY + 1}, 'at most'],
+            [{'session': 's', 'op': 'drink', 'type': 'beer', 'alcohol_percent': 101}, 'at most'],
+            [{'session': 's', 'op': 'drinks', 'drinks': ['beer']}, 'JSON object'],
+            [{'session': 's', 'op': 'foods', 'foods': [{'time': iso(0)}]}, 'Missing field'],
+            [{'session': 's', 'op': 'timeline', 'hours': bac_server.MAX_TIMELINE_HOURS + 1}, 'at most'],
+            [{'session': 's', 'op': 'timeline', 'hours': float('nan')}, 'must be a number'],
+            [{'session': 's', 'op': 'timeline', 'tolerance': 0}, 'tolerance must be at least'],
+            [{'session': 's', 'op': 'timeline', 'from_now': 'false'}, 'from_now must be true or false'],
+            [{'session': 's', 'op': 'timeline', 'from_now': 0}, 'from_now must be true or false'],
+            [{'session': 's', 'op': 'sober', 'threshold': -1}, 'at least'],
+        ]
+        for request, message in cases:
+            result = self.service.execute(request)
+            self.assertIn('error', result, request)
+            self.assertIn(message, result['error'], request)
+
+
+class SessionPoolTest(unittest.TestCase):
+
+    def test_least_recently_used_session_is_dropped(self):
+        pool = bac_server.SessionPool(max_sessions=2)
+        first = pool.get('a')
+        pool.get('b')
+        self.assertIs(pool.get('a'), first)  # 'a' is now the most recent
+        pool.get('c')
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.evicted, 1)
+        self.assertIs(pool.get('a'), first)
+        self.assertFalse(pool.close('b'))
+
+    def test_idle_sessions_are_evicted(self):
+        pool = bac_server.SessionPool(idle_seconds=0)
+        pool.get('a')
+        pool.get('b')
+        self.assertEqual(pool.evict_idle(), 2)
+        self.assertEqual(len(pool), 0)
+
+        pool.idle_seconds = 3600
+        pool.get('c')
+        self.assertEqual(pool.evict_idle(), 0)
+
+    def test_calculator_class(self):
+        class Calculator(BACCalculator):
+            pass
+        pool = bac_server.SessionPool(calculator_class=Calculator)
+        self.assertIsInstance(pool.get('a'), Calculator)
+
+
+class HTTPTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = bac_server.BACServer(bac_server.BACService(bac_server.SessionPool()))
+
+    def test_route_status(self):
+        route = self.server.route
+        self.assertEqual(route('GET', '/health', b'')[0], '200 OK')
+        self.assertEqual(route('GET', '/', b'')[0], '405 Method Not Allowed')
+        self.assertEqual(route('POST', '/', b'{not json')[0], '400 Bad Request')
+        self.assertEqual(route('POST', '/', b'{"op": "bac"}')[0], '400 Bad Request')
+        status, payload = route('POST', '/', json.dumps([{'session': 'a', 'op': 'reset'},
+                                                         {'op': 'reset'}]).encode())
+        self.assertEqual(status, '200 OK')  # Batches report errors per operation
+        self.assertEqual(payload[0], {'reset': True})
+        self.assertIn('error', payload[1])
+
+    def test_keep_alive_connection(self):
+        async def exchange():
+            listener = await asyncio.start_server(self.server.handle, '127.0.0.1', 0)
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = []
+            for payload in ({'session': 'a', 'op': 'start', 'start_time': iso(0)},
+                            {'session': 'a', 'op': 'bac', 'time': iso(30)}):
+                body = json.dumps(payload).encode()
+                writer.write(b'POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+                responses.append((head.split(b'\r\n')[0], json.loads(await reader.readexactly(length))))
+
+            writer.write(b'POST / HTTP/1.1\r\nContent-Length: -5\r\n\r\n')
+            head = await reader.readuntil(b'\r\n\r\n')
+            responses.append((head.split(b'\r\n')[0], None))
+            self.assertEqual(await reader.read(), b'{"error": "Bad Content-Length"}')
+
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            return responses
+
+        responses = asyncio.run(exchange())
+        self.assertEqual(responses[0], (b'HTTP/1.1 200 OK', {'start_time': iso(0)}))
+        self.assertEqual(responses[1][0], b'HTTP/1.1 200 OK')
+        self.assertEqual(responses[1][1]['bac'], 0.0)
+        self.assertEqual(responses[2][0], b'HTTP/1.1 400 Bad Request')
+
+
+if __name__ == '__main__':
+    unittest.main()
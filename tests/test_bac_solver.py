@@ -0,0 +1,122 @@
+"""
+Analytic solver tests: peaks and crossings against a dense BAC grid
+
+Run:
+    python -m pytest tests
+"""
+import math
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+from bac_calculator import BACCalculator
+
+START = datetime(2000, 1, 1, 20, 0)
+
+# Grid spacing (seconds) and span (hours) of the brute-force reference
+STEP = 30
+HOURS = 16
+
+
+def session():
+    """Drinks on and off food, with a gap long enough to sober up in between"""
+    calculator = BACCalculator()
+    calculator.set_profile('female', 140, 28)
+    calculator.start_time = START
+    calculator.add_food(START + timedelta(minutes=20), 'moderate_meal')
+    for minutes, drink in ((0, 'wine_red'), (15, 'wine_red'), (50, 'beer_regular'),
+                           (70, 'beer_regular'), (540, 'wine_red')):
+        calculator.add_drink(START + timedelta(minutes=minutes), drink)
+    return calculator
+
+
+class SolverGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calculator = session()
+        self.curve = self.calculator.get_bac_curve()
+        self.offsets = [i * STEP for i in range(HOURS * 3600 // STEP + 1)]
+        self.values = [self.curve.value(t) for t in self.offsets]
+
+    def first_offset(self, predicate, after=0.0):
+        return next(t for t, bac in zip(self.offsets, self.values) if t >= after and predicate(bac))
+
+    def test_curve_matches_calculator(self):
+        for t, bac in zip(self.offsets[::10], self.values[::10]):
+            self.assertEqual(round(bac, 4),
+                             self.calculator.calculate_bac_at_time(START + timedelta(seconds=t)))
+
+    def test_peak(self):
+        peak_bac, peak_time = self.calculator.get_peak_bac(START)
+        grid = [self.calculator.calculate_bac_at_time(START + timedelta(seconds=t))
+                for t in self.offsets]
+
+        self.assertGreaterEqual(peak_bac, max(grid))
+        self.assertAlmostEqual(peak_bac, max(grid), delta=1e-4)
+        self.assertEqual(self.calculator.calculate_bac_at_time(peak_time), peak_bac)
+
+    def test_peak_after_a_later_start(self):
+        # Once sober after the first session, the only peak left is the last drink's
+        after = 8.75 * 3600
+        peak_bac, peak_offset = self.curve.peak(after)
+        later = [bac for t, bac in zip(self.offsets, self.values) if t >= after]
+        self.assertGreaterEqual(peak_offset, 9 * 3600)
+        self.assertGreaterEqual(peak_bac, max(later))
+        self.assertAlmostEqual(peak_bac, max(later), delta=1e-5)
+
+    def test_legal_limit_crossing(self):
+        crossing = self.curve.time_above(0.0, 0.08)
+        grid = self.first_offset(lambda bac: bac >= 0.08)
+        self.assertLessEqual(crossing, grid)
+        self.assertGreater(crossing, grid - STEP)
+        self.assertEqual(self.calculator.get_time_to_legal_limit(START), timedelta(seconds=crossing))
+
+    def test_sobriety_between_sessions(self):
+        crossing = self.curve.time_below(0.0, 0.0)
+        grid = self.first_offset(lambda bac: bac <= 0.0)
+        self.assertLess(crossing, 9 * 3600)
+        self.assertLessEqual(crossing, grid)
+        self.assertGreater(crossing, grid - STEP)
+        self.assertEqual(self.calculator.get_time_to_sobriety(from_time=START),
+                         timedelta(seconds=crossing))
+
+    def test_threshold_crossings_after_the_peak(self):
+        _, peak_offset = self.curve.peak(0.0)
+        for threshold in (0.06, 0.03, 0.01):
+            crossing = self.curve.time_below(peak_offset, threshold)
+            grid = self.first_offset(lambda bac: bac <= threshold, after=peak_offset)
+            self.assertLessEqual(crossing, grid)
+            self.assertGreater(crossing, grid - STEP)
+
+    def test_threshold_never_reached(self):
+        self.assertIsNone(self.curve.time_above(0.0, 0.5))
+        self.assertIsNone(self.calculator.get_time_to_legal_limit(START + timedelta(hours=12)))
+
+
+class ZeroEliminationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calculator = session()
+        self.calculator.set_model_parameters(elimination_rate=0.0)
+        self.curve = self.calculator.get_bac_curve()
+
+    def test_never_sober(self):
+        self.assertTrue(math.isinf(self.curve.time_below(0.0, 0.0)))
+        self.assertTrue(math.isinf(self.curve.time_below(10 * 3600, 0.01)))
+        self.assertIsNone(self.calculator.get_time_to_sobriety(from_time=START))
+
+    def test_plateau_peak(self):
+        values = [self.curve.value(t) for t in range(0, HOURS * 3600 + 1, STEP)]
+        self.assertEqual(values, sorted(values))  # Only ever rises
+        peak_bac, _ = self.curve.peak(0.0)
+        self.assertGreaterEqual(peak_bac, values[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
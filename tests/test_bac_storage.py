@@ -0,0 +1,150 @@
+"""
+Scenario store tests: SQLite save/load round trips
+
+Run:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+from bac_calculator import BACCalculator
+from bac_storage import ScenarioStore
+
+START = datetime(2000, 1, 1, 20, 0)
+
+
+def at(minutes: float) -> datetime:
+    return START + timedelta(minutes=minutes)
+
+
+EVENTS = [
+    {'kind': 'drink', 'time': at(0), 'type': 'wine_red'},
+    {'kind': 'food', 'time': at(25), 'type': 'full_meal'},
+    {'kind': 'drink', 'time': at(10), 'type': 'beer_regular', 'quantity': 2},
+    {'kind': 'drink', 'time': at(90), 'type': 'house_special', 'size_oz': 8, 'alcohol_percent': 9.5},
+    {'kind': 'food', 'time': at(120), 'type': 'light_snack'},
+]
+
+
+def reference() -> BACCalculator:
+    calculator = BACCalculator()
+    calculator.set_profile('female', 128.5, 33, chronic_drinker=True)
+    calculator.start_time = START
+    calculator.add_events(dict(event) for event in EVENTS)
+    return calculator
+
+
+class ScenarioStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scenarios.db')
+        self.store = ScenarioStore(self.path, batch_size=2)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def save(self, session='alice'):
+        self.store.save_profile(session, reference())
+        self.store.add_events(session, EVENTS)
+
+    def assertSameScenario(self, calculator, expected):
+        self.assertEqual(calculator.profile, expected.profile)
+        self.assertEqual(calculator.start_time, expected.start_time)
+        self.assertEqual(list(calculator.drinks_timeline), list(expected.drinks_timeline))
+        self.assertEqual(list(calculator.food_timeline), list(expected.food_timeline))
+        for minutes in range(0, 480, 15):
+            self.assertEqual(calculator.calculate_bac_at_time(at(minutes)),
+                             expected.calculate_bac_at_time(at(minutes)))
+
+    def test_round_trip(self):
+        self.save()
+        self.assertSameScenario(self.store.load('alice'), reference())
+
+    def test_survives_reopening(self):
+        self.save()
+        self.store.close()
+        self.store = ScenarioStore(self.path)
+        self.assertEqual(self.store.sessions(), ['alice'])
+        self.assertSameScenario(self.store.load('alice'), reference())
+
+    def test_single_event_helpers(self):
+        self.store.save_profile('bob', reference())
+        self.store.add_drink('bob', at(0), 'spirits', quantity=3)
+        self.store.add_food('bob', at(5), 'pizza')
+
+        expected = reference()
+        expected.clear_scenario()
+        expected.start_time = START
+        expected.add_drink(at(0), 'spirits', quantity=3)
+        expected.add_food(at(5), 'pizza')
+        self.assertSameScenario(self.store.load('bob'), expected)
+
+    def test_events_come_back_sorted_and_ranged(self):
+        self.save()
+        times = [event['time'] for event in self.store.iter_events('alice')]
+        self.assertEqual(times, sorted(event['time'] for event in EVENTS))
+
+        ranged = list(self.store.iter_events('alice', since=at(10), until=at(90)))
+        self.assertEqual([(e['kind'], e['time']) for e in ranged], [('drink', at(10)), ('food', at(25))])
+        self.assertEqual(ranged[0]['quantity'], 2)
+        self.assertNotIn('quantity', ranged[1])
+
+    def test_unflushed_events_are_read(self):
+        store = ScenarioStore(':memory:', batch_size=100)
+        store.save_profile('alice', reference())
+        store.add_events('alice', EVENTS)
+        self.assertEqual(len(store._pending), len(EVENTS))
+        self.assertEqual(len(list(store.iter_events('alice'))), len(EVENTS))
+        self.assertEqual(store._pending, [])
+        store.close()
+
+    def test_empty_and_unknown_sessions(self):
+        self.store.save_profile('empty', reference())
+        calculator = self.store.load('empty')
+        self.assertEqual(len(calculator.drinks_timeline), 0)
+        self.assertEqual(len(calculator.food_timeline), 0)
+        self.assertEqual(calculator.calculate_bac_at_time(at(30)), 0.0)
+        self.assertIsNone(self.store.load('nobody'))
+
+    def test_profile_is_replaced(self):
+        self.save()
+        calculator = reference()
+        calculator.set_profile('male', 200, 40)
+        calculator.start_time = at(-30)
+        self.store.save_profile('alice', calculator)
+
+        loaded = self.store.load('alice')
+        self.assertEqual(loaded.profile, calculator.profile)
+        self.assertEqual(loaded.start_time, at(-30))
+        self.assertEqual(len(loaded.drinks_timeline), 4)
+
+    def test_clear_and_delete(self):
+        self.save('alice')
+        self.save('bob')
+        self.store.clear_events('alice')
+        self.assertEqual(list(self.store.iter_events('alice')), [])
+        self.assertEqual(self.store.sessions(), ['alice', 'bob'])
+
+        self.store.delete('bob')
+        self.assertEqual(self.store.sessions(), ['alice'])
+        self.assertEqual(list(self.store.iter_events('bob')), [])
+
+    def test_calculator_class(self):
+        class Calculator(BACCalculator):
+            pass
+        self.save()
+        self.assertIsInstance(self.store.load('alice', calculator_class=Calculator), Calculator)
+
+
+if __name__ == '__main__':
+    unittest.main()
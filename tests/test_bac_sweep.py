@@ -0,0 +1,184 @@
+"""
+Parameter sweep and sensitivity tests
+
+Run:
+    python -m pytest tests
+"""
+import itertools
+import math
+import os
+import sys
+import unittest
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import bac_engine
+from bac_calculator import BACCalculator
+
+HOURS = 12
+STEP_MINUTES = 5
+
+
+def sampled_metrics(calculator):
+    """(peak, hours to peak, hours to first zero after the peak) on the sweep's time grid"""
+    offsets = bac_engine.time_grid(HOURS, STEP_MINUTES)
+    values = [float(v) for v in calculator.calculate_bac_at_offsets(offsets)]
+    peak_index = max(range(len(values)), key=values.__getitem__)
+    sober = next((i for i in range(peak_index, len(values)) if values[i] <= 0), None)
+    hours = [float(t) / 3600 for t in offsets]
+    return values[peak_index], hours[peak_index], hours[sober] if sober is not None else math.nan
+
+
+class FemaleAdjusted(BACCalculator):
+    """Per-profile constants for women only, as a calibrated calculator would give"""
+
+    @classmethod
+    def profile_model_parameters(cls, profile):
+        if profile['sex'] == 'female':
+            return {'widmark_ratio': 0.55, 'absorption_time_empty': 25.0}
+        return {}
+
+    def set_profile(self, sex, weight_lbs, age=30, chronic_drinker=False):
+        super().set_profile(sex, weight_lbs, age, chronic_drinker)
+        self.reset_model_parameters()
+        self.set_model_parameters(**self.profile_model_parameters(self.profile))
+
+
+@unittest.skipUnless(bac_engine.has_numpy(), "sweeps require NumPy")
+class SweepTest(unittest.TestCase):
+
+    def setUp(self):
+        import bac_sweep
+        self.sweep = bac_sweep
+
+    def check_against_points(self, result, calculator_class=BACCalculator, base=None):
+        for values in itertools.product(*(result.coords[dim] for dim in result.dims)):
+            labels = dict(zip(result.dims, values))
+            calculator = self.sweep.point_calculator(dict(base or {}, **labels), calculator_class)
+            peak, to_peak, to_sober = sampled_metrics(calculator)
+            self.assertAlmostEqual(float(result.sel('peak_bac', **labels)), peak, delta=1e-4, msg=labels)
+            self.assertAlmostEqual(float(result.sel('time_to_peak', **labels)), to_peak,
+                                   delta=STEP_MINUTES / 60 + 1e-9, msg=labels)
+            swept_sober = float(result.sel('time_to_sober', **labels))
+            if math.isnan(to_sober):
+                self.assertTrue(math.isnan(swept_sober), labels)
+            else:
+                self.assertAlmostEqual(swept_sober, to_sober, delta=STEP_MINUTES / 60 + 1e-9, msg=labels)
+
+    def test_grid_matches_point_calculators(self):
+        grid = {'drinks': [1, 3, 6], 'sex': ['male', 'female'], 'food_type': ['empty_stomach', 'full_meal'],
+                'weight_lbs': [130, 190]}
+        result = self.sweep.sweep(grid, base={'duration_hours': 1.5, 'food_minutes': 20},
+                                  hours=HOURS, step_minutes=STEP_MINUTES)
+        self.assertEqual(result.dims, ('drinks', 'sex', 'food_type', 'weight_lbs'))
+        self.assertEqual(result.peak_bac.shape, (3, 2, 2, 2))
+        self.check_against_points(result, base={'duration_hours': 1.5, 'food_minutes': 20})
+
+    def test_model_constants_and_profile_overrides(self):
+        grid = {'sex': ['male', 'female'], 'absorption_time_fed': [None, 60.0],
+                'elimination_rate': [None, 0.01]}
+        base = {'food_type': 'light_meal', 'food_minutes': 30}
+        result = self.sweep.sweep(grid, base=base, hours=HOURS, step_minutes=STEP_MINUTES,
+                                  calculator_class=FemaleAdjusted)
+        self.check_against_points(result, FemaleAdjusted, base)
+
+        plain = self.sweep.sweep(grid, base=base, hours=HOURS, step_minutes=STEP_MINUTES)
+        self.assertTrue((result.sel('peak_bac', sex='male') == plain.sel('peak_bac', sex='male')).all())
+        self.assertFalse((result.sel('peak_bac', sex='female') == plain.sel('peak_bac', sex='female')).all())
+
+    def test_never_sober_within_the_horizon(self):
+        result = self.sweep.sweep({'elimination_rate': [0.0, 0.015]}, hours=HOURS,
+                                  step_minutes=STEP_MINUTES)
+        self.assertTrue(math.isnan(result.time_to_sober[0]))
+        self.assertFalse(math.isnan(result.time_to_sober[1]))
+
+    def test_gradient(self):
+        weights = [120, 150, 180, 210]
+        result = self.sweep.sweep({'weight_lbs': weights}, hours=HOURS, step_minutes=STEP_MINUTES)
+        gradient = result.gradient('peak_bac', 'weight_lbs')
+        self.assertEqual(gradient.shape, (4,))
+        self.assertTrue((gradient < 0).all())
+        self.assertAlmostEqual(gradient[1], (result.peak_bac[2] - result.peak_bac[0]) / 60)
+
+        single = self.sweep.sweep({'weight_lbs': [150]}, hours=HOURS)
+        with self.assertRaises(ValueError):
+            single.gradient('peak_bac', 'weight_lbs')
+
+    def test_unknown_parameters(self):
+        with self.assertRaises(ValueError):
+            self.sweep.sweep({'wieght_lbs': [150]})
+        with self.assertRaises(ValueError):
+            self.sweep.sweep({'weight_lbs': [150]}, base={'drink': 'beer'})
+        with self.assertRaises(ValueError):
+            self.sweep.point_calculator({'drinkz': 2})
+
+
+class SensitivityTest(unittest.TestCase):
+
+    def setUp(self):
+        import bac_sweep
+        self.sweep = bac_sweep
+        self.point = {'weight_lbs': 160, 'drinks': 4, 'duration_hours': 1.0}
+
+    def test_envelope_gradients(self):
+        # With S = 5.14 / (W r), the peak value S A(t*) - E t* gives
+        # d peak / d W = -S A(t*) / W and the same over r for the ratio
+        calculator = self.sweep.point_calculator(self.point)
+        curve = calculator.get_bac_curve()
+        peak, peak_offset = curve.peak(0.0)
+        absorbed = peak + calculator.get_elimination_rate() * peak_offset / 3600
+        ratio = calculator.get_model_parameters()['widmark_ratio']
+
+        gradients = self.sweep.sensitivity(self.point, ['weight_lbs', 'widmark_ratio'],
+                                           relative_step=1e-4)
+        self.assertAlmostEqual(gradients['weight_lbs']['peak_bac'] / (-absorbed / 160), 1.0, places=3)
+        self.assertAlmostEqual(gradients['widmark_ratio']['peak_bac'] / (-absorbed / ratio), 1.0, places=3)
+
+    def test_signs(self):
+        gradients = self.sweep.sensitivity(self.point)
+        self.assertEqual(set(gradients), set(self.sweep.NUMERIC_PARAMETERS))
+        self.assertLess(gradients['weight_lbs']['peak_bac'], 0)
+        self.assertLess(gradients['weight_lbs']['time_to_sober'], 0)
+        self.assertGreater(gradients['drinks']['peak_bac'], 0)
+        self.assertGreater(gradients['drinks']['time_to_sober'], 0)
+        self.assertLess(gradients['elimination_rate']['time_to_sober'], 0)
+        self.assertLess(gradients['duration_hours']['peak_bac'], 0)
+        self.assertGreater(gradients['immediate_absorption']['peak_bac'], 0)
+
+    def test_step_refinement_converges(self):
+        coarse = self.sweep.sensitivity(self.point, ['elimination_rate', 'absorption_time_empty'])
+        fine = self.sweep.sensitivity(self.point, ['elimination_rate', 'absorption_time_empty'],
+                                      relative_step=1e-3)
+        for name in coarse:
+            for metric in ('peak_bac', 'time_to_sober'):
+                self.assertAlmostEqual(coarse[name][metric], fine[name][metric],
+                                       delta=1e-3 * abs(fine[name][metric]) + 1e-12)
+
+    def test_single_drink_uses_a_forward_difference(self):
+        gradients = self.sweep.sensitivity(dict(self.point, drinks=1), ['drinks'])
+        one = self.sweep._metrics(self.sweep.point_calculator(dict(self.point, drinks=1)))
+        two = self.sweep._metrics(self.sweep.point_calculator(dict(self.point, drinks=2)))
+        self.assertAlmostEqual(gradients['drinks']['peak_bac'], two[0] - one[0])
+
+    def test_calculator_class_center(self):
+        female = dict(self.point, sex='female')
+        gradients = self.sweep.sensitivity(female, ['widmark_ratio'], relative_step=1e-4,
+                                           calculator_class=FemaleAdjusted)
+        calculator = self.sweep.point_calculator(female, FemaleAdjusted)
+        peak, peak_offset = calculator.get_bac_curve().peak(0.0)
+        absorbed = peak + calculator.get_elimination_rate() * peak_offset / 3600
+        # Differentiated about the class's 0.55, not the default ratio
+        self.assertAlmostEqual(gradients['widmark_ratio']['peak_bac'] / (-absorbed / 0.55), 1.0, places=3)
+
+    def test_rejects_non_numeric_parameters(self):
+        with self.assertRaises(ValueError):
+            self.sweep.sensitivity(self.point, ['sex'])
+        with self.assertRaises(ValueError):
+            self.sweep.sensitivity({'weight': 150})
+
+
+if __name__ == '__main__':
+    unittest.main()
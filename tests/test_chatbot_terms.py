@@ -0,0 +1,126 @@
+"""
+Chatbot term scanning tests: parity with the substring-loop parser
+
+Run:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+import unittest
+from datetime import datetime
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import chatbot
+
+NOW = datetime(2000, 1, 1, 22, 0)
+
+PHRASES = [
+    "I had 2 beers",
+    "just finished a glass of red wine",
+    "3 shots of tequila",
+    "a margarita at 12%",
+    "one bud light",
+    "had a guinness and some water",
+    "two IPAs with my pizza",
+    "a vodka soda",
+    "white wine then a light beer",
+    "regular beer, domestic beer, pbr",
+    "ipa beer and a stout",
+    "a gin martini after dinner",
+    "rum punch",
+    "nothing to drink yet",
+    "I haven't eaten since breakfast",
+    "on an empty stomach",
+    "a big meal and fries",
+    "full meal at the steakhouse",
+    "salad and soup",
+    "crackers, chips and nuts",
+    "high-fat fast food",
+    "ate a while ago",
+    "had some food",
+    "I'm 30 years old",
+    "",
+    "BEER!!!",
+    "Red Wine at 7pm",
+]
+
+
+def first(table, text_lower):
+    """The pre-scanner lookup: first key, in table order, with a term in the text"""
+    for key, terms in table.items():
+        for term in terms:
+            if term in text_lower:
+                return key
+    return None
+
+
+def reference_drink(text):
+    return first(chatbot.DRINK_TERMS, text.lower())
+
+
+def reference_food(text):
+    text_lower = text.lower()
+    food = first(chatbot.FOOD_TERMS, text_lower)
+    if food is None and any(word in text_lower for word in chatbot.FOOD_FALLBACK):
+        return 'light_meal'
+    return food
+
+
+class TermScannerParityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bot = chatbot.BACChatbot()
+
+    def check(self, text):
+        text_lower = text.lower()
+        self.assertEqual(self.bot.parse_drink(text)[0], reference_drink(text), text)
+        self.assertEqual(self.bot.parse_food(text), reference_food(text), text)
+
+        entities = self.bot.extract_entities(text, NOW)
+        self.assertEqual(entities['drink_type'], reference_drink(text), text)
+        self.assertEqual(entities['food_type'], reference_food(text), text)
+        self.assertEqual(entities['mentions_drink'],
+                         any(word in text_lower for word in chatbot.DRINK_MENTIONS), text)
+        self.assertEqual(entities['mentions_food'],
+                         any(word in text_lower for word in chatbot.FOOD_MENTIONS), text)
+
+    def test_phrase_corpus(self):
+        for text in PHRASES:
+            self.check(text)
+
+    def test_overlapping_terms(self):
+        # Terms that are prefixes of, or overlap, higher- and lower-priority terms
+        for text in ("ipa beer", "light beer", "white wine", "red wine", "mixed drink",
+                     "full meal", "light meal", "fast food", "no food", "shots", "whiskeys",
+                     "redwine", "beerwine", "lite beers", "ginger ale", "rumble", "hadn't"):
+            self.check(text)
+
+    def test_random_term_mixtures(self):
+        rng = random.Random(3)
+        vocabulary = [term for table in (chatbot.DRINK_TERMS, chatbot.FOOD_TERMS)
+                      for terms in table.values() for term in terms]
+        vocabulary += chatbot.DRINK_MENTIONS + chatbot.FOOD_MENTIONS + chatbot.FOOD_FALLBACK
+        vocabulary += ['and', 'a', 'the', 'x', '2', 'with']
+        for _ in range(500):
+            words = rng.sample(vocabulary, rng.randint(0, 5))
+            glue = rng.choice([' ', '', ', '])
+            text = glue.join(words)
+            self.check(text.upper() if rng.random() < 0.2 else text)
+
+
+class AmountsTest(unittest.TestCase):
+
+    def test_quantity_and_strength(self):
+        bot = chatbot.BACChatbot()
+        self.assertEqual(bot.parse_drink("I had 2 beers"), ('beer_regular', 2, None))
+        self.assertEqual(bot.parse_drink("a margarita at 12%"), ('mixed_drink', 1, 12.0))
+        self.assertEqual(bot.parse_drink("3 SHOTS of whiskey at 40.5 %"), ('spirits', 3, 40.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Columnar event store tests
+
+Run:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+from bac_calculator import BACCalculator
+from event_store import EventStore, to_datetime, to_seconds
+
+START = datetime(2000, 1, 1, 20, 0)
+
+
+def at(minutes: float) -> datetime:
+    return START + timedelta(minutes=minutes)
+
+
+class EventStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = EventStore(('size_oz',), derived=('tau',))
+
+    def test_time_round_trip(self):
+        for time in (START, datetime(2024, 2, 29, 23, 59, 59, 999999), datetime(1969, 12, 31, 1)):
+            self.assertEqual(to_datetime(to_seconds(time)), time)
+
+    def test_insert_keeps_time_order_and_is_stable(self):
+        self.assertEqual(self.store.insert(at(30), 'beer', size_oz=12), 0)
+        self.assertEqual(self.store.insert(at(0), 'wine', size_oz=5), 0)
+        self.assertEqual(self.store.insert(at(30), 'shot', size_oz=1.5), 2)  # After the equal time
+
+        self.assertEqual([row['type'] for row in self.store], ['wine', 'beer', 'shot'])
+        self.assertEqual(self.store[1], {'time': at(30), 'type': 'beer', 'size_oz': 12.0})
+
+    def test_extend_sorts_out_of_order_batches_stably(self):
+        events = [{'time': at(m), 'type': f'type{i}', 'size_oz': i} for i, m in
+                  enumerate([40, 10, 40, 0, 10, 25])]
+        self.store.insert(at(10), 'first')
+        self.store.extend(events)
+
+        expected = sorted([{'time': at(10), 'type': 'first', 'size_oz': 0.0}] + events,
+                          key=lambda row: row['time'])
+        self.assertEqual(list(self.store), expected)
+        self.assertEqual(len(self.store), 7)
+
+    def test_extend_matches_repeated_insert(self):
+        rng = random.Random(5)
+        events = [{'time': at(rng.randrange(0, 600, 5)), 'type': rng.choice('abc'),
+                   'size_oz': rng.random()} for _ in range(200)]
+        inserted = EventStore(('size_oz',))
+        for event in events:
+            inserted.insert(event['time'], event['type'], size_oz=event['size_oz'])
+        self.store.extend(events)
+        self.assertEqual(list(self.store), list(inserted))
+
+    def test_views_leave_out_derived_columns_and_are_detached(self):
+        self.store.insert(at(0), 'beer', size_oz=12, tau=18)
+        row = self.store[0]
+        self.assertNotIn('tau', row)
+        self.assertEqual(self.store.columns['tau'][0], 18.0)
+
+        row['size_oz'] = 99
+        self.assertEqual(self.store[0]['size_oz'], 12.0)
+
+    def test_indexing(self):
+        self.store.extend({'time': at(m), 'type': 'beer'} for m in (0, 10, 20))
+        self.assertEqual(self.store[-1]['time'], at(20))
+        self.assertEqual(self.store.time_of(1), at(10))
+        self.assertEqual(self.store.type_of(2), 'beer')
+        with self.assertRaises(IndexError):
+            self.store[3]
+        with self.assertRaises(IndexError):
+            self.store[-4]
+
+    def test_types_are_interned(self):
+        self.store.extend({'time': at(m), 'type': 'beer' if m % 2 else 'wine'} for m in range(100))
+        self.assertEqual(sorted(self.store.type_names), ['beer', 'wine'])
+        self.assertEqual(self.store.codes.itemsize, 2)
+        self.assertEqual(self.store.nbytes(), 100 * (8 + 2 + 8 + 8))
+
+    def test_copy_is_independent(self):
+        self.store.insert(at(0), 'beer', size_oz=12)
+        other = self.store.copy()
+        other.insert(at(5), 'cider', size_oz=16)
+        other.columns['size_oz'][0] = 1.0
+
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store[0]['size_oz'], 12.0)
+        self.assertNotIn('cider', self.store.type_names)
+
+    def test_clear_keeps_type_codes(self):
+        self.store.insert(at(0), 'beer')
+        code = self.store.intern('beer')
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(list(self.store), [])
+        self.assertEqual(self.store.intern('beer'), code)
+
+
+class CalculatorTimelineTest(unittest.TestCase):
+
+    def test_bulk_and_single_adds_agree(self):
+        rng = random.Random(11)
+        drinks = [{'time': at(rng.randrange(0, 300)), 'type': rng.choice(['beer_regular', 'wine_red', 'spirits'])}
+                  for _ in range(30)]
+        foods = [{'time': at(m), 'type': food} for m, food in ((45, 'light_snack'), (150, 'full_meal'))]
+
+        single = BACCalculator()
+        bulk = BACCalculator()
+        for calculator in (single, bulk):
+            calculator.set_profile('male', 170, 35)
+            calculator.start_time = START
+        for food in reversed(foods):
+            single.add_food(food['time'], food['type'])
+        for drink in drinks:
+            single.add_drink(drink['time'], drink['type'])
+        bulk.add_drinks(drinks)
+        bulk.add_foods(foods)
+
+        self.assertEqual(list(single.drinks_timeline), list(bulk.drinks_timeline))
+        self.assertEqual(list(single.food_timeline), list(bulk.food_timeline))
+        for minutes in range(0, 600, 20):
+            self.assertEqual(single.calculate_bac_at_time(at(minutes)), bulk.calculate_bac_at_time(at(minutes)))
+
+    def test_calculator_copy_does_not_share_timelines(self):
+        calculator = BACCalculator()
+        calculator.start_time = START
+        calculator.add_drink(at(0), 'beer_regular')
+        other = calculator.copy()
+        other.add_drink(at(10), 'beer_regular')
+        other.add_food(at(5), 'full_meal')
+
+        self.assertEqual(len(calculator.drinks_timeline), 1)
+        self.assertEqual(len(calculator.food_timeline), 0)
+        self.assertGreater(other.calculate_bac_at_time(at(60)), calculator.calculate_bac_at_time(at(60)))
+
+
+if __name__ == '__main__':
+    unittest.main()
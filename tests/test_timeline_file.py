@@ -0,0 +1,132 @@
+"""
+Binary timeline file tests: write/read round trips
+
+Run:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+# Add Resources directory to Python path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(repo_dir, 'BAC_Simulator.app', 'Contents', 'Resources')
+sys.path.insert(0, resources_dir)
+
+import bac_engine
+import timeline_file
+from bac_calculator import BACCalculator
+from timeline_file import TimelineFile, TimelineWriter
+
+START = datetime(2000, 1, 1, 20, 0)
+
+
+def scenario() -> BACCalculator:
+    calculator = BACCalculator()
+    calculator.set_profile('male', 175, 40)
+    calculator.start_time = START
+    calculator.add_food(START + timedelta(minutes=45), 'light_meal')
+    for minutes in (0, 20, 55, 95):
+        calculator.add_drink(START + timedelta(minutes=minutes), 'beer_ipa')
+    return calculator
+
+
+class TimelineFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'timeline.bactl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_timeline(self, index: int = 0):
+        with TimelineFile(self.path) as reader:
+            return reader.timeline(index)
+
+    def test_fixed_step_round_trip(self):
+        timeline = scenario().get_bac_timeline(hours=8, from_now=False)
+        timeline_file.write_timeline(self.path, timeline)
+        self.assertEqual(self.read_timeline(), timeline)
+
+    def test_adaptive_round_trip(self):
+        # Irregular, sub-minute spacing; times are kept to the millisecond
+        timeline = scenario().get_bac_timeline(hours=8, from_now=False, tolerance=0.001)
+        timeline_file.write_timeline(self.path, timeline)
+        read = self.read_timeline()
+        self.assertEqual(len(read), len(timeline))
+        for (t, bac), (expected_t, expected_bac) in zip(read, timeline):
+            self.assertLess(abs((t - expected_t).total_seconds()), 0.0005)
+            self.assertEqual(bac, expected_bac)
+
+    def test_empty_timeline(self):
+        timeline_file.write_timeline(self.path, [])
+        with TimelineFile(self.path) as reader:
+            self.assertEqual(reader.n_rows, 0)
+            self.assertEqual(reader.n_series, 1)
+            self.assertEqual(len(reader.times), 0)
+            self.assertEqual(len(reader.series()), 0)
+            self.assertEqual(reader.timeline(), [])
+
+    def test_writer_accepts_columns_in_any_order(self):
+        origin = timeline_file.to_seconds(START)
+        with TimelineWriter(self.path, 4, 2, origin, {'label': 'pair'}) as writer:
+            writer.write_series(1, [0.03, 0.04], row=2)
+            writer.write_series(0, [0.1, 0.2, 0.3, 0.4])
+            writer.write_times([120, 180], row=2)
+            writer.write_times([0, 60])
+            writer.write_series(1, [0.01, 0.02])
+
+        with TimelineFile(self.path) as reader:
+            self.assertEqual(reader.metadata, {'label': 'pair'})
+            self.assertEqual(list(reader.times), [0, 60000, 120000, 180000])
+            self.assertEqual(list(reader.series(1)), [0.01, 0.02, 0.03, 0.04])
+            self.assertEqual(reader.timeline(0)[3], (START + timedelta(minutes=3), 0.4))
+            with self.assertRaises(IndexError):
+                reader.series(2)
+
+    def test_rejects_foreign_and_truncated_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 128)
+        with self.assertRaises(ValueError):
+            TimelineFile(self.path)
+
+        timeline_file.write_timeline(self.path, scenario().get_bac_timeline(hours=2, from_now=False))
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 8)
+        with self.assertRaises(ValueError):
+            TimelineFile(self.path)
+
+
+@unittest.skipUnless(bac_engine.has_numpy(), "population curves require NumPy")
+class PopulationFileTest(unittest.TestCase):
+
+    def test_chunked_population_round_trip(self):
+        import bac_batch
+
+        profiles = [{'sex': sex, 'weight_lbs': weight, 'age': 30}
+                    for sex in ('male', 'female') for weight in (120, 160, 200)]
+        scenarios = [{'start_time': START, 'drinks': [{'time': m, 'type': 'wine_red'} for m in (0, 30)]},
+                     {'start_time': START, 'drinks': [{'time': 0, 'type': 'spirits', 'quantity': 3}]}]
+        result = bac_batch.simulate_population(profiles, scenarios, hours=6, step_minutes=10,
+                                               curves=True)
+
+        # Shards arriving out of order, as iter_population_chunks(deterministic=False) yields them
+        shards = [(4, 6), (0, 1), (1, 4)]
+        chunks = [(lo, hi, result._replace(curves=result.curves[lo:hi])) for lo, hi in shards]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cohort.bactl')
+            timeline_file.write_population(path, result.offsets_hours, len(profiles),
+                                           len(scenarios), chunks)
+            with TimelineFile(path) as reader:
+                self.assertEqual(reader.metadata['profiles'], len(profiles))
+                self.assertEqual(list(reader.times), [round(h * 3600000) for h in result.offsets_hours])
+                curves = reader.curves.reshape(len(profiles), len(scenarios), -1).copy()
+        self.assertTrue((curves == result.curves).all())
+
+
+if __name__ == '__main__':
+    unittest.main()